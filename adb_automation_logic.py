@@ -1,5 +1,7 @@
 import subprocess
 
+import adb_client
+
 # Variabel Global untuk status koneksi ADB.
 # Dalam aplikasi nyata, ini akan diatur ke True setelah adb connect berhasil.
 IS_ADB_CONNECTED = True 
@@ -18,24 +20,17 @@ def run_adb_command(command_parts):
         return "Error: ADB tidak terhubung. Silakan jalankan 'adb connect IP:PORT' terlebih dahulu."
     
     try:
-        # Menjalankan perintah ADB. Menggunakan shell=False (disarankan untuk keamanan)
-        # tetapi memerlukan daftar command_parts yang terpisah.
-        result = subprocess.run(
-            command_parts,
-            check=True,  # Akan menaikkan CalledProcessError jika kode keluar non-nol
-            capture_output=True,
-            text=True,
-            encoding='utf-8',
-            timeout=10 # Timeout setelah 10 detik
-        )
+        # Perintah `adb shell ...` dikirim lewat sesi persisten di adb_client,
+        # perintah lain (misalnya `adb devices`) tetap dijalankan sebagai proses tersendiri.
+        exit_code, stdout, stderr = adb_client.execute(command_parts, timeout=10) # Timeout setelah 10 detik
+        
+        if exit_code != 0:
+            # Perintah ADB gagal (misalnya, device offline, error syntax shell)
+            error_output = stderr.strip() or stdout.strip()
+            return f"ADB Command Failed (Exit Code {exit_code}): {error_output}"
         
         # Output sukses
-        return result.stdout.strip()
-    
-    except subprocess.CalledProcessError as e:
-        # Perintah ADB gagal (misalnya, device offline, error syntax shell)
-        error_output = e.stderr.strip() or e.stdout.strip()
-        return f"ADB Command Failed (Exit Code {e.returncode}): {error_output}"
+        return stdout.strip()
     
     except subprocess.TimeoutExpired:
         return "Error: Perintah ADB timeout setelah 10 detik."
@@ -1,32 +1,16 @@
-import subprocess
+import os
 import time
 import re
-import xml.etree.ElementTree as ET
-import os
+
+import ui_dump
+from adb_client import run_adb_command
+from ui_snapshot import Selector, diff_snapshots
+from waits import focused_activity, hierarchy_stable, node_present, wait_report, wait_until
 
 # --- PENTING: CONFIGURATION ---
 # Port terakhir yang berhasil adalah 37753, kita jaga nilai ini.
-ADB_IP_PORT = "192.168.1.16:37753" 
-UI_FILE_PATH = "ui.xml"
+ADB_IP_PORT = os.environ.get("ADB_IP_PORT", "192.168.1.16:37753")
 
-# FUNGSI DASAR (Tidak Berubah)
-def run_adb_command(command_parts):
-    """Menjalankan perintah ADB shell dan menangani output/error."""
-    try:
-        result = subprocess.run(
-            command_parts,
-            check=True,
-            capture_output=True,
-            text=True,
-            encoding='utf-8',
-            timeout=5
-        )
-        return result.stdout.strip()
-    except subprocess.CalledProcessError as e:
-        error_output = e.stderr.strip() or e.stdout.strip()
-        return f"ADB_ERROR (Code {e.returncode}): {error_output}"
-    except Exception as e:
-        return f"ERROR: {e}"
 
 def get_center_coords(bounds_string):
     """Menghitung koordinat tengah (x, y) dari string bounds: [x1,y1][x2,y2]"""
@@ -36,36 +20,34 @@ def get_center_coords(bounds_string):
     return (x1 + x2) // 2, (y1 + y2) // 2
 
 def find_and_tap_text(target_text, scroll_max=1):
-    """Mencari teks yang cocok dalam UI.xml dan mengetuknya."""
-    # Logika pencarian dan gulir tetap sama...
-    target_text_lower = target_text.lower()
+    """Mencari teks yang cocok di hierarki UI (di-dump langsung dari perangkat) dan mengetuknya."""
+    selector = Selector(text_or_desc=target_text)
+    previous = None
+    settled = None
     
     for scroll_count in range(scroll_max + 1):
-        # ... (Dump & Pull UI)
-        run_adb_command(['adb', 'shell', 'uiautomator', 'dump', f'/sdcard/{UI_FILE_PATH}'])
-        run_adb_command(['adb', 'pull', f'/sdcard/{UI_FILE_PATH}', '.'])
-        
-        if os.path.exists(UI_FILE_PATH):
-            try:
-                tree = ET.parse(UI_FILE_PATH)
-                root = tree.getroot()
-                
-                for node in root.iter():
-                    text = node.get('text', '')
-                    content_desc = node.get('content-desc', '')
-                    bounds = node.get('bounds')
-                    
-                    if bounds and (target_text_lower in text.lower() or target_text_lower in content_desc.lower()):
-                        coords = get_center_coords(bounds)
-                        if coords:
-                            run_adb_command(['adb', 'shell', 'input', 'tap', str(coords[0]), str(coords[1])])
-                            return True
-            except Exception:
-                pass
+        # Dump UI di-stream dan berhenti begitu teks ketemu; jika tidak, snapshot penuh untuk diff.
+        # Setelah gulir, snapshot stabil dari cek "gulir selesai" dipakai langsung (tanpa dump lagi).
+        try:
+            if settled is None:
+                attrs, snapshot = ui_dump.locate(selector)
+                coords = None if attrs is None else get_center_coords(attrs['bounds'])
+            else:
+                snapshot, index = settled, settled.first(selector)
+                coords = None if index is None else settled.center(index)
+            if coords is not None:
+                run_adb_command(['adb', 'shell', 'input', 'tap', str(coords[0]), str(coords[1])])
+                return True
+            # Layar tidak berubah setelah digulir: akhir daftar, sisa guliran tidak berguna
+            if previous is not None and not diff_snapshots(previous, snapshot).changed:
+                break
+            previous = snapshot
+        except Exception:
+            pass
         
         if scroll_count < scroll_max:
             run_adb_command(['adb', 'shell', 'input', 'swipe', '500', '1500', '500', '500', '300']) 
-            time.sleep(1) 
+            settled = wait_until(hierarchy_stable(), timeout=3, label="gulir selesai")
 
     return False
 
@@ -82,17 +64,15 @@ def bootstrap_shizuku():
         return f"SHIZUKU GAGAL: Koneksi ADB mati. {result}"
         
     print(f"[{time.strftime('%H:%M:%S')}] Meluncurkan Shizuku.")
-    time.sleep(2) # Tunggu Shizuku terbuka
+    wait_until(focused_activity('shizuku'), timeout=5) # Tunggu Shizuku terbuka
 
     # 2. Tap tombol "Start"
     if find_and_tap_text("Start", scroll_max=0):
         print(f"[{time.strftime('%H:%M:%S')}] Tap SUKSES pada tombol 'Start'.")
-        time.sleep(1)
-        # 3. Verifikasi dengan mencari teks 'running' (Opsional tapi bagus)
-        run_adb_command(['adb', 'shell', 'uiautomator', 'dump', f'/sdcard/{UI_FILE_PATH}'])
-        run_adb_command(['adb', 'pull', f'/sdcard/{UI_FILE_PATH}', '.'])
+        # 3. Verifikasi dengan menunggu teks 'running' muncul (Opsional tapi bagus)
+        running_node = wait_until(node_present(Selector(text_or_desc='running')), timeout=5)
         
-        if os.path.exists(UI_FILE_PATH) and 'running' in open(UI_FILE_PATH).read().lower():
+        if running_node:
              return "BOOTSTRAP SHIZUKU SELESAI TOTAL: Shizuku sekarang berjalan. Koneksi ADB menjadi stabil!"
         else:
             return "BOOTSTRAP SHIZUKU SELESAI: Tombol 'Start' diklik, tetapi status berjalan tidak terdeteksi. Harap periksa Shizuku secara manual."
@@ -122,3 +102,5 @@ if __name__ == "__main__":
     report = bootstrap_wireless_debugging()
     print("\n--- LAPORAN OTOMASI SHIZUKU ---")
     print(report)
+    print("\n--- WAKTU TUNGGU ---")
+    print(wait_report())
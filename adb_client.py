@@ -0,0 +1,178 @@
+import contextvars
+import os
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+
+from metrics import ADB_COMMAND_SECONDS, status_label
+from shell_session import ShellSession, ShellSessionError
+
+# --- PENTING: CONFIGURATION ---
+# Biner ADB bisa diganti lewat environment, misalnya ADB_BIN=./fake_adb.py untuk uji offline.
+ADB_BIN = os.environ.get("ADB_BIN", "adb")
+DEFAULT_TIMEOUT = 5
+
+# Satu sesi `adb shell` persisten per perangkat (kunci "" = perangkat default).
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+# Backend ADB aktif: None = perangkat sungguhan lewat biner adb. adb_trace.py memasang backend
+# perekam/pemutar ulang trace lewat set_backend() (lihat device_shell/device_run untuk antarmukanya).
+_backend = None
+
+# Perangkat target untuk konteks saat ini (thread / task asyncio). Dipakai jika `serial` tidak diisi,
+# jadi skrip lama yang tidak mengenal serial tetap bisa dijalankan per perangkat oleh orchestrator.
+_current_serial = contextvars.ContextVar("adb_serial", default=None)
+
+
+@contextmanager
+def use_device(serial):
+    """Semua perintah ADB di dalam blok ini (tanpa `serial` eksplisit) diarahkan ke `serial`."""
+    token = _current_serial.set(serial)
+    try:
+        yield serial
+    finally:
+        _current_serial.reset(token)
+
+
+def current_serial():
+    """Serial perangkat untuk konteks saat ini, atau None (perangkat default ADB)."""
+    return _current_serial.get()
+
+
+def adb_argv(*args, serial=None):
+    """Menyusun argv ADB lengkap, dengan `-s SERIAL` jika perangkat ditentukan."""
+    serial = serial or _current_serial.get()
+    argv = [ADB_BIN]
+    if serial:
+        argv += ['-s', serial]
+    return argv + list(args)
+
+
+def get_session(serial=None):
+    """Mengembalikan sesi `adb shell` persisten untuk perangkat tersebut."""
+    serial = serial or _current_serial.get()
+    key = serial or ""
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = ShellSession(adb_argv('shell', serial=serial), name=f"adb:{key or 'default'}")
+            _sessions[key] = session
+        return session
+
+
+def set_backend(backend):
+    """
+    Mengganti backend ADB dan mengembalikan backend sebelumnya (None = perangkat sungguhan).
+
+    Backend menyediakan shell(command, serial, timeout) -> (exit_code, output),
+    run(parts, serial, timeout) -> (exit_code, stdout, stderr) dan dump(serial, timeout) -> generator
+    potongan XML (dipakai ui_dump.stream_dump).
+    """
+    global _backend
+    previous, _backend = _backend, backend
+    return previous
+
+
+def get_backend():
+    return _backend
+
+
+def close_all():
+    """Menutup semua sesi `adb shell` yang terbuka."""
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
+
+
+def shell(command, serial=None, timeout=DEFAULT_TIMEOUT):
+    """
+    Menjalankan perintah di sesi `adb shell` persisten dan mengembalikan (exit_code, output).
+
+    `command` boleh string atau list; list digabung dengan spasi persis seperti
+    yang dilakukan `adb shell` sendiri.
+    """
+    if not isinstance(command, str):
+        command = ' '.join(str(part) for part in command)
+    verb = "shell " + (command.split(None, 1) or [""])[0]
+    backend = _backend
+    start = time.perf_counter()
+    try:
+        if backend is not None:
+            exit_code, output = backend.shell(command, serial, timeout)
+        else:
+            exit_code, output = device_shell(command, serial, timeout)
+    except Exception as e:
+        ADB_COMMAND_SECONDS.observe(time.perf_counter() - start, verb, status_label(e))
+        raise
+    ADB_COMMAND_SECONDS.observe(time.perf_counter() - start, verb, "ok" if exit_code == 0 else "error")
+    return exit_code, output
+
+
+def execute(command_parts, timeout=DEFAULT_TIMEOUT, serial=None):
+    """
+    Menjalankan ['adb', ...] dan mengembalikan (exit_code, stdout, stderr).
+
+    `adb shell <perintah>` dikirim lewat sesi persisten (stderr sudah digabung ke stdout);
+    perintah lain (pull, devices, connect, ...) tetap dijalankan sebagai proses tersendiri.
+    Melempar subprocess.TimeoutExpired, FileNotFoundError atau ShellSessionError.
+    """
+    parts = list(command_parts)
+    if parts and parts[0] == 'adb':
+        parts = parts[1:]
+    if len(parts) >= 2 and parts[0] == '-s':
+        serial, parts = parts[1], parts[2:]
+
+    if len(parts) > 1 and parts[0] == 'shell':
+        exit_code, output = shell(parts[1:], serial=serial, timeout=timeout)
+        return exit_code, output, ""
+
+    verb = parts[0] if parts else ""
+    backend = _backend
+    start = time.perf_counter()
+    try:
+        if backend is not None:
+            exit_code, stdout, stderr = backend.run(parts, serial, timeout)
+        else:
+            exit_code, stdout, stderr = device_run(parts, serial, timeout)
+    except Exception as e:
+        ADB_COMMAND_SECONDS.observe(time.perf_counter() - start, verb, status_label(e))
+        raise
+    ADB_COMMAND_SECONDS.observe(time.perf_counter() - start, verb, "ok" if exit_code == 0 else "error")
+    return exit_code, stdout, stderr
+
+
+# --- JALUR PERANGKAT SUNGGUHAN (dipakai langsung, atau dibungkus perekam trace) ---
+def device_shell(command, serial=None, timeout=DEFAULT_TIMEOUT):
+    """Perintah string di sesi `adb shell` persisten perangkat: (exit_code, output)."""
+    return get_session(serial).run(command, timeout=timeout)
+
+
+def device_run(parts, serial=None, timeout=DEFAULT_TIMEOUT):
+    """Perintah adb non-shell (pull, devices, connect, ...) sebagai proses tersendiri: (exit_code, stdout, stderr)."""
+    result = subprocess.run(
+        adb_argv(*parts, serial=serial),
+        capture_output=True,
+        text=True,
+        encoding='utf-8',
+        timeout=timeout
+    )
+    return result.returncode, result.stdout, result.stderr
+
+
+# FUNGSI DASAR (pengganti salinan run_adb_command di tiap skrip)
+def run_adb_command(command_parts, timeout=DEFAULT_TIMEOUT, serial=None):
+    """Menjalankan perintah ADB dan menangani output/error."""
+    try:
+        exit_code, stdout, stderr = execute(command_parts, timeout=timeout, serial=serial)
+        if exit_code != 0:
+            error_output = stderr.strip() or stdout.strip()
+            return f"ADB_ERROR (Code {exit_code}): {error_output}"
+        return stdout.strip()
+    except ShellSessionError as e:
+        return f"ADB_ERROR (Code 255): {e}"
+    except Exception as e:
+        return f"ERROR: {e}"
@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+"""
+Rekam & putar ulang sesi ADB untuk uji regresi performa tanpa perangkat.
+
+Merekam sesi sungguhan (semua perintah ADB + dump hierarki UI, dengan waktu dan output):
+  python adb_trace.py record sesi-miui.trace.gz Bootstrap
+
+Memutar ulang trace ke kode saat ini, tanpa perangkat, lalu membandingkan waktu per langkah:
+  python adb_trace.py replay sesi-miui.trace.gz Bootstrap                # kecepatan asli
+  python adb_trace.py replay --speed 0 sesi-miui.trace.gz Bootstrap      # tanpa jeda perangkat
+  python adb_trace.py replay --report hasil.json sesi-miui.trace.gz Bootstrap
+
+Opsi ditulis sebelum TRACE; semua argumen setelah SCRIPT diteruskan ke skrip.
+
+Ringkasan isi trace:
+  python adb_trace.py show sesi-miui.trace.gz
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import runpy
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import adb_client
+import ui_dump
+from shell_session import ShellSessionError
+
+# --- PENTING: CONFIGURATION ---
+TRACE_VERSION = 1
+# Saat memutar ulang, perintah dicari paling jauh sekian event ke depan; event yang dilompati
+# dicatat "skipped" (kode baru tidak membutuhkannya, misalnya navigasi yang lebih pendek).
+ADB_TRACE_LOOKAHEAD = 50
+# Jumlah langkah dengan selisih waktu terbesar yang ditampilkan di laporan teks.
+ADB_TRACE_REPORT_TOP = 15
+
+# Jenis event: perintah `adb shell`, perintah adb lain, dan dump hierarki UI
+SHELL, RUN, DUMP = "shell", "run", "dump"
+_ERRORS = {"TimeoutExpired": lambda error: subprocess.TimeoutExpired(error.get("cmd", "adb"), error.get("timeout", 0)),
+           "ShellSessionError": lambda error: ShellSessionError(error["message"]),
+           "FileNotFoundError": lambda error: FileNotFoundError(error["message"])}
+
+
+class TraceReplayError(Exception):
+    """Trace tidak bisa dibaca atau versinya tidak dikenal."""
+
+
+# --- FILE TRACE ---
+class TraceWriter:
+    """
+    File trace: JSONL terkompresi gzip, satu event per baris.
+
+    Dump hierarki disimpan sekali per isi (baris {"k": "xml", "id", "data"}); event dump hanya
+    menyimpan id-nya, jadi layar yang sama berulang kali (polling tunggu) hampir tidak menambah ukuran.
+    """
+
+    def __init__(self, path, meta=None):
+        self.path = path
+        self._file = gzip.open(path, 'wt', encoding='utf-8')
+        self._lock = threading.Lock()
+        self._xml_ids = {}
+        self.events = 0
+        self._write({"k": "header", "version": TRACE_VERSION, "started": time.time(), **(meta or {})})
+
+    def _write(self, entry):
+        self._file.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    def xml_id(self, data):
+        """Id isi dump (ditulis ke trace jika baru)."""
+        digest = hashlib.blake2b(data, digest_size=12).hexdigest()
+        with self._lock:
+            xml_id = self._xml_ids.get(digest)
+            if xml_id is None:
+                xml_id = self._xml_ids[digest] = len(self._xml_ids)
+                self._write({"k": "xml", "id": xml_id, "data": data.decode('utf-8', errors='replace')})
+            return xml_id
+
+    def event(self, entry):
+        with self._lock:
+            self.events += 1
+            self._write(entry)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class Trace:
+    """Trace yang sudah dibaca: header, daftar event (urutan rekaman) dan isi dump per id."""
+
+    def __init__(self, path):
+        self.path = path
+        self.header = None
+        self.events = []
+        self.xml = {}
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    entry = json.loads(line)
+                    if entry["k"] == "header":
+                        self.header = entry
+                    elif entry["k"] == "xml":
+                        self.xml[entry["id"]] = entry["data"].encode('utf-8')
+                    else:
+                        entry["i"] = len(self.events)
+                        self.events.append(entry)
+        except (OSError, ValueError, KeyError) as e:
+            raise TraceReplayError(f"Trace {path} tidak bisa dibaca: {e}")
+        if not self.header or self.header.get("version") != TRACE_VERSION:
+            raise TraceReplayError(f"Versi trace {path} tidak dikenal: {self.header and self.header.get('version')}")
+
+    @property
+    def duration(self):
+        return max((event["t"] + event["d"] for event in self.events), default=0.0)
+
+    def serials(self):
+        return sorted({event.get("s") or "" for event in self.events})
+
+    def summary(self):
+        kinds = {}
+        for event in self.events:
+            kinds[event["k"]] = kinds.get(event["k"], 0) + 1
+        return {
+            "path": self.path,
+            "bytes": os.path.getsize(self.path),
+            "argv": self.header.get("argv"),
+            "started": self.header.get("started"),
+            "duration_s": round(self.duration, 3),
+            "events": len(self.events),
+            "kinds": kinds,
+            "unique_screens": len(self.xml),
+            "serials": self.serials(),
+        }
+
+
+def _error_entry(e):
+    entry = {"type": type(e).__name__, "message": str(e)}
+    if isinstance(e, subprocess.TimeoutExpired):
+        entry.update(cmd=e.cmd if isinstance(e.cmd, str) else " ".join(map(str, e.cmd)), timeout=e.timeout)
+    return entry
+
+
+def _raise_recorded(error):
+    factory = _ERRORS.get(error["type"], lambda error: RuntimeError(error["message"]))
+    raise factory(error)
+
+
+# --- REKAM ---
+class RecordingBackend:
+    """Backend adb_client yang meneruskan ke perangkat sungguhan sambil menulis setiap panggilan ke trace."""
+
+    def __init__(self, path, meta=None):
+        self.writer = TraceWriter(path, meta)
+        self._start = time.perf_counter()
+
+    def _now(self):
+        return time.perf_counter() - self._start
+
+    def _record(self, kind, command, serial, call):
+        serial = serial or adb_client.current_serial()
+        t = self._now()
+        entry = {"k": kind, "c": command, "s": serial, "t": round(t, 6)}
+        try:
+            result = call()
+        except Exception as e:
+            entry.update(d=round(self._now() - t, 6), err=_error_entry(e))
+            self.writer.event(entry)
+            raise
+        entry["d"] = round(self._now() - t, 6)
+        return entry, result
+
+    def shell(self, command, serial, timeout):
+        entry, (exit_code, output) = self._record(
+            SHELL, command, serial, lambda: adb_client.device_shell(command, serial, timeout))
+        entry.update(x=exit_code, o=output)
+        self.writer.event(entry)
+        return exit_code, output
+
+    def run(self, parts, serial, timeout):
+        command = " ".join(str(part) for part in parts)
+        entry, (exit_code, stdout, stderr) = self._record(
+            RUN, command, serial, lambda: adb_client.device_run(parts, serial, timeout))
+        entry.update(x=exit_code, o=stdout, e=stderr)
+        self.writer.event(entry)
+        return exit_code, stdout, stderr
+
+    def dump(self, serial, timeout):
+        """Meneruskan potongan dump ke pemanggil; dump lengkap disimpan walaupun pemanggil berhenti lebih awal."""
+        serial = serial or adb_client.current_serial()
+        t = self._now()
+        entry = {"k": DUMP, "c": "uiautomator dump", "s": serial, "t": round(t, 6)}
+        chunks = ui_dump.device_stream_dump(serial, timeout)
+        data = []
+        try:
+            for chunk in chunks:
+                data.append(chunk)
+                yield chunk
+        except GeneratorExit:
+            pass
+        except Exception as e:
+            entry.update(d=round(self._now() - t, 6), err=_error_entry(e))
+            self.writer.event(entry)
+            raise
+        finally:
+            if "err" not in entry:
+                # Durasi yang dirasakan pemanggil; sisa dump hanya dibaca agar layarnya utuh di trace
+                entry["d"] = round(self._now() - t, 6)
+                data.extend(chunks)
+                entry["h"] = self.writer.xml_id(b"".join(data))
+                self.writer.event(entry)
+            chunks.close()
+
+    def close(self):
+        self.writer.close()
+
+
+# --- PUTAR ULANG ---
+class ReplayBackend:
+    """
+    Backend adb_client yang menjawab dari trace, tanpa perangkat.
+
+    - Aksi (shell/run) dicocokkan dengan event aksi berikutnya yang perintahnya sama (maksimal
+      ADB_TRACE_LOOKAHEAD event ke depan); event di antaranya dicatat "skipped".
+    - Dump mengambil event dump berikutnya jika belum ada aksi di depannya; jika kode baru
+      men-dump lebih sering dari rekaman, layar terakhir diberikan lagi ("repeat") karena
+      belum ada aksi yang mengubah layar.
+    - `speed`: 1 = jeda perangkat seperti rekaman, 2 = dua kali lebih cepat, 0 = tanpa jeda.
+
+    Satu aliran event per serial; trace dengan satu perangkat dipakai untuk serial apa pun.
+    """
+
+    def __init__(self, trace, speed=1.0, lookahead=ADB_TRACE_LOOKAHEAD):
+        self.trace = trace
+        self.speed = speed
+        self.lookahead = lookahead
+        serials = trace.serials()
+        self._single = serials[0] if len(serials) == 1 else None
+        self._streams = {}
+        for event in trace.events:
+            self._streams.setdefault(event.get("s") or "", []).append(event)
+        self._cursor = {serial: 0 for serial in self._streams}
+        self._last_xml = {}
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self.steps = []
+        self.unmatched = []
+        self.repeats = 0
+
+    def _stream(self, serial):
+        serial = self._single if self._single is not None else (serial or adb_client.current_serial() or "")
+        return serial, self._streams.get(serial, [])
+
+    def _now(self):
+        return time.perf_counter() - self._start
+
+    def _step(self, event, status, replayed_at, replayed_ms=None):
+        self.steps.append({
+            "i": event["i"], "kind": event["k"], "command": event["c"], "status": status,
+            "recorded_at": event["t"], "recorded_ms": round(event["d"] * 1000, 3),
+            "replayed_at": round(replayed_at, 6) if replayed_at is not None else None,
+            "replayed_ms": round(replayed_ms * 1000, 3) if replayed_ms is not None else None,
+        })
+
+    def _pace(self, event):
+        if self.speed > 0 and event["d"] > 0:
+            time.sleep(event["d"] / self.speed)
+
+    def _take(self, kind, command, serial):
+        """Event rekaman untuk panggilan ini (cursor dimajukan), atau None jika tidak ada yang cocok."""
+        with self._lock:
+            serial, stream = self._stream(serial)
+            cursor = self._cursor.get(serial, 0)
+            now = self._now()
+            if kind == DUMP:
+                if cursor < len(stream) and stream[cursor]["k"] == DUMP:
+                    self._cursor[serial] = cursor + 1
+                    return stream[cursor], now
+                return None, now
+            for index in range(cursor, min(len(stream), cursor + self.lookahead)):
+                event = stream[index]
+                if event["k"] == kind and event["c"] == command:
+                    for skipped in stream[cursor:index]:
+                        self._step(skipped, "skipped", None)
+                    self._cursor[serial] = index + 1
+                    return event, now
+            self.unmatched.append({"kind": kind, "command": command, "serial": serial, "replayed_at": round(now, 6)})
+            return None, now
+
+    def _finish(self, event, started_at):
+        self._pace(event)
+        with self._lock:
+            self._step(event, "matched", started_at, self._now() - started_at)
+        if "err" in event:
+            _raise_recorded(event["err"])
+
+    def shell(self, command, serial, timeout):
+        event, started_at = self._take(SHELL, command, serial)
+        if event is None:
+            return 0, ""
+        self._finish(event, started_at)
+        return event["x"], event["o"]
+
+    def run(self, parts, serial, timeout):
+        event, started_at = self._take(RUN, " ".join(str(part) for part in parts), serial)
+        if event is None:
+            return 0, "", ""
+        self._finish(event, started_at)
+        return event["x"], event["o"], event["e"]
+
+    def dump(self, serial, timeout):
+        event, started_at = self._take(DUMP, "uiautomator dump", serial)
+        key = self._stream(serial)[0]
+        if event is None:
+            data = self._last_xml.get(key)
+            if data is None:
+                with self._lock:
+                    self.unmatched.append({"kind": DUMP, "command": "uiautomator dump", "serial": key,
+                                           "replayed_at": round(started_at, 6)})
+                return iter([])
+            with self._lock:
+                self.repeats += 1
+            return iter([data])
+        self._finish(event, started_at)
+        data = self.trace.xml.get(event.get("h"), b"")
+        self._last_xml[key] = data
+        return iter([data])
+
+    # --- Laporan ---
+    def report(self):
+        """Ringkasan: total waktu rekaman vs putar ulang, jumlah langkah, dan selisih jeda per langkah."""
+        with self._lock:
+            steps = sorted(self.steps, key=lambda step: step["i"])
+            unmatched = list(self.unmatched)
+            replayed = self._now()
+        matched = [step for step in steps if step["status"] == "matched"]
+        # Jeda sebelum langkah = waktu kode sendiri (logika, tunggu) sejak langkah sebelumnya selesai;
+        # waktu perangkat untuk event yang dilompati tidak dihitung sebagai jeda rekaman
+        previous = None
+        skipped_ms = 0.0
+        for step in steps:
+            if step["status"] == "skipped":
+                skipped_ms += step["recorded_ms"]
+                continue
+            if previous is None:
+                recorded_gap = step["recorded_at"] * 1000 - skipped_ms
+                replayed_gap = step["replayed_at"] * 1000
+            else:
+                recorded_gap = (step["recorded_at"] - previous["recorded_at"]) * 1000 - previous["recorded_ms"] - skipped_ms
+                replayed_gap = (step["replayed_at"] - previous["replayed_at"]) * 1000 - previous["replayed_ms"]
+            step["recorded_gap_ms"] = round(recorded_gap, 3)
+            step["replayed_gap_ms"] = round(replayed_gap, 3)
+            step["gap_diff_ms"] = round(replayed_gap - recorded_gap, 3)
+            previous = step
+            skipped_ms = 0.0
+        consumed = {step["i"] for step in steps}
+        return {
+            "trace": self.trace.path,
+            "speed": self.speed,
+            "recorded_s": round(self.trace.duration, 3),
+            "replayed_s": round(replayed, 3),
+            "events": len(self.trace.events),
+            "matched": len(matched),
+            "skipped": sum(1 for step in steps if step["status"] == "skipped"),
+            "not_reached": len(self.trace.events) - len(consumed),
+            "repeats": self.repeats,
+            "unmatched": unmatched,
+            "steps": steps,
+        }
+
+
+def format_report(report, top=ADB_TRACE_REPORT_TOP):
+    lines = [
+        f"Trace {report['trace']} (kecepatan {report['speed']}x)",
+        f"Total: rekaman {report['recorded_s']:.3f} s, putar ulang {report['replayed_s']:.3f} s "
+        f"({report['replayed_s'] - report['recorded_s']:+.3f} s)",
+        f"Langkah: {report['matched']} cocok, {report['skipped']} dilompati, {report['not_reached']} tidak tercapai, "
+        f"{report['repeats']} dump diulang, {len(report['unmatched'])} panggilan tanpa pasangan",
+    ]
+    matched = [step for step in report["steps"] if step["status"] == "matched"]
+    if matched:
+        lines.append("")
+        lines.append(f"Selisih jeda terbesar sebelum langkah (kode/tunggu, bukan perangkat), top {top}:")
+        lines.append(f"{'#':>5}  {'jenis':<6}{'rekaman':>11}{'ulang':>11}{'selisih':>11}  perintah")
+        for step in sorted(matched, key=lambda step: abs(step["gap_diff_ms"]), reverse=True)[:top]:
+            lines.append(f"{step['i']:>5}  {step['kind']:<6}{step['recorded_gap_ms']:>9.1f}ms{step['replayed_gap_ms']:>9.1f}ms"
+                         f"{step['gap_diff_ms']:>+9.1f}ms  {step['command'][:60]}")
+    for call in report["unmatched"][:top]:
+        lines.append(f"Tanpa pasangan di trace: {call['kind']} '{call['command'][:60]}' pada {call['replayed_at']:.3f} s")
+    return "\n".join(lines)
+
+
+# --- API ---
+@contextmanager
+def recording(path, meta=None):
+    """Semua panggilan ADB di dalam blok direkam ke `path`."""
+    backend = RecordingBackend(path, meta)
+    previous = adb_client.set_backend(backend)
+    try:
+        yield backend
+    finally:
+        adb_client.set_backend(previous)
+        backend.close()
+
+
+@contextmanager
+def replaying(path, speed=1.0):
+    """Semua panggilan ADB di dalam blok dijawab dari trace `path`; backend.report() untuk hasilnya."""
+    backend = ReplayBackend(Trace(path), speed)
+    previous = adb_client.set_backend(backend)
+    # Snapshot dari sesi sebelumnya tidak boleh menyamarkan waktu parse saat putar ulang
+    ui_dump.SNAPSHOT_CACHE.clear()
+    try:
+        yield backend
+    finally:
+        adb_client.set_backend(previous)
+
+
+def run_script(script, args):
+    """Menjalankan skrip otomasi (mis. Bootstrap) di proses ini seperti `python script args...`."""
+    sys.argv = [script, *args]
+    sys.path.insert(0, os.path.dirname(os.path.abspath(script)))
+    try:
+        runpy.run_path(script, run_name="__main__")
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            print(f"[{time.strftime('%H:%M:%S')}] Skrip berhenti dengan kode {e.code}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rekam & putar ulang sesi ADB (trace).")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record = commands.add_parser("record", help="Jalankan skrip dengan perangkat sungguhan dan rekam trace.")
+    record.add_argument("trace")
+    record.add_argument("script")
+    record.add_argument("args", nargs=argparse.REMAINDER)
+    replay = commands.add_parser("replay", help="Jalankan skrip terhadap trace (tanpa perangkat).")
+    replay.add_argument("trace")
+    replay.add_argument("script")
+    replay.add_argument("--speed", type=float, default=1.0, help="1 = waktu asli, 0 = tanpa jeda perangkat.")
+    replay.add_argument("--report", help="Simpan laporan lengkap (JSON) ke file ini.")
+    replay.add_argument("args", nargs=argparse.REMAINDER)
+    show = commands.add_parser("show", help="Ringkasan isi trace.")
+    show.add_argument("trace")
+    args = parser.parse_args()
+
+    if args.command == "show":
+        print(json.dumps(Trace(args.trace).summary(), indent=1))
+        return
+
+    if args.command == "record":
+        with recording(args.trace, {"argv": [args.script, *args.args]}) as backend:
+            run_script(args.script, args.args)
+        adb_client.close_all()
+        print(f"\n[{time.strftime('%H:%M:%S')}] Trace disimpan: {args.trace} ({backend.writer.events} event)")
+        return
+
+    with replaying(args.trace, args.speed) as backend:
+        run_script(args.script, args.args)
+    report = backend.report()
+    print("\n--- LAPORAN PUTAR ULANG ---")
+    print(format_report(report))
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=1, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
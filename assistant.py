@@ -0,0 +1,252 @@
+# Inti asisten tanpa Flask: klien & cache Gemini, riwayat chat, log audit dan sinkronisasi Git.
+# Dipakai web_server.py (endpoint) dan cli.py (`python cli.py audit`), jadi modul ini tidak boleh
+# mengimpor Flask; perintah CLI yang tidak memanggil Gemini juga tidak mengimpor modul ini.
+import os
+import time
+
+import requests
+
+from gemini_client import GeminiClient, chunk_sources, chunk_text, format_sources, parse_response
+from chat_store import ChatStore
+from context_builder import ContextBuilder
+from response_cache import ResponseCache, cache_key, ttl_for
+from job_queue import no_progress
+from git_sync import GitSync
+from audit_store import AuditStore, local_day, write_day_report
+from metrics import GEMINI_REPLY_SECONDS
+
+# --- Konfigurasi Awal ---
+
+# Dapatkan kunci API dari environment
+# PENTING: Kunci harus diset di Termux: export GEMINI_API_KEY='YOUR_KEY'
+GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY", "")
+
+# Klien API bersama: koneksi keep-alive dipakai ulang dan setiap panggilan punya batas waktu.
+# Endpoint/model/timeout diatur di gemini_client.py (GEMINI_API_BASE, GEMINI_MODEL, GEMINI_*_TIMEOUT).
+GEMINI_CLIENT = GeminiClient(GEMINI_API_KEY)
+
+# Cache jawaban Gemini (kunci = model + payload). Disimpan juga di SQLite agar bertahan setelah restart;
+# isi GEMINI_CACHE_DB='' untuk cache memori saja. Masa berlaku per kelas prompt ada di response_cache.py.
+GEMINI_CACHE_DB = os.environ.get("GEMINI_CACHE_DB", "gemini_cache.db")
+RESPONSE_CACHE = ResponseCache(db_path=GEMINI_CACHE_DB or None)
+
+# Riwayat chat: pesan terbaru di memori (jendela prompt), semua pesan di log JSONL append-only.
+# Halaman lama dibaca lewat /history sesuai kebutuhan, tidak lagi ditanam utuh di HTML.
+CHAT_LOG_FILE = os.environ.get("CHAT_LOG_FILE", "chat_history.jsonl")
+CHAT_STORE = ChatStore(CHAT_LOG_FILE or None)
+# Nama aplikasi di judul laporan audit dan pesan commit berkala.
+APP_ID = os.environ.get("APP_ID", "termux_dev_bot")
+# Laporan lama (teks bebas) tetap terdaftar di git, tetapi audit baru masuk ke AUDIT_STORE: log JSONL
+# per hari di AUDIT_LOG_DIR, dengan laporan Markdown per hari di AUDIT_REPORT_DIR (lihat audit_store.py).
+AUDIT_FILE = "audit_report.md"
+AUDIT_STORE = AuditStore()
+# Hanya file keluaran terdaftar yang di-commit (bukan `git add .`). Tambahkan path lain lewat
+# GIT_SYNC_PATHS='a.md,b.json'. Commit audit di-push bergabung (GIT_PUSH_WINDOW/GIT_PUSH_EVERY di git_sync.py).
+GIT_SYNC_PATHS = [path.strip() for path in os.environ.get("GIT_SYNC_PATHS", "").split(",") if path.strip()]
+GIT_SYNC = GitSync(paths=[AUDIT_FILE, *GIT_SYNC_PATHS])
+
+# --- Fungsi Utilitas (Termux, Git) ---
+
+def run_git_audit(commit_message, progress=no_progress, push=True):
+    """
+    Menjalankan alur Git Audit untuk file terdaftar: add, commit, push (tanpa -S untuk menghindari error GPG).
+
+    `push=False` hanya membuat commit lokal; push digabung oleh GIT_SYNC. `progress(tahap, status, detail)`
+    dipanggil untuk tahap add/commit/push (lihat job_queue.Task.progress).
+    """
+    try:
+        # Add + commit path yang berubah saja, lalu push sekarang atau digabung
+        outcome = GIT_SYNC.commit(commit_message, progress, push=push)
+        if outcome['error']:
+            return outcome['error']
+
+        if outcome['committed']:
+            status = f"Commit lokal dibuat untuk {', '.join(outcome['paths'])}."
+        else:
+            status = f"Tidak ada perubahan pada file terdaftar ({', '.join(GIT_SYNC.paths)}); commit dilewati."
+        if outcome['push'] == "done":
+            status += " `git push` berhasil."
+        elif outcome['push'] == "deferred":
+            status += f" Push digabung: {GIT_SYNC.pending_commits} commit menunggu (paling lambat {GIT_SYNC.push_window:g} detik)."
+        return f"Sinkronisasi Git selesai: {status}\nCommit Message: {commit_message}"
+    
+    except Exception as e:
+        return f"Error Fatal Git Audit: {e}"
+
+# --- Fungsi Inti Gemini (Menggunakan Requests) ---
+
+SYSTEM_INSTRUCTION = "Anda adalah Asisten Gemini yang bekerja di server pengembangan Termux. Tugas Anda adalah membantu pengguna dengan riset bisnis, debugging kode, eksekusi perintah Termux, dan mengelola sinkronisasi Git/Audit. Jawab dengan singkat, jelas, dan profesional. Jika ada konteks Git atau Audit, jangan mengulang tawaran riset umum."
+
+def summarize_history(previous_summary, messages):
+    """Ringkasan bergulir: ringkasan lama + pesan yang baru keluar dari jendela konteks (tanpa Google Search)."""
+    transcript = "\n".join(f"{m['role']}: {m['text']}" for m in messages)
+    prompt = (
+        "Perbarui ringkasan percakapan berikut dalam maksimal 150 kata. Pertahankan fakta, keputusan, "
+        "nama file, dan perintah penting; buang basa-basi.\n\n"
+        f"Ringkasan sebelumnya:\n{previous_summary or '(belum ada)'}\n\nPesan baru:\n{transcript}"
+    )
+    result = GEMINI_CLIENT.generate({"contents": [{"role": "user", "parts": [{"text": prompt}]}]})
+    return parse_response(result)[0]
+
+# Konteks diisi berdasarkan anggaran token (CONTEXT_TOKEN_BUDGET), bukan jumlah pesan;
+# pesan lama diwakili ringkasan bergulir.
+CONTEXT_BUILDER = ContextBuilder(CHAT_STORE, summarizer=summarize_history)
+
+def build_gemini_payload(prompt, include_history=True):
+    """
+    Menyusun payload generateContent: history terbaru dalam anggaran token + prompt baru, Google Search,
+    dan instruksi sistem (ditambah ringkasan percakapan lama jika ada). Mengembalikan (payload, metrik).
+    Prompt yang berdiri sendiri (misalnya riset audit) dikirim tanpa history agar jawabannya bisa di-cache.
+    """
+    contents, system_text, info = CONTEXT_BUILDER.build(prompt, SYSTEM_INSTRUCTION, include_history)
+    payload = {
+        "contents": contents,
+        "tools": [{"google_search": {}}], 
+        "systemInstruction": {
+            "parts": [{
+                "text": system_text
+            }]
+        }
+    }
+    return payload, CONTEXT_BUILDER.measure(payload, info)
+
+def record_usage(info, result):
+    """Mencatat jumlah token prompt sebenarnya (usageMetadata) di samping perkiraan."""
+    usage = result.get('usageMetadata') or {}
+    if 'promptTokenCount' in usage:
+        info["prompt_tokens_actual"] = usage['promptTokenCount']
+
+def record_exchange(prompt, text_response):
+    """Menyimpan satu pasangan pertanyaan/jawaban ke riwayat chat."""
+    CHAT_STORE.append("user", prompt)
+    CHAT_STORE.append("model", text_response)
+
+def gemini_error_message(error):
+    """Pesan galat untuk pengguna dari exception requests/klien Gemini."""
+    if isinstance(error, requests.exceptions.HTTPError):
+        return f"Error HTTP API Gemini: {error.response.status_code}. Detail: Cek apakah kunci API Anda benar. Error: {error.response.text}"
+    if isinstance(error, requests.exceptions.Timeout):
+        return f"Error: API Gemini tidak merespons dalam batas waktu {GEMINI_CLIENT.timeout[1]:g} detik. Coba lagi."
+    return f"Error saat memanggil Gemini (Requests): {error}"
+
+def cached_reply(payload, no_cache=False):
+    """(kunci cache, (teks, sumber) atau None). `no_cache` melewati pembacaan cache."""
+    key = cache_key(GEMINI_CLIENT.model, payload)
+    cached = None if no_cache else RESPONSE_CACHE.get(key)
+    if cached is None:
+        return key, None
+    return key, (cached["text"], [tuple(source) for source in cached["sources"]])
+
+def store_reply(key, prompt_class, text_response, sources):
+    RESPONSE_CACHE.put(key, {"text": text_response, "sources": sources}, ttl_for(prompt_class), prompt_class)
+
+def gemini_reply(prompt, prompt_class="chat", include_history=True, no_cache=False):
+    """
+    Memanggil model Gemini menggunakan pustaka requests; mengembalikan (teks, sumber, pesan_error).
+
+    Jawaban untuk payload yang sama diambil dari RESPONSE_CACHE selama masa berlaku `prompt_class`.
+    `no_cache=True` selalu memanggil API (hasil barunya tetap menggantikan isi cache).
+    Jika gagal, teks kosong dan pesan_error berisi pesan untuk pengguna.
+    """
+    if not GEMINI_API_KEY:
+        # Peringatan ketersediaan API Key
+        return "", [], "Error: GEMINI_API_KEY tidak diatur atau tidak valid di environment Termux Anda. Harap atur kunci API yang benar."
+
+    start = time.perf_counter()
+    payload, info = build_gemini_payload(prompt, include_history)
+    key, cached = cached_reply(payload, no_cache)
+    source = "cache" if cached else "api"
+    try:
+        if cached:
+            text_response, sources = cached
+        else:
+            result = GEMINI_CLIENT.generate(payload)
+            record_usage(info, result)
+            text_response, sources = parse_response(result)
+            store_reply(key, prompt_class, text_response, sources)
+        record_exchange(prompt, text_response)
+        GEMINI_REPLY_SECONDS.observe(time.perf_counter() - start, prompt_class, source, "ok")
+        return text_response, sources, None
+    except Exception as e:
+        GEMINI_REPLY_SECONDS.observe(time.perf_counter() - start, prompt_class, source, "error")
+        return "", [], gemini_error_message(e)
+
+def generate_gemini_content(prompt, prompt_class="chat", include_history=True, no_cache=False):
+    """Jawaban Gemini sebagai teks Markdown (dengan blok sumber riset), atau pesan error."""
+    text_response, sources, error = gemini_reply(prompt, prompt_class, include_history, no_cache)
+    if error:
+        return error
+    return text_response + format_sources(sources)
+
+def stream_gemini_content(prompt, no_cache=False):
+    """
+    Versi streaming dari generate_gemini_content: menghasilkan event (nama, data).
+
+    ('delta', {"text"}) untuk setiap potongan teks, lalu ('done', {"response", "sources"}) dengan
+    jawaban lengkap dan blok sumber riset, atau ('error', {"response"}) jika gagal.
+    Riwayat chat hanya ditulis sekali, setelah stream selesai. Jawaban dari cache dikirim sebagai satu delta.
+    """
+    if not GEMINI_API_KEY:
+        yield 'error', {"response": "Error: GEMINI_API_KEY tidak diatur atau tidak valid di environment Termux Anda. Harap atur kunci API yang benar."}
+        return
+
+    payload, info = build_gemini_payload(prompt)
+    key, cached = cached_reply(payload, no_cache)
+    if cached:
+        text_response, sources = cached
+        yield 'delta', {"text": text_response}
+    else:
+        pieces = []
+        sources = []
+        try:
+            for chunk in GEMINI_CLIENT.stream(payload):
+                text = chunk_text(chunk)
+                if text:
+                    pieces.append(text)
+                    yield 'delta', {"text": text}
+                sources = chunk_sources(chunk) or sources
+                record_usage(info, chunk)
+        except Exception as e:
+            yield 'error', {"response": gemini_error_message(e)}
+            return
+        text_response = "".join(pieces) or "Tidak ada respons teks dari model."
+        store_reply(key, "chat", text_response, sources)
+
+    record_exchange(prompt, text_response)
+    yield 'done', {"response": text_response, "sources": format_sources(sources)}
+
+def run_automated_audit(no_cache=False, progress=no_progress):
+    """
+    Menjalankan Audit: riset, simpan record ke AUDIT_STORE, tulis ulang laporan Markdown hari ini,
+    lalu commit lokal (tahap research/write/add/commit/push).
+    """
+    
+    research_prompt = "Apa harga Bitcoin saat ini dan ringkas status pasar dalam satu kalimat. Beri respon yang sangat singkat, tidak lebih dari dua kalimat."
+    # Prompt riset tidak bergantung pada obrolan: tanpa history, di-cache dengan TTL kelas 'audit'
+    progress("research", "running")
+    started = time.monotonic()
+    audit_content, sources, error = gemini_reply(research_prompt, prompt_class="audit", include_history=False, no_cache=no_cache)
+    latency_ms = round((time.monotonic() - started) * 1000)
+    if error:
+        # Pesan galat tidak ditulis ke laporan dan tidak di-commit
+        progress("research", "failed", error)
+        return f"Error saat menjalankan Audit Otomatis: {error}"
+    progress("research", "done", f"{latency_ms} ms")
+    audit_content = audit_content.strip()
+
+    try:
+        progress("write", "running")
+        record = AUDIT_STORE.append(research_prompt, audit_content, sources, latency_ms)
+        report_path = write_day_report(AUDIT_STORE, local_day(record["ts"]), app_id=APP_ID)
+        GIT_SYNC.register(report_path)
+        progress("write", "done", report_path)
+            
+        commit_message = f"Audit Otomatis: Update harga Bitcoin terbaru. {local_day(record['ts'])}"
+        # Audit hanya commit lokal; push dikumpulkan per jendela waktu / jumlah commit
+        git_status = run_git_audit(commit_message, progress, push=False)
+        
+        return f"**Audit Otomatis Selesai.**\n\n- Hasil Riset Disimpan ke `{report_path}`.\n- **Laporan Riset:** {audit_content}\n- **Status Sinkronisasi:** {git_status}"
+    
+    except Exception as e:
+        progress("write", "failed", str(e))
+        return f"Error saat menjalankan Audit Otomatis: {e}"
@@ -0,0 +1,184 @@
+import json
+import os
+import threading
+import time
+
+# --- PENTING: CONFIGURATION ---
+# Folder log audit terstruktur (segmen JSONL + index.json).
+AUDIT_LOG_DIR = os.environ.get("AUDIT_LOG_DIR", "audit_log")
+# Segmen baru dibuka setiap hari (waktu lokal) atau saat segmen aktif melewati ukuran ini.
+AUDIT_SEGMENT_BYTES = 1024 * 1024
+# Folder laporan Markdown per hari (cermin git); dibuat ulang dari log, bukan ditulis tangan.
+AUDIT_REPORT_DIR = os.environ.get("AUDIT_REPORT_DIR", "audit_reports")
+
+INDEX_FILE = "index.json"
+
+
+def local_day(ts):
+    return time.strftime('%Y-%m-%d', time.localtime(ts))
+
+
+def local_time(ts):
+    """Waktu lokal yang mudah dibaca, mis. 'Sat Oct 25 20:04:01 WIB 2025' (format `date`)."""
+    return time.strftime('%a %b %d %H:%M:%S %Z %Y', time.localtime(ts))
+
+
+class AuditStore:
+    """
+    Log audit append-only: satu record JSON per baris, dipecah per hari / per ukuran.
+
+    index.json mencatat setiap segmen (file, hari, ts pertama & terakhir, jumlah record), jadi
+    pencarian rentang waktu hanya membuka segmen yang beririsan dan "audit terakhir" cukup
+    membaca baris terakhir segmen aktif. Aman dipakai dari beberapa thread.
+    """
+
+    def __init__(self, directory=AUDIT_LOG_DIR, segment_bytes=AUDIT_SEGMENT_BYTES):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.segments = self._load_index()
+        self.count = sum(segment["count"] for segment in self.segments)
+
+    # --- Index ---
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _load_index(self):
+        try:
+            with open(self._path(INDEX_FILE)) as f:
+                return json.load(f)["segments"]
+        except FileNotFoundError:
+            return []
+
+    def _save_index(self):
+        tmp = self._path(f"{INDEX_FILE}.{os.getpid()}.tmp")
+        with open(tmp, 'w') as f:
+            json.dump({"segments": self.segments}, f, indent=1)
+        os.replace(tmp, self._path(INDEX_FILE))
+
+    def _segment_for(self, ts, size):
+        """Segmen aktif untuk record baru; membuka segmen baru saat ganti hari atau segmen penuh."""
+        day = local_day(ts)
+        if self.segments:
+            current = self.segments[-1]
+            if current["day"] == day and current["bytes"] + size <= self.segment_bytes:
+                return current
+            part = current["part"] + 1 if current["day"] == day else 0
+        else:
+            part = 0
+        name = f"audit-{day}.jsonl" if part == 0 else f"audit-{day}.{part}.jsonl"
+        segment = {"file": name, "day": day, "part": part, "first_ts": round(ts, 3), "last_ts": round(ts, 3),
+                   "count": 0, "bytes": 0}
+        self.segments.append(segment)
+        return segment
+
+    # --- Tulis & baca ---
+    def append(self, prompt, response, sources=(), latency_ms=None, **extra):
+        """Menambahkan satu record audit dan mengembalikannya (dengan ts dan id)."""
+        ts = time.time()
+        with self._lock:
+            record = {
+                "id": self.count,
+                "ts": round(ts, 3),
+                "time": local_time(ts),
+                "prompt": prompt,
+                "response": response,
+                "sources": [list(source) for source in sources],
+                "latency_ms": latency_ms,
+                **extra,
+            }
+            line = (json.dumps(record, ensure_ascii=False) + "\n").encode('utf-8')
+            segment = self._segment_for(ts, len(line))
+            with open(self._path(segment["file"]), 'ab') as f:
+                f.write(line)
+            segment["last_ts"] = record["ts"]
+            segment["count"] += 1
+            segment["bytes"] += len(line)
+            self.count += 1
+            self._save_index()
+        return record
+
+    def _read_segment(self, segment):
+        records = []
+        with open(self._path(segment["file"]), 'rb') as f:
+            for line in f:
+                if line.endswith(b"\n"):
+                    records.append(json.loads(line))
+        return records
+
+    def last(self):
+        """Record audit terakhir (hanya membaca ujung segmen aktif), atau None."""
+        with self._lock:
+            segment = next((s for s in reversed(self.segments) if s["count"]), None)
+            if segment is None:
+                return None
+            with open(self._path(segment["file"]), 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                end = f.tell()
+                # Baca mundur per blok sampai menemukan awal baris terakhir
+                block = 4096
+                data = b""
+                while end > 0:
+                    start = max(0, end - block)
+                    f.seek(start)
+                    data = f.read(end - start) + data
+                    end = start
+                    if data.rstrip(b"\n").count(b"\n") >= 1:
+                        break
+            return json.loads(data.rstrip(b"\n").rsplit(b"\n", 1)[-1])
+
+    def query(self, since=None, until=None, limit=None):
+        """Record dengan since <= ts < until (epoch detik), terlama lebih dulu; `limit` mengambil yang terbaru."""
+        with self._lock:
+            segments = [s for s in self.segments if s["count"] and
+                        (since is None or s["last_ts"] >= since) and (until is None or s["first_ts"] < until)]
+        records = []
+        for segment in segments:
+            records.extend(r for r in self._read_segment(segment) if
+                           (since is None or r["ts"] >= since) and (until is None or r["ts"] < until))
+        if limit is not None:
+            records = records[-limit:] if limit > 0 else []
+        return records
+
+    def days(self):
+        with self._lock:
+            return sorted({segment["day"] for segment in self.segments if segment["count"]})
+
+    def day_records(self, day):
+        with self._lock:
+            segments = [s for s in self.segments if s["day"] == day and s["count"]]
+        records = []
+        for segment in segments:
+            records.extend(self._read_segment(segment))
+        return records
+
+
+def render_markdown(records, title="Audit Report"):
+    """Laporan Markdown dari record audit (format bagian sama dengan audit_report.md lama)."""
+    lines = [f"# {title}"]
+    for record in records:
+        lines.append("")
+        lines.append(f"## Audit Data - {record['time']}")
+        lines.append(record["response"].strip())
+        if record.get("sources"):
+            lines.append("")
+            lines.append("**Sumber Riset:**")
+            lines.extend(f"- [{label}]({uri})" for label, uri in record["sources"])
+        if record.get("latency_ms") is not None:
+            lines.append("")
+            lines.append(f"_Latensi riset: {record['latency_ms']} ms_")
+    return "\n".join(lines) + "\n"
+
+
+def write_day_report(store, day, report_dir=AUDIT_REPORT_DIR, app_id=""):
+    """Menulis ulang laporan Markdown satu hari dari log; mengembalikan path-nya."""
+    os.makedirs(report_dir, exist_ok=True)
+    path = os.path.join(report_dir, f"audit-{day}.md")
+    title = f"Audit Report {app_id} - {day}" if app_id else f"Audit Report - {day}"
+    content = render_markdown(store.day_records(day), title)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp, path)
+    return path
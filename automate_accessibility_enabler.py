@@ -1,7 +1,10 @@
 import subprocess
-import time
 import sys
 
+import adb_client
+from ui_snapshot import Selector
+from waits import accessibility_contains, hierarchy_stable, node_present, wait_report, wait_until
+
 # --- KONFIGURASI PERANGKAT ---
 # Ukuran layar POCO X3 NFC (1080x2400)
 SCREEN_WIDTH = 1080
@@ -11,25 +14,24 @@ SCREEN_HEIGHT = 2400
 AUTOMATE_PACKAGE = "com.llamalab.automate"
 AUTOMATE_ACCESSIBILITY_SERVICE = "com.llamalab.automate/.services.AccessibilityService"
 
+# Teks tombol konfirmasi pada dialog peringatan aksesibilitas
+CONFIRM_BUTTON_TEXTS = ("izinkan", "ok", "accept", "allow")
+
 def run_adb_command(command):
     """Fungsi untuk menjalankan perintah ADB shell."""
     full_command = f"adb shell {command}"
     print(f"Menjalankan: {full_command}")
     
     try:
-        # Jalankan perintah langsung di shell Termux
-        result = subprocess.run(
-            full_command,
-            shell=True,
-            check=True,
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        return result.stdout.strip()
-    except subprocess.CalledProcessError as e:
-        print(f"ERROR ADB: Perintah gagal dengan kode {e.returncode}")
-        print(f"Stderr: {e.stderr.strip()}")
+        # Dikirim lewat sesi `adb shell` persisten, bukan proses baru per perintah
+        exit_code, output, _ = adb_client.execute(['adb', 'shell', command], timeout=5)
+        if exit_code != 0:
+            print(f"ERROR ADB: Perintah gagal dengan kode {exit_code}")
+            print(f"Stderr: {output.strip()}")
+            sys.exit(1)
+        return output.strip()
+    except adb_client.ShellSessionError as e:
+        print(f"ERROR ADB: Koneksi terputus. {e}")
         sys.exit(1)
     except subprocess.TimeoutExpired:
         print("ERROR ADB: Timeout (Perangkat mungkin sibuk).")
@@ -65,41 +67,41 @@ def enable_automate_accessibility():
     # (Aksesibilitas -> Aplikasi yang Didownload)
     print("[1] Meluncurkan halaman Aksesibilitas Terunduh...")
     run_adb_command(f"am start -n com.android.settings/.Settings\\$AccessibilitySettingsActivity --ez accessibility_check_status_only false")
-    time.sleep(2) # Tunggu Settings terbuka
+    # Tunggu Settings terbuka dan daftar layanan sudah tampil
+    wait_until(node_present(Selector(text_or_desc="Automate")), timeout=10, label="daftar aksesibilitas")
 
     # 2. Ketuk pada 'Automate'
     # Berdasarkan gambar Anda, 'Automate' adalah entri pertama di daftar.
     automate_tap_y = int(SCREEN_HEIGHT * 0.25) 
     print(f"[2] Mengetuk 'Automate' di koordinat y={automate_tap_y}...")
     run_adb_command(f"input tap {SCREEN_WIDTH//2} {automate_tap_y}")
-    time.sleep(2) # Tunggu halaman detail layanan terbuka
+    wait_until(hierarchy_stable(), timeout=5, label="halaman detail layanan") # Tunggu halaman detail layanan terbuka
 
     # 3. Ketuk tombol 'Aktifkan' (Sakelar)
     # Koordinat perkiraan untuk sakelar/tombol toggle
     toggle_tap_y = int(SCREEN_HEIGHT * 0.2) 
     print(f"[3] Mengetuk sakelar Aktif/Nonaktif di y={toggle_tap_y}...")
     run_adb_command(f"input tap {SCREEN_WIDTH//2} {toggle_tap_y}")
-    time.sleep(2) # Tunggu dialog peringatan muncul
 
-    # 4. Menyetujui dialog peringatan (klik 'OK'/'Accept' setelah 10 detik menunggu peringatan keamanan)
-    print("[4] Menunggu dialog peringatan keamanan (10 detik)... TOLONG JANGAN SENTUH LAYAR...")
-    time.sleep(10) 
+    # 4. Menyetujui dialog peringatan (klik 'OK'/'Accept' setelah hitung mundur peringatan keamanan selesai)
+    # Tombol konfirmasi MIUI baru bisa diklik (enabled) setelah hitung mundur, jadi kita tunggu kondisi itu.
+    print("[4] Menunggu dialog peringatan keamanan... TOLONG JANGAN SENTUH LAYAR...")
+    confirm_selector = Selector(text_or_desc=CONFIRM_BUTTON_TEXTS, clickable=True, enabled=True)
+    wait_until(node_present(confirm_selector), timeout=20, label="tombol konfirmasi aktif")
     
     # Koordinat perkiraan tombol 'OK' atau 'Izinkan' di dialog pop-up MIUI
     confirm_button_x = int(SCREEN_WIDTH * 0.75) 
     confirm_button_y = int(SCREEN_HEIGHT * 0.88)
     print(f"[5] Mengetuk tombol 'Izinkan' / 'OK' di ({confirm_button_x}, {confirm_button_y})...")
     run_adb_command(f"input tap {confirm_button_x} {confirm_button_y}")
-    time.sleep(1)
+    enabled = wait_until(accessibility_contains(AUTOMATE_ACCESSIBILITY_SERVICE), timeout=5)
 
     # 5. Tekan tombol Kembali (untuk menutup Settings jika tidak otomatis)
     print("[6] Menekan tombol Kembali.")
     run_adb_command("input keyevent 4")
     
-    time.sleep(2)
-    
-    # 6. Verifikasi Akhir
-    if check_accessibility_status():
+    # 6. Verifikasi Akhir (status sudah ditunggu setelah tombol konfirmasi diketuk)
+    if enabled or check_accessibility_status():
         print("\n--- SUKSES AKHIR ---")
         print("Layanan Aksesibilitas Automate berhasil diaktifkan.")
     else:
@@ -108,3 +110,5 @@ def enable_automate_accessibility():
 
 if __name__ == "__main__":
     enable_automate_accessibility()
+    print("\n--- WAKTU TUNGGU ---")
+    print(wait_report())
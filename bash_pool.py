@@ -0,0 +1,208 @@
+import os
+import shlex
+import signal
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from shell_session import ShellSession, ShellSessionError
+
+# --- PENTING: CONFIGURATION ---
+# Jumlah maksimum worker bash yang hidup (satu per sesi chat). Worker menganggur yang paling
+# lama tidak dipakai ditutup jika batas ini terlampaui.
+BASH_POOL_SIZE = int(os.environ.get("BASH_POOL_SIZE", "4"))
+# Perintah untuk worker: tanpa profile/rc agar cepat dan tidak interaktif.
+BASH_ARGV = ["/bin/bash", "--noprofile", "--norc"]
+
+# --- WORKER BASH PERSISTEN ---
+# Setiap sesi chat punya satu proses bash berumur panjang (lewat ShellSession), jadi `cd` dan
+# `export` terbawa ke perintah berikutnya dan biaya fork+exec bash hanya dibayar sekali.
+# Satu worker cadangan selalu dinyalakan lebih dulu agar sesi baru tidak menunggu bash start.
+
+
+class BashWorker:
+    """Satu proses bash untuk satu sesi chat. Direktori kerja dilacak agar selamat dari restart."""
+
+    def __init__(self, session_id=None, cwd=None):
+        self.session_id = session_id
+        self.cwd = cwd or os.getcwd()
+        self.session = ShellSession(BASH_ARGV, name=f"bash[{session_id or 'cadangan'}]", process_group=True)
+        self.commands = 0
+        self.last_used = time.time()
+        self.active = 0
+        # Dipegang pemanggil yang perlu memakai worker secara eksklusif (misalnya job shell)
+        self.lock = threading.Lock()
+        self.owner = None
+        self._cwd_marker = f"__BASH_CWD_{uuid.uuid4().hex}__"
+
+    def start(self):
+        """Menyalakan proses bash sekarang (pre-warm), bukan saat perintah pertama."""
+        with self.session._lock:
+            if not self.session.alive():
+                self.session.start()
+
+    @property
+    def restarts(self):
+        return self.session.restarts
+
+    def run(self, command, timeout=None, on_output=None, capture=True):
+        """
+        Menjalankan `command` di bash milik sesi ini; mengembalikan (exit_code, output).
+
+        Perintah dijalankan lewat `eval` sehingga salah sintaks hanya menghasilkan exit code 2,
+        tidak mematikan bash. Jika bash mati (timeout, interrupt, `exit`), worker dinyalakan ulang
+        otomatis pada perintah berikutnya di direktori terakhir; variabel `export` ikut hilang.
+        Melempar subprocess.TimeoutExpired / ShellSessionError seperti ShellSession.run.
+        """
+        prefix = "" if self.session.alive() else f"cd -- {shlex.quote(self.cwd)} 2>/dev/null\n"
+        script = (
+            f"{prefix}eval {shlex.quote(command)}\n"
+            f"__bash_pool_rc=$?; printf '\\n{self._cwd_marker}%s\\n' \"$PWD\"; (exit $__bash_pool_rc)"
+        )
+        output = []
+        pending = []
+        finished = []
+
+        def emit(text):
+            if capture:
+                output.append(text)
+            if on_output is not None:
+                on_output(text)
+
+        def on_line(line):
+            # Baris penanda direktori tidak diteruskan. Baris kosong ditahan sebentar: baris kosong
+            # tepat sebelum penanda berasal dari printf di atas, bukan dari perintah pengguna.
+            if finished:
+                return
+            if line.startswith(self._cwd_marker):
+                self.cwd = line[len(self._cwd_marker):].rstrip("\n") or self.cwd
+                finished.append(True)
+                pending.clear()
+                return
+            if pending:
+                emit(pending.pop())
+            if line == "\n":
+                pending.append(line)
+            else:
+                emit(line)
+
+        self.active += 1
+        self.last_used = time.time()
+        try:
+            exit_code, _ = self.session.run(script, timeout=timeout, on_output=on_line, capture=False)
+        except ShellSessionError:
+            # Pesan asli memuat skrip pembungkus; tampilkan perintah pengguna saja
+            raise ShellSessionError(f"Bash sesi {self.session_id} berhenti saat menjalankan '{command}'.") from None
+        finally:
+            self.active -= 1
+            self.commands += 1
+            if pending:
+                # Bash mati sebelum penanda direktori: teruskan sisa output apa adanya
+                emit(pending.pop())
+        return exit_code, "".join(output)
+
+    def interrupt(self, owner=None):
+        """
+        Menghentikan perintah yang sedang berjalan (beserta bash-nya; worker menyala ulang sendiri).
+
+        Dengan `owner`, hanya dihentikan jika worker sedang dipegang pemilik itu.
+        """
+        if owner is not None and self.owner is not owner:
+            return
+        proc = self.session.proc
+        if proc is None or proc.poll() is not None:
+            return
+        try:
+            os.killpg(proc.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+    def close(self):
+        with self.session._lock:
+            self.session.close()
+
+
+class BashPool:
+    """Kumpulan BashWorker per id sesi chat, dengan satu worker cadangan yang sudah menyala."""
+
+    def __init__(self, size=BASH_POOL_SIZE, prewarm=True):
+        self.size = size
+        self.prewarm = prewarm
+        self._workers = OrderedDict()
+        self._spare = None
+        self._lock = threading.Lock()
+        if prewarm:
+            self._warm_spare()
+
+    def _warm_spare(self):
+        def warm():
+            worker = BashWorker()
+            worker.start()
+            with self._lock:
+                if self._spare is None:
+                    self._spare = worker
+                    return
+            worker.close()
+        threading.Thread(target=warm, daemon=True, name="bash-pool-warm").start()
+
+    def get(self, session_id):
+        """Worker milik `session_id`; sesi baru mengambil worker cadangan jika ada."""
+        with self._lock:
+            worker = self._workers.get(session_id)
+            if worker is not None:
+                self._workers.move_to_end(session_id)
+                return worker
+            worker, self._spare = self._spare, None
+            if worker is None:
+                worker = BashWorker()
+            worker.session_id = session_id
+            worker.session.name = f"bash[{session_id}]"
+            self._workers[session_id] = worker
+            evicted = self._evict()
+        for old in evicted:
+            old.close()
+        if self.prewarm:
+            self._warm_spare()
+        return worker
+
+    def _evict(self):
+        evicted = []
+        for session_id, worker in list(self._workers.items()):
+            if len(self._workers) <= self.size:
+                break
+            if worker.active == 0:
+                del self._workers[session_id]
+                evicted.append(worker)
+        return evicted
+
+    def stats(self):
+        with self._lock:
+            workers = list(self._workers.values())
+            spare = self._spare is not None
+        return {
+            "size": self.size,
+            "spare_ready": spare,
+            "workers": [
+                {
+                    "session": worker.session_id,
+                    "cwd": worker.cwd,
+                    "alive": worker.session.alive(),
+                    "busy": worker.active > 0,
+                    "commands": worker.commands,
+                    "restarts": worker.restarts,
+                    "idle": round(time.time() - worker.last_used, 1),
+                }
+                for worker in workers
+            ],
+        }
+
+    def close(self):
+        with self._lock:
+            workers = list(self._workers.values())
+            self._workers.clear()
+            if self._spare is not None:
+                workers.append(self._spare)
+                self._spare = None
+        for worker in workers:
+            worker.close()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Membandingkan latensi per perintah: bash baru per panggilan (subprocess.run, shell=True)
+melawan worker bash persisten dari bash_pool.py.
+
+Pakai dengan:
+  python benchmarks/bash_pool_bench.py            # 200 perintah per jalur
+  python benchmarks/bash_pool_bench.py -n 50 --command "ls -l"
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bash_pool import BashWorker  # noqa: E402
+
+
+def spawn_per_call(command):
+    """Jalur lama (subprocess.run, shell=True): satu /bin/bash baru per perintah."""
+    result = subprocess.run(command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            text=True, executable='/bin/bash', cwd=os.getcwd())
+    return result.returncode, result.stdout
+
+
+def measure(run, command, iterations, warmup=5):
+    for _ in range(warmup):
+        run(command)
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        run(command)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "median_ms": statistics.median(samples),
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "mean_ms": statistics.fmean(samples),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bash per panggilan vs worker bash persisten.")
+    parser.add_argument("-n", "--iterations", type=int, default=200, help="Jumlah perintah per jalur (default 200).")
+    parser.add_argument("--command", default="echo ok", help="Perintah yang diukur (default 'echo ok').")
+    args = parser.parse_args()
+
+    worker = BashWorker("benchmark")
+    worker.start()
+    try:
+        results = {
+            "spawn-per-call": measure(spawn_per_call, args.command, args.iterations),
+            "bash-pool": measure(lambda command: worker.run(command, timeout=10), args.command, args.iterations),
+        }
+    finally:
+        worker.close()
+
+    print(f"[{time.strftime('%H:%M:%S')}] {args.iterations} x '{args.command}'")
+    print(f"{'jalur':<16}{'median':>10}{'p95':>10}{'rata-rata':>12}")
+    for name, stats in results.items():
+        print(f"{name:<16}{stats['median_ms']:>8.2f}ms{stats['p95_ms']:>8.2f}ms{stats['mean_ms']:>10.2f}ms")
+    speedup = results["spawn-per-call"]["median_ms"] / results["bash-pool"]["median_ms"]
+    print(f"Worker persisten {speedup:.1f}x lebih cepat (median).")
+
+
+if __name__ == "__main__":
+    main()
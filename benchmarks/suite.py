@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Benchmark offline: otomasi UI lewat fake_adb.py dan endpoint web lewat fake_gemini.py, tanpa perangkat
+dan tanpa internet. Hasil disimpan sebagai JSON agar dua run bisa dibandingkan.
+
+Pakai dengan:
+  python benchmarks/suite.py                          # semua benchmark, hasil ke benchmarks/results/
+  python benchmarks/suite.py --only find_and_tap_text,index -n 50
+  python benchmarks/suite.py --adb-latency 0.02 --gemini-latency 0.3
+  python benchmarks/suite.py --ui rekaman/ --scale 10  # dump rekaman lain, layar diperbesar 10x
+  python benchmarks/suite.py --compare benchmarks/results/20251025-200401.json
+
+Benchmark:
+  get_center_coords           parse bounds semua node ui.xml (regex lama vs ui_snapshot.parse_bounds)
+  defensive_check_analysis    analisis defensif dari file dan dari dump fake_adb (termasuk tap)
+  find_and_tap_text           teks ada (dump + tap) dan teks tidak ada (dump, gulir, tunggu layar stabil)
+  process_input               throughput /process_input (chat ke fake_gemini) dengan N klien bersamaan
+  index                       waktu render / (shell penuh) dan / dengan If-None-Match (304)
+  shell                       bash baru per perintah vs worker bash persisten (bash_pool_bench.py)
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+DEFAULT_UI = os.path.join(REPO_DIR, "ui.xml")
+BENCHMARKS = ("get_center_coords", "defensive_check_analysis", "find_and_tap_text", "process_input", "index",
+              "shell")
+
+
+# --- UTILITAS ---
+def summarize(samples):
+    """Statistik latensi (ms) dari daftar sampel dalam detik."""
+    samples = sorted(s * 1000 for s in samples)
+    return {
+        "iterations": len(samples),
+        "median_ms": round(statistics.median(samples), 4),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 4),
+        "mean_ms": round(statistics.fmean(samples), 4),
+        "min_ms": round(samples[0], 4),
+    }
+
+
+def measure(func, iterations, warmup=3):
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        with socket.socket() as s:
+            if s.connect_ex(("127.0.0.1", port)) == 0:
+                return
+        time.sleep(0.05)
+    raise RuntimeError(f"Port {port} tidak terbuka dalam {timeout} detik")
+
+
+def scaled_fixture(source, scale, directory):
+    """
+    Salinan dump `source` dengan anak-anak root diulang `scale` kali (layar panjang/daftar besar).
+    `source` berupa direktori dipakai apa adanya.
+    """
+    if scale <= 1 or os.path.isdir(source):
+        return source
+    tree = ET.parse(source)
+    root = tree.getroot()
+    children = list(root)
+    for _ in range(scale - 1):
+        root.extend(ET.fromstring(ET.tostring(child)) for child in children)
+    path = os.path.join(directory, f"ui-x{scale}.xml")
+    tree.write(path, encoding="utf-8", xml_declaration=True)
+    return path
+
+
+def first_xml(directory):
+    return sorted(os.path.join(directory, n) for n in os.listdir(directory) if n.endswith(".xml"))[0]
+
+
+def first_text(path):
+    """Teks node pertama yang tidak kosong di dump (target find_and_tap_text)."""
+    if os.path.isdir(path):
+        path = first_xml(path)
+    for _, elem in ET.iterparse(path):
+        if elem.tag == "node" and elem.get("text"):
+            return elem.get("text")
+    raise RuntimeError(f"Tidak ada node bertext di {path}")
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except OSError:
+        return None
+
+
+# --- BENCHMARK ---
+def bench_get_center_coords(ctx):
+    import adb_bootstrapper
+    import defensive_logic
+    from ui_snapshot import parse_bounds
+    source = ctx["ui_file"]
+    bounds = [elem.get("bounds") for _, elem in ET.iterparse(source) if elem.tag == "node" and elem.get("bounds")]
+    n = ctx["iterations"]
+    return {
+        "nodes": len(bounds),
+        "defensive_logic": measure(lambda: [defensive_logic.get_center_coords(b) for b in bounds], n),
+        "adb_bootstrapper": measure(lambda: [adb_bootstrapper.get_center_coords(b) for b in bounds], n),
+        "parse_bounds": measure(lambda: [parse_bounds(b) for b in bounds], n),
+    }
+
+
+def bench_defensive_check_analysis(ctx):
+    import defensive_logic
+    import ui_dump
+    n = ctx["iterations"]
+    quiet = io.StringIO()
+
+    def from_file():
+        with contextlib.redirect_stdout(quiet):
+            defensive_logic.defensive_check_analysis(ctx["ui_file"])
+
+    def from_device():
+        with contextlib.redirect_stdout(quiet):
+            defensive_logic.defensive_check_analysis()
+
+    result = {"from_file": measure(from_file, n)}
+    # Dump langsung: layar sama -> snapshot dari cache; kosongkan cache untuk mengukur jalur dingin juga
+    result["from_device_cached"] = measure(from_device, max(1, n // 4))
+    result["from_device_cold"] = measure(lambda: (ui_dump.SNAPSHOT_CACHE.clear(), from_device()),
+                                         max(1, n // 4))
+    return result
+
+
+def bench_find_and_tap_text(ctx):
+    import adb_bootstrapper
+    n = max(1, ctx["iterations"] // 4)
+    target = first_text(ctx["ui"])
+    return {
+        "target": target,
+        "found": measure(lambda: adb_bootstrapper.find_and_tap_text(target, scroll_max=0), n),
+        # Layar fake_adb tidak berubah saat digulir: dump, gulir, tunggu stabil, lalu berhenti (akhir daftar)
+        "missing_scroll_1": measure(
+            lambda: adb_bootstrapper.find_and_tap_text("teks-yang-tidak-ada", scroll_max=1), max(1, n // 2), 1),
+    }
+
+
+def bench_process_input(ctx):
+    import requests
+    from werkzeug.serving import make_server
+    import web_server
+    server = make_server("127.0.0.1", 0, web_server.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/process_input"
+    total = ctx["iterations"] * 2
+    clients = ctx["clients"]
+    local = threading.local()
+    counter = iter(range(total + clients * 2))
+
+    def call(_):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        start = time.perf_counter()
+        # Setiap pesan berbeda dan no_cache: selalu sampai ke fake_gemini
+        response = session.post(url, json={"input": f"benchmark {next(counter)}", "no_cache": True}, timeout=60)
+        response.raise_for_status()
+        return time.perf_counter() - start
+
+    try:
+        with ThreadPoolExecutor(clients) as pool:
+            list(pool.map(call, range(clients * 2)))
+            start = time.perf_counter()
+            samples = list(pool.map(call, range(total)))
+            elapsed = time.perf_counter() - start
+    finally:
+        server.shutdown()
+    return {"clients": clients, "requests": total, "throughput_rps": round(total / elapsed, 2),
+            "latency": summarize(samples)}
+
+
+def bench_index(ctx):
+    import web_server
+    client = web_server.app.test_client()
+    n = ctx["iterations"] * 5
+
+    def full():
+        response = client.get("/", headers={"Accept-Encoding": "gzip"})
+        response.close()
+        return response
+
+    etag = full().headers["ETag"]
+
+    def revalidate():
+        client.get("/", headers={"If-None-Match": etag}).close()
+
+    def bootstrap():
+        client.get("/bootstrap").close()
+
+    return {"full": measure(full, n), "not_modified": measure(revalidate, n), "bootstrap": measure(bootstrap, n)}
+
+
+def bench_shell(ctx):
+    from bash_pool import BashWorker
+    from bash_pool_bench import spawn_per_call
+    n = ctx["iterations"]
+    worker = BashWorker("benchmark")
+    worker.start()
+    try:
+        return {
+            "spawn_per_call": measure(lambda: spawn_per_call("echo ok"), n),
+            "bash_pool": measure(lambda: worker.run("echo ok", timeout=10), n),
+        }
+    finally:
+        worker.close()
+
+
+# --- PERBANDINGAN ---
+def medians(results, prefix=""):
+    """{'nama.sub': median_ms} dari hasil bersarang."""
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            if "median_ms" in value:
+                flat[prefix + key] = value["median_ms"]
+            else:
+                flat.update(medians(value, f"{prefix}{key}."))
+        elif key == "throughput_rps":
+            flat[prefix + key] = value
+    return flat
+
+
+def compare(old, new):
+    before, after = medians(old["results"]), medians(new["results"])
+    print(f"\nDibanding {old['meta'].get('started')} ({old['meta'].get('revision')}):")
+    for name in sorted(set(before) & set(after)):
+        if not before[name]:
+            continue
+        change = (after[name] - before[name]) / before[name] * 100
+        # Throughput: naik berarti lebih baik; latensi: turun berarti lebih baik
+        better = change > 0 if name.endswith("throughput_rps") else change < 0
+        mark = "+" if better and abs(change) >= 5 else "-" if abs(change) >= 5 else " "
+        print(f" {mark} {name:<55}{before[name]:>12.3f} -> {after[name]:>12.3f} ({change:+.1f}%)")
+
+
+def setup_environment(args, workdir):
+    """Environment fake_adb + fake_gemini; harus diset sebelum modul proyek diimpor."""
+    ui = scaled_fixture(os.path.abspath(args.ui), args.scale, workdir)
+    gemini_port = free_port()
+    os.environ.update({
+        "ADB_BIN": os.path.join(REPO_DIR, "fake_adb.py"),
+        "FAKE_ADB_UI": ui,
+        "FAKE_ADB_HOME": os.path.join(workdir, "fake_adb"),
+        "FAKE_ADB_LATENCY": str(args.adb_latency),
+        "GEMINI_API_BASE": f"http://127.0.0.1:{gemini_port}/v1beta",
+        "GEMINI_API_KEY": "benchmark",
+        "GEMINI_CACHE_DB": "",
+        "CHAT_LOG_FILE": "",
+        "AUDIT_SCHEDULE": "",
+        "AUDIT_LOG_DIR": os.path.join(workdir, "audit_log"),
+        "AUDIT_REPORT_DIR": os.path.join(workdir, "audit_reports"),
+        "PROFILE_DIR": os.path.join(workdir, "profiles"),
+    })
+    env = dict(os.environ, FAKE_GEMINI_PORT=str(gemini_port), FAKE_GEMINI_LATENCY=str(args.gemini_latency))
+    gemini = subprocess.Popen([sys.executable, os.path.join(REPO_DIR, "fake_gemini.py")], env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    wait_for_port(gemini_port)
+    ui_file = ui if not os.path.isdir(ui) else first_xml(ui)
+    return gemini, {"ui": ui, "ui_file": ui_file}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline (fake_adb + fake_gemini), hasil JSON.")
+    parser.add_argument("-n", "--iterations", type=int, default=40, help="Iterasi dasar per benchmark (default 40).")
+    parser.add_argument("--only", default="", help=f"Daftar benchmark dipisah koma: {','.join(BENCHMARKS)}.")
+    parser.add_argument("--ui", default=DEFAULT_UI, help="Dump XML atau direktori dump untuk fake_adb (default ui.xml).")
+    parser.add_argument("--scale", type=int, default=1, help="Ulangi isi layar N kali (layar besar).")
+    parser.add_argument("--adb-latency", type=float, default=0.0, help="Jeda per perintah fake_adb (detik).")
+    parser.add_argument("--gemini-latency", type=float, default=0.0, help="Jeda jawaban fake_gemini (detik).")
+    parser.add_argument("--clients", type=int, default=4, help="Klien bersamaan untuk process_input (default 4).")
+    parser.add_argument("-o", "--output", help="File hasil JSON (default benchmarks/results/<waktu>.json).")
+    parser.add_argument("--compare", help="File hasil JSON lama untuk dibandingkan.")
+    args = parser.parse_args()
+
+    selected = [name.strip() for name in args.only.split(",") if name.strip()] or list(BENCHMARKS)
+    unknown = [name for name in selected if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"Benchmark tidak dikenal: {', '.join(unknown)}")
+
+    started = time.strftime('%Y%m%d-%H%M%S')
+    output = os.path.abspath(args.output or os.path.join(RESULTS_DIR, f"{started}.json"))
+    previous = os.path.abspath(args.compare) if args.compare else None
+    workdir = tempfile.mkdtemp(prefix="termux-bench-")
+    # Modul proyek menulis file relatif (riwayat, laporan); jalankan di direktori sementara
+    os.chdir(workdir)
+    gemini, ctx = setup_environment(args, workdir)
+    ctx.update(iterations=args.iterations, clients=args.clients)
+    results = {}
+    try:
+        for name in selected:
+            print(f"[{time.strftime('%H:%M:%S')}] {name} ...", flush=True)
+            start = time.perf_counter()
+            results[name] = globals()[f"bench_{name}"](ctx)
+            print(f"[{time.strftime('%H:%M:%S')}] {name} selesai ({time.perf_counter() - start:.1f} s)")
+    finally:
+        gemini.terminate()
+        gemini.wait()
+        import adb_client
+        adb_client.close_all()
+        os.chdir(REPO_DIR)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "started": started,
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+            "ui": os.path.relpath(ctx["ui"], REPO_DIR) if ctx["ui"].startswith(REPO_DIR) else ctx["ui"],
+            "scale": args.scale,
+            "adb_latency": args.adb_latency,
+            "gemini_latency": args.gemini_latency,
+            "clients": args.clients,
+        },
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=1, ensure_ascii=False)
+
+    print()
+    for name, median in medians(results).items():
+        unit = "req/s" if name.endswith("throughput_rps") else "ms"
+        print(f"{name:<57}{median:>12.3f} {unit}")
+    print(f"\nHasil disimpan ke {output}")
+    if previous:
+        with open(previous) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
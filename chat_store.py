@@ -0,0 +1,101 @@
+import json
+import os
+import threading
+import time
+from array import array
+from collections import deque
+
+# --- PENTING: CONFIGURATION ---
+# Jumlah pesan terbaru yang disimpan di memori (sumber jendela prompt).
+CHAT_MEMORY_SIZE = 100
+# Ukuran halaman default dan maksimum untuk /history.
+HISTORY_PAGE_SIZE = 20
+HISTORY_MAX_PAGE_SIZE = 100
+
+
+class ChatStore:
+    """
+    Riwayat chat: ring buffer di memori untuk prompt, log JSONL append-only di disk untuk semuanya.
+
+    Setiap pesan mendapat id berurutan (0, 1, 2, ...). Posisi byte setiap baris di log disimpan
+    dalam array, jadi satu halaman lama dibaca dengan satu seek tanpa memuat seluruh file.
+    Aman dipakai dari beberapa thread.
+    """
+
+    def __init__(self, path=None, memory_size=CHAT_MEMORY_SIZE):
+        self.path = path
+        self._recent = deque(maxlen=memory_size)
+        self._offsets = array('q')
+        self._lock = threading.Lock()
+        self._count = 0
+        if path and os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        """Membangun indeks offset dan mengisi ring buffer dari log yang sudah ada."""
+        offset = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                self._offsets.append(offset)
+                self._recent.append(json.loads(line))
+                offset += len(line)
+        if offset != os.path.getsize(self.path):
+            # Baris terakhir terpotong (misalnya server mati saat menulis): dibuang
+            with open(self.path, 'r+b') as f:
+                f.truncate(offset)
+        self._count = len(self._offsets)
+
+    def __len__(self):
+        return self._count
+
+    def append(self, role, text):
+        """Menambahkan satu pesan dan mengembalikan id-nya."""
+        with self._lock:
+            message = {"id": self._count, "role": role, "text": text, "ts": round(time.time(), 3)}
+            if self.path:
+                line = (json.dumps(message, ensure_ascii=False) + "\n").encode('utf-8')
+                with open(self.path, 'ab') as f:
+                    self._offsets.append(f.tell())
+                    f.write(line)
+            self._recent.append(message)
+            self._count += 1
+            return message["id"]
+
+    def recent(self, n):
+        """`n` pesan terbaru (terlama lebih dulu), dari memori."""
+        with self._lock:
+            if n <= 0:
+                return []
+            return list(self._recent)[-n:]
+
+    def window(self, n=10):
+        """`n` pesan terbaru dalam format `contents` Gemini."""
+        return [{"role": m["role"], "parts": [{"text": m["text"]}]} for m in self.recent(n)]
+
+    def page(self, before=None, limit=HISTORY_PAGE_SIZE):
+        """
+        Satu halaman pesan dengan id < `before` (default: halaman terbaru), terlama lebih dulu.
+
+        Mengembalikan (pesan, masih_ada_yang_lebih_lama).
+        """
+        limit = max(1, min(limit, HISTORY_MAX_PAGE_SIZE))
+        with self._lock:
+            end = self._count if before is None else max(0, min(before, self._count))
+            start = max(0, end - limit)
+            if start >= end:
+                return [], False
+            # Halaman yang masih ada di ring buffer tidak perlu membaca disk
+            first_in_memory = self._count - len(self._recent)
+            if start >= first_in_memory or not self.path:
+                recent = list(self._recent)
+                lo = max(start, first_in_memory) - first_in_memory
+                return recent[lo:end - first_in_memory], start > 0
+            begin = self._offsets[start]
+            stop = self._offsets[end] if end < self._count else None
+        with open(self.path, 'rb') as f:
+            f.seek(begin)
+            data = f.read() if stop is None else f.read(stop - begin)
+        # Pesan yang ditambahkan setelah kunci dilepas tidak ikut terbaca
+        return [json.loads(line) for line in data.splitlines()[:end - start]], start > 0
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Satu pintu masuk untuk semua skrip bot. Setiap subperintah hanya mengimpor modul yang dibutuhkannya,
+jadi `defensive-scan` dari notifikasi Automate tidak ikut memuat Flask, requests atau Gemini.
+
+  python cli.py serve [--host 0.0.0.0] [--port 5000]   # server web (+ penjadwal audit jika AUDIT_SCHEDULE diisi)
+  python cli.py bootstrap                              # MIUI: aktifkan Debugging Nirkabel (Bootstrap)
+  python cli.py shizuku-start                          # luncurkan Shizuku dan ketuk 'Start'
+  python cli.py shizuku-status                         # status server Shizuku
+  python cli.py defensive-scan [ui.xml]                # analisis defensif layar saat ini (atau file XML)
+  python cli.py enable-accessibility                   # aktifkan layanan aksesibilitas Automate
+  python cli.py audit [--no-cache] [--no-push]         # satu audit Gemini + commit (tanpa server)
+
+Opsi umum (sebelum subperintah):
+  --serial SERIAL    perangkat ADB target (default: satu-satunya perangkat / ADB_IP_PORT skrip)
+  --import-profile   jalankan ulang dengan `python -X importtime` lalu tampilkan modul terlama diimpor
+"""
+import argparse
+import os
+import sys
+import time
+
+# --- PENTING: CONFIGURATION ---
+# Jumlah baris per tabel di laporan --import-profile.
+IMPORT_PROFILE_TOP = 15
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def print_section(title, text):
+    print(f"\n--- {title} ---")
+    print(text)
+
+
+def print_waits():
+    from adb_client import current_serial
+    from waits import wait_report
+    # Dengan --serial hanya penantian perangkat itu
+    print_section("WAKTU TUNGGU", wait_report(current_serial()))
+
+
+# --- SUBPERINTAH ---
+# Impor di dalam fungsi: biaya impor hanya dibayar oleh subperintah yang memakainya.
+
+def cmd_serve(args):
+    import web_server
+    web_server.serve(args.host, args.port)
+
+
+def cmd_bootstrap(args):
+    import runpy
+    # Skrip Bootstrap tidak berekstensi .py; dijalankan persis seperti `python Bootstrap`
+    runpy.run_path(os.path.join(HERE, "Bootstrap"), run_name="__main__")
+
+
+def cmd_shizuku_start(args):
+    from adb_bootstrapper import bootstrap_shizuku
+    print_section("LAPORAN OTOMASI SHIZUKU", bootstrap_shizuku())
+    print_waits()
+
+
+def cmd_shizuku_status(args):
+    from shizuku_checker import check_shizuku_status
+    check_shizuku_status()
+
+
+def cmd_defensive_scan(args):
+    from defensive_logic import defensive_check_analysis
+    print_section("LAPORAN ANALISIS DEFENSIF", defensive_check_analysis(args.xml))
+
+
+def cmd_enable_accessibility(args):
+    from automate_accessibility_enabler import enable_automate_accessibility
+    enable_automate_accessibility()
+    print_waits()
+
+
+def cmd_audit(args):
+    import assistant
+
+    def progress(stage, status, detail=""):
+        print(f"[{time.strftime('%H:%M:%S')}] {stage}: {status}{f' ({detail})' if detail else ''}")
+
+    print_section("LAPORAN AUDIT", assistant.run_automated_audit(args.no_cache, progress))
+    # Di server push digabung per jendela waktu; proses CLI selesai di sini, jadi push sekarang
+    if not args.no_push and assistant.GIT_SYNC.pending_commits:
+        ok, output = assistant.GIT_SYNC.flush(progress)
+        if not ok:
+            print(f"Error saat push: {output}")
+
+
+# --- PROFIL IMPOR ---
+def parse_importtime(lines):
+    """Baris `import time: self | kumulatif | paket` menjadi list (self_us, kumulatif_us, kedalaman, nama)."""
+    entries = []
+    for line in lines:
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # baris judul
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((int(fields[0]), int(fields[1]), depth, name.strip()))
+    return entries
+
+
+def format_import_profile(entries, wall_seconds, top=IMPORT_PROFILE_TOP):
+    total_us = sum(cumulative for _, cumulative, depth, _ in entries if depth == 0)
+    lines = [
+        f"Total impor: {total_us / 1000:.1f} ms untuk {len(entries)} modul; proses selesai dalam {wall_seconds * 1000:.0f} ms",
+        "",
+        f"Kumulatif terbesar (modul tingkat atas), top {top}:",
+    ]
+    roots = sorted((entry for entry in entries if entry[2] == 0), key=lambda entry: entry[1], reverse=True)
+    lines.extend(f"{cumulative / 1000:>9.1f} ms  {name}" for _, cumulative, _, name in roots[:top])
+    lines.append("")
+    lines.append(f"Self terbesar (semua modul), top {top}:")
+    heaviest = sorted(entries, key=lambda entry: entry[0], reverse=True)
+    lines.extend(f"{own_us / 1000:>9.1f} ms  {name}" for own_us, _, _, name in heaviest[:top])
+    return "\n".join(lines)
+
+
+def run_with_import_profile(argv):
+    """
+    Menjalankan ulang `cli.py argv` dengan `python -X importtime`; stdout/stderr lain diteruskan apa adanya,
+    lalu ringkasan impor dicetak ke stderr. Mengembalikan exit code proses anak.
+    """
+    import subprocess
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-X", "importtime", os.path.abspath(__file__), *argv],
+                            stderr=subprocess.PIPE, text=True, errors='replace')
+    timings = []
+    for line in proc.stderr:
+        if line.startswith("import time:"):
+            timings.append(line)
+        else:
+            sys.stderr.write(line)
+    code = proc.wait()
+    report = format_import_profile(parse_importtime(timings), time.perf_counter() - start)
+    sys.stderr.write(f"\n--- PROFIL IMPOR (-X importtime) ---\n{report}\n")
+    return code
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="Pintu masuk bot Termux (impor modul sesuai kebutuhan).")
+    parser.add_argument("--serial", help="serial perangkat ADB target")
+    parser.add_argument("--import-profile", action="store_true",
+                        help="laporkan waktu impor modul (python -X importtime)")
+    commands = parser.add_subparsers(dest="command", required=True, metavar="PERINTAH")
+
+    serve = commands.add_parser("serve", help="server web (penjadwal audit: isi AUDIT_SCHEDULE)")
+    serve.add_argument("--host", default="0.0.0.0")
+    serve.add_argument("--port", type=int, default=5000)
+    serve.set_defaults(func=cmd_serve, device=False)
+
+    commands.add_parser("bootstrap", help="aktifkan Debugging Nirkabel (alur MIUI)").set_defaults(func=cmd_bootstrap)
+    commands.add_parser("shizuku-start", help="luncurkan Shizuku dan ketuk 'Start'").set_defaults(func=cmd_shizuku_start)
+    commands.add_parser("shizuku-status", help="status server Shizuku").set_defaults(
+        func=cmd_shizuku_status, device=False)
+
+    scan = commands.add_parser("defensive-scan", help="analisis defensif hierarki UI")
+    scan.add_argument("xml", nargs="?", help="file hierarki; tanpa argumen: di-stream langsung dari perangkat")
+    scan.set_defaults(func=cmd_defensive_scan)
+
+    commands.add_parser("enable-accessibility", help="aktifkan layanan aksesibilitas Automate").set_defaults(
+        func=cmd_enable_accessibility)
+
+    audit = commands.add_parser("audit", help="jalankan satu audit Gemini dan commit hasilnya")
+    audit.add_argument("--no-cache", action="store_true", help="selalu panggil API (lewati cache jawaban)")
+    audit.add_argument("--no-push", action="store_true", help="hanya commit lokal")
+    audit.set_defaults(func=cmd_audit, device=False)
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    args = build_parser().parse_args(argv)
+    if args.import_profile:
+        return run_with_import_profile([arg for arg in argv if arg != "--import-profile"])
+    if args.serial and getattr(args, "device", True):
+        from adb_client import use_device
+        with use_device(args.serial):
+            args.func(args)
+    else:
+        args.func(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
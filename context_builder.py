@@ -0,0 +1,162 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from chat_store import CHAT_MEMORY_SIZE
+
+# --- PENTING: CONFIGURATION ---
+# Anggaran token untuk satu payload (instruksi sistem + ringkasan + history + prompt).
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", "6000"))
+# Ringkasan dibuat ulang jika sudah ada sebanyak ini pesan lama yang keluar dari jendela tetapi belum diringkas.
+SUMMARY_REFRESH_TURNS = 6
+# Porsi maksimum anggaran untuk ringkasan percakapan lama; ringkasan yang lebih panjang dipotong.
+SUMMARY_BUDGET_SHARE = 0.25
+# Pesan yang tidak muat utuh tetap diikutkan (dipotong) jika sisa anggaran minimal sebesar ini.
+MIN_TRUNCATED_TOKENS = 64
+# Perkiraan token tambahan per pesan (role, pembungkus parts).
+MESSAGE_OVERHEAD_TOKENS = 4
+CONTEXT_METRICS_SIZE = 50
+
+_TRUNCATION_MARKER = "\n[... dipotong ...]\n"
+
+
+def estimate_tokens(text):
+    """
+    Perkiraan jumlah token: sekitar 4 byte UTF-8 per token.
+
+    Cukup dekat untuk teks Latin dan cenderung melebihkan untuk output shell/kode,
+    jadi anggaran tidak pernah terlampaui karena salah hitung.
+    """
+    return (len(text.encode('utf-8')) + 3) // 4
+
+
+def truncate_to_tokens(text, tokens):
+    """Memotong `text` agar sekitar `tokens` token: bagian awal dan akhir dipertahankan."""
+    keep = max(0, tokens * 4 - len(_TRUNCATION_MARKER))
+    if len(text.encode('utf-8')) <= tokens * 4:
+        return text
+    head = text[:keep * 2 // 3]
+    tail = text[len(text) - keep // 3:] if keep // 3 else ""
+    return head + _TRUNCATION_MARKER + tail
+
+
+class ContextBuilder:
+    """
+    Menyusun `contents` Gemini dalam batas anggaran token.
+
+    Pesan diambil dari yang terbaru ke belakang sampai anggaran habis. Pesan yang lebih lama
+    diwakili ringkasan bergulir (rolling summary) di instruksi sistem; ringkasan itu hanya dibuat
+    ulang (di thread latar belakang) setelah SUMMARY_REFRESH_TURNS pesan baru keluar dari jendela.
+    """
+
+    def __init__(self, store, summarizer=None, token_budget=CONTEXT_TOKEN_BUDGET,
+                 refresh_turns=SUMMARY_REFRESH_TURNS):
+        self.store = store
+        self.summarizer = summarizer
+        self.token_budget = token_budget
+        self.refresh_turns = refresh_turns
+        self.summary = ""
+        # Pesan dengan id < summary_upto sudah terwakili oleh ringkasan
+        self.summary_upto = 0
+        self.summary_refreshes = 0
+        self.metrics = deque(maxlen=CONTEXT_METRICS_SIZE)
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def build(self, prompt, system_text="", include_history=True):
+        """
+        Mengembalikan (contents, teks instruksi sistem, info).
+
+        `info` berisi rincian anggaran untuk metrik; lengkapi dengan measure() setelah payload jadi.
+        """
+        with self._lock:
+            summary, summary_upto = self.summary, self.summary_upto
+        if summary and include_history:
+            system_text = f"{system_text}\n\nRingkasan percakapan sebelumnya:\n{summary}".strip()
+
+        remaining = self.token_budget - estimate_tokens(system_text) - estimate_tokens(prompt) - MESSAGE_OVERHEAD_TOKENS
+        history = []
+        truncated = False
+        messages = self.store.recent(CHAT_MEMORY_SIZE) if include_history else []
+        for message in reversed(messages):
+            if message["id"] < summary_upto:
+                break
+            cost = estimate_tokens(message["text"]) + MESSAGE_OVERHEAD_TOKENS
+            if cost <= remaining:
+                history.append(message)
+                remaining -= cost
+                continue
+            if remaining >= MIN_TRUNCATED_TOKENS:
+                text = truncate_to_tokens(message["text"], remaining - MESSAGE_OVERHEAD_TOKENS)
+                history.append(dict(message, text=text))
+                remaining -= estimate_tokens(text) + MESSAGE_OVERHEAD_TOKENS
+                truncated = True
+            break
+        history.reverse()
+        # Percakapan harus dimulai dari giliran pengguna
+        while history and history[0]["role"] != "user":
+            history.pop(0)
+
+        if include_history:
+            first_included = history[0]["id"] if history else len(self.store)
+            pending = [m for m in messages if summary_upto <= m["id"] < first_included]
+            self._maybe_refresh(pending, first_included)
+        else:
+            pending = []
+
+        contents = [{"role": m["role"], "parts": [{"text": m["text"]}]} for m in history]
+        contents.append({"role": "user", "parts": [{"text": prompt}]})
+        info = {
+            "budget": self.token_budget,
+            "history_turns": len(history),
+            "truncated": truncated,
+            "summary_tokens": estimate_tokens(summary) if summary and include_history else 0,
+            "unsummarized_turns": len(pending),
+        }
+        return contents, system_text, info
+
+    def measure(self, payload, info):
+        """Melengkapi `info` dengan ukuran payload dan perkiraan token, lalu mencatatnya."""
+        texts = [part.get("text", "") for content in payload.get("contents", []) for part in content.get("parts", [])]
+        texts += [part.get("text", "") for part in payload.get("systemInstruction", {}).get("parts", [])]
+        info["payload_bytes"] = len(json.dumps(payload, ensure_ascii=False).encode('utf-8'))
+        info["estimated_tokens"] = sum(estimate_tokens(text) for text in texts) + \
+            MESSAGE_OVERHEAD_TOKENS * len(payload.get("contents", []))
+        info["ts"] = time.strftime('%Y-%m-%dT%H:%M:%S')
+        self.metrics.append(info)
+        logging.info(
+            "Konteks Gemini: %d byte, ~%d token (%d pesan, ringkasan %d token, dipotong=%s)",
+            info["payload_bytes"], info["estimated_tokens"], info["history_turns"],
+            info["summary_tokens"], info["truncated"]
+        )
+        return info
+
+    def _maybe_refresh(self, pending, upto):
+        if not self.summarizer or len(pending) < self.refresh_turns:
+            return
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh, args=(pending, upto), daemon=True).start()
+
+    def _refresh(self, pending, upto):
+        """Menggabungkan ringkasan lama dengan pesan yang tertunda (dijalankan di thread latar belakang)."""
+        try:
+            with self._lock:
+                previous = self.summary
+            summary = self.summarizer(previous, pending)
+            if summary:
+                summary = truncate_to_tokens(summary.strip(), int(self.token_budget * SUMMARY_BUDGET_SHARE))
+                with self._lock:
+                    self.summary = summary
+                    self.summary_upto = upto
+                    self.summary_refreshes += 1
+        except Exception as e:
+            logging.warning("Gagal memperbarui ringkasan percakapan: %s", e)
+        finally:
+            with self._lock:
+                self._refreshing = False
@@ -1,38 +1,28 @@
 import xml.etree.ElementTree as ET
-import subprocess
 import re
 import os
+import sys
 import time
 
+import ui_dump
+from adb_client import run_adb_command
+from keyword_matcher import KeywordMatcher
+from ui_snapshot import UiSnapshot
+
 # --- PENTING: CONFIGURATION ---
 # Meskipun nilai ini TIDAK DIGUNAKAN untuk analisis, ia tetap ada untuk kasus 
 # di mana Anda ingin mencoba koneksi penuh dari Python. Jaga agar tetap akurat 
 # jika Anda pernah ingin mencoba full scan lagi.
-ADB_IP_PORT = "192.168.1.16:41367" 
-UI_FILE_PATH = "ui.xml"
+ADB_IP_PORT = os.environ.get("ADB_IP_PORT", "192.168.1.16:41367")
 DEFENSIVE_KEYWORDS = ["ok", "lanjutkan", "izinkan", "selesai", "tutup", "perbarui", "notifikasi", "lanjut"]
+# Daftar kata kunci bisa diperluas lewat file JSON (list frasa atau {"frasa": prioritas}).
+# Jika file tidak ada, DEFENSIVE_KEYWORDS di atas yang dipakai.
+DEFENSIVE_KEYWORDS_FILE = os.environ.get(
+    "DEFENSIVE_KEYWORDS_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "defensive_keywords.json")
+)
+DEFENSIVE_MATCHER = KeywordMatcher.from_config(DEFENSIVE_KEYWORDS_FILE, DEFENSIVE_KEYWORDS)
 
-# --- FUNGSI ADB DASAR ---
-def run_adb_command(command_parts):
-    """
-    Menjalankan perintah ADB shell dan menangani output/error.
-    """
-    # Menggunakan timeout kecil karena kita tahu koneksi ADB nirkabel rentan
-    try:
-        result = subprocess.run(
-            command_parts,
-            check=True,
-            capture_output=True,
-            text=True,
-            encoding='utf-8',
-            timeout=5 # Mengurangi timeout untuk kecepatan
-        )
-        return result.stdout.strip()
-    except subprocess.CalledProcessError as e:
-        error_output = e.stderr.strip() or e.stdout.strip()
-        return f"ADB_ERROR (Code {e.returncode}): {error_output}"
-    except Exception as e:
-        return f"ERROR: {e}"
 
 def tap_element(x, y):
     """Mensimulasikan tap pada koordinat layar menggunakan adb shell."""
@@ -54,41 +44,39 @@ def get_center_coords(bounds_string):
     return center_x, center_y
 
 # --- FUNGSI UTAMA CEK DEFENSIF (ANALISIS) ---
-def defensive_check_analysis():
+def defensive_check_analysis(xml_path=None):
     """
-    Membaca ui.xml yang ada dan mencari kata kunci defensif.
+    Mengambil hierarki UI langsung dari perangkat dan mencari kata kunci defensif.
+    Isi `xml_path` untuk menganalisis file dump yang sudah ada (mode offline).
     """
-    if not os.path.exists(UI_FILE_PATH):
-        return f"ERROR: File {UI_FILE_PATH} tidak ditemukan. Harap jalankan langkah 'adb pull' terlebih dahulu."
+    if xml_path is not None and not os.path.exists(xml_path):
+        return f"ERROR: File {xml_path} tidak ditemukan. Harap jalankan langkah 'adb pull' terlebih dahulu."
         
-    tree = ET.parse(UI_FILE_PATH)
-    root = tree.getroot()
-    keywords_to_find = [k.lower() for k in DEFENSIVE_KEYWORDS]
+    try:
+        # Satu lintasan membangun snapshot; setelah itu semua kata kunci dipindai sekaligus per string
+        snapshot = UiSnapshot.from_file(xml_path) if xml_path else ui_dump.capture_snapshot()
+    except (ui_dump.UiDumpError, ET.ParseError) as e:
+        return f"ERROR: Gagal membaca hierarki UI. {e}"
     
-    print(f"[{time.strftime('%H:%M:%S')}] Menganalisis XML untuk kata kunci: {keywords_to_find}")
+    print(f"[{time.strftime('%H:%M:%S')}] Menganalisis {len(snapshot)} node untuk {len(DEFENSIVE_MATCHER.keywords)} kata kunci: {DEFENSIVE_MATCHER.keywords[:10]}")
 
-    for node in root.iter():
-        text = node.get('text', '').lower()
-        content_desc = node.get('content-desc', '').lower()
-        bounds = node.get('bounds')
+    # Semua kecocokan, sudah diurutkan dari kandidat terbaik
+    hits = DEFENSIVE_MATCHER.scan_snapshot(snapshot)
+    if hits:
+        best = hits[0]
+        element_name = snapshot.label(best.node)
+        coords = snapshot.center(best.node)
+        print(f"DEFENSE TRIGGERED: Ditemukan elemen: '{element_name}' (kata kunci '{best.keyword}', {len(hits)} kandidat)")
         
-        # Logika Pencarian: Mencari kecocokan sebagian di teks atau deskripsi
-        if bounds and (any(k in text for k in keywords_to_find) or any(k in content_desc for k in keywords_to_find)):
-            
-            coords = get_center_coords(bounds)
-            if coords:
-                element_name = text or content_desc
-                print(f"DEFENSE TRIGGERED: Ditemukan elemen: '{element_name}'")
-                
-                # Kita harus mencoba tap, tetapi tap akan gagal jika koneksi ADB mati.
-                # Kita tetap menjalankannya karena pada momen ini, koneksi adalah yang terbaru.
-                tap_result = tap_element(coords[0], coords[1])
-                
-                # Jika tap gagal karena device offline, ini adalah risiko yang harus kita ambil
-                if "ADB_ERROR" in tap_result:
-                    return f"CEK SUKSES (Tindakan Terlambat): Elemen '{element_name}' ditemukan, tetapi tap gagal (Koneksi ADB mati). Harap ulangi langkah 1 dan 2 dengan cepat. Detail: {tap_result}"
-                else:
-                    return f"CEK SUKSES (Tindakan Diambil): Elemen '{element_name}' ({coords[0]}, {coords[1]}) diklik. Hasil ADB: {tap_result}"
+        # Kita harus mencoba tap, tetapi tap akan gagal jika koneksi ADB mati.
+        # Kita tetap menjalankannya karena pada momen ini, koneksi adalah yang terbaru.
+        tap_result = tap_element(coords[0], coords[1])
+        
+        # Jika tap gagal karena device offline, ini adalah risiko yang harus kita ambil
+        if "ADB_ERROR" in tap_result:
+            return f"CEK SUKSES (Tindakan Terlambat): Elemen '{element_name}' ditemukan, tetapi tap gagal (Koneksi ADB mati). Harap ulangi langkah 1 dan 2 dengan cepat. Detail: {tap_result}"
+        else:
+            return f"CEK SUKSES (Tindakan Diambil): Elemen '{element_name}' ({coords[0]}, {coords[1]}) diklik. Hasil ADB: {tap_result}"
                 
     return "CEK BERHASIL (Aman): Tidak ada kata kunci defensif yang ditemukan."
 
@@ -98,10 +86,10 @@ def full_defensive_scan(ip_port=ADB_IP_PORT):
     pass
 
 
-# --- DEMO BARU: HANYA ANALISIS FILE YANG SUDAH ADA ---
+# --- DEMO BARU: ANALISIS LAYAR LANGSUNG (ATAU FILE DUMP JIKA DIBERIKAN) ---
 if __name__ == "__main__":
-    # Panggil langsung fungsi analisis pada file ui.xml yang ada. 
-    # File ini dijamin valid karena ditarik oleh perintah shell sebelumnya.
-    scan_report = defensive_check_analysis()
+    # Tanpa argumen: hierarki di-stream langsung dari perangkat, tanpa menyentuh ui.xml.
+    # Dengan argumen path (misalnya `python defensive_logic.py ui.xml`): analisis file yang sudah ada.
+    scan_report = defensive_check_analysis(sys.argv[1] if len(sys.argv) > 1 else None)
     print("\n--- LAPORAN ANALISIS DEFENSIF ---")
     print(scan_report)
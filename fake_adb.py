@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+ADB palsu untuk menjalankan skrip otomasi tanpa perangkat (uji offline).
+
+Pakai dengan: ADB_BIN=./fake_adb.py python adb_bootstrapper.py
+
+Environment:
+  FAKE_ADB_UI               File XML hierarki, atau direktori berisi beberapa *.xml
+                            (layar berurutan; setiap `input` maju satu layar). Default: ui.xml.
+                            Direktori boleh memuat intents.json {"android.settings.X": indeks layar}
+                            agar `am start -a` melompat ke layar tersebut.
+  FAKE_ADB_HOME             Direktori status perangkat palsu (default: <tmp>/fake_adb).
+  FAKE_ADB_LATENCY          Jeda per perintah perangkat, dalam detik (default 0).
+  FAKE_ADB_CONNECT_LATENCY  Jeda tambahan per proses adb baru, dalam detik (default 0).
+  FAKE_ADB_MODEL            Nilai `getprop ro.product.model` (default FakePhone).
+"""
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+SELF_PATH = os.path.abspath(__file__)
+DEFAULT_UI = os.path.join(os.path.dirname(SELF_PATH), "ui.xml")
+DEFAULT_SERIAL = "fake-device"
+DEVICE_COMMANDS = ["input", "uiautomator", "am", "settings", "dumpsys", "getprop", "wm"]
+
+
+# --- STATUS PERANGKAT ---
+def device_dir(serial):
+    home = os.environ.get("FAKE_ADB_HOME") or os.path.join(tempfile.gettempdir(), "fake_adb")
+    path = os.path.join(home, serial)
+    os.makedirs(os.path.join(path, "sdcard"), exist_ok=True)
+    return path
+
+
+def load_state(serial):
+    try:
+        with open(os.path.join(device_dir(serial), "state.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"screen": 0, "focus": None, "settings": {}, "events": []}
+
+
+def save_state(serial, state):
+    with open(os.path.join(device_dir(serial), "state.json"), "w") as f:
+        json.dump(state, f)
+
+
+def screen_files():
+    source = os.environ.get("FAKE_ADB_UI", DEFAULT_UI)
+    if os.path.isdir(source):
+        return sorted(os.path.join(source, n) for n in os.listdir(source) if n.endswith(".xml"))
+    return [source]
+
+
+def current_screen(state):
+    files = screen_files()
+    return files[min(state["screen"], len(files) - 1)]
+
+
+def read_screen(state):
+    with open(current_screen(state), "rb") as f:
+        return f.read()
+
+
+# --- PERINTAH PERANGKAT ---
+def cmd_input(serial, state, args):
+    state["events"].append(["input"] + args)
+    state["screen"] += 1
+    state["focus"] = None
+    return 0
+
+
+def cmd_uiautomator(serial, state, args):
+    if not args or args[0] != "dump":
+        print(f"uiautomator: unknown command {' '.join(args)}", file=sys.stderr)
+        return 1
+    target = args[1] if len(args) > 1 else "/sdcard/window_dump.xml"
+    xml = read_screen(state)
+    if target in ("/dev/tty", "/dev/stdout"):
+        sys.stdout.buffer.write(xml)
+    else:
+        with open(os.path.join(device_dir(serial), "sdcard", os.path.basename(target)), "wb") as f:
+            f.write(xml)
+    print(f"UI hierchary dumped to: {target}")
+    return 0
+
+
+def intent_screens():
+    source = os.environ.get("FAKE_ADB_UI", DEFAULT_UI)
+    try:
+        with open(os.path.join(source, "intents.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def cmd_am(serial, state, args):
+    state["events"].append(["am"] + args)
+    action = args[args.index("-a") + 1] if "-a" in args[:-1] else None
+    if action in intent_screens():
+        state["screen"] = intent_screens()[action]
+        state["focus"] = None
+    elif "-n" in args[:-1]:
+        state["focus"] = args[args.index("-n") + 1].replace("\\$", "$")
+    elif action and action.startswith("android.settings."):
+        state["focus"] = "com.android.settings/com.android.settings.Settings"
+    print("Starting: Intent { " + " ".join(args[1:]) + " }")
+    return 0
+
+
+def cmd_settings(serial, state, args):
+    if len(args) >= 3 and args[0] == "get":
+        print(state["settings"].get(f"{args[1]}/{args[2]}", "null"))
+        return 0
+    if len(args) >= 4 and args[0] == "put":
+        state["settings"][f"{args[1]}/{args[2]}"] = args[3]
+        return 0
+    print("usage: settings [get|put] NAMESPACE KEY [VALUE]", file=sys.stderr)
+    return 1
+
+
+def cmd_dumpsys(serial, state, args):
+    focus = state.get("focus")
+    if not focus:
+        screen = current_screen(state)
+        if os.path.exists(screen + ".focus"):
+            with open(screen + ".focus") as f:
+                focus = f.read().strip()
+        else:
+            match = re.search(rb'package="([^"]+)"', read_screen(state))
+            package = match.group(1).decode() if match else "android"
+            focus = f"{package}/{package}.MainActivity"
+    print(f"  mCurrentFocus=Window{{1f2e3d u0 {focus}}}")
+    print(f"  mFocusedApp=ActivityRecord{{4c5b6a u0 {focus} t42}}")
+    return 0
+
+
+def cmd_getprop(serial, state, args):
+    props = {
+        "ro.product.model": os.environ.get("FAKE_ADB_MODEL", "FakePhone"),
+        "ro.serialno": serial,
+    }
+    print(props.get(args[0], "") if args else "\n".join(f"[{k}]: [{v}]" for k, v in props.items()))
+    return 0
+
+
+def cmd_wm(serial, state, args):
+    if args[:1] == ["size"]:
+        print("Physical size: 1080x2400")
+        return 0
+    return 1
+
+
+def run_device_command(serial, name, args):
+    latency = float(os.environ.get("FAKE_ADB_LATENCY", "0") or 0)
+    if latency:
+        time.sleep(latency)
+    state = load_state(serial)
+    exit_code = globals()[f"cmd_{name}"](serial, state, args)
+    save_state(serial, state)
+    sys.stdout.flush()
+    return exit_code
+
+
+# --- SHELL ---
+def shell_prelude(serial):
+    """Fungsi sh yang meneruskan perintah perangkat ke skrip ini."""
+    python = sys.executable
+    lines = [f'{name}() {{ "{python}" -S "{SELF_PATH}" -s "{serial}" device {name} "$@"; }}' for name in DEVICE_COMMANDS]
+    return "\n".join(lines) + "\n"
+
+
+def run_shell(serial, command_args):
+    if command_args:
+        script = shell_prelude(serial) + " ".join(command_args) + "\n"
+        return subprocess.run(["/bin/sh", "-c", script]).returncode
+
+    # Mode interaktif: prelude dikirim dulu, lalu stdin diteruskan apa adanya.
+    proc = subprocess.Popen(["/bin/sh", "-s"], stdin=subprocess.PIPE)
+    proc.stdin.write(shell_prelude(serial).encode())
+    proc.stdin.flush()
+
+    def relay():
+        try:
+            for chunk in iter(lambda: os.read(0, 65536), b""):
+                proc.stdin.write(chunk)
+                proc.stdin.flush()
+            proc.stdin.close()
+        except (BrokenPipeError, ValueError):
+            pass
+
+    # Seperti adb asli: begitu shell perangkat keluar, proses adb ikut selesai.
+    threading.Thread(target=relay, daemon=True).start()
+    return proc.wait()
+
+
+def run_pull(serial, args):
+    if not args:
+        print("adb: usage: adb pull REMOTE [LOCAL]", file=sys.stderr)
+        return 1
+    source = os.path.join(device_dir(serial), "sdcard", os.path.basename(args[0]))
+    if not os.path.exists(source):
+        print(f"adb: error: failed to stat remote object '{args[0]}': No such file or directory", file=sys.stderr)
+        return 1
+    target = args[1] if len(args) > 1 else "."
+    if os.path.isdir(target):
+        target = os.path.join(target, os.path.basename(args[0]))
+    shutil.copyfile(source, target)
+    print(f"{args[0]}: 1 file pulled, 0 skipped.")
+    return 0
+
+
+def main(argv):
+    serial = os.environ.get("ANDROID_SERIAL") or DEFAULT_SERIAL
+    if len(argv) >= 2 and argv[0] == "-s":
+        serial, argv = argv[1], argv[2:]
+    if not argv:
+        print("fake adb: perintah kosong", file=sys.stderr)
+        return 1
+
+    verb, args = argv[0], argv[1:]
+    if verb == "device":
+        return run_device_command(serial, args[0], args[1:])
+
+    connect_latency = float(os.environ.get("FAKE_ADB_CONNECT_LATENCY", "0") or 0)
+    if connect_latency:
+        time.sleep(connect_latency)
+
+    if verb == "devices":
+        print(f"List of devices attached\n{serial}\tdevice\n")
+        return 0
+    if verb == "connect":
+        print(f"already connected to {args[0] if args else serial}")
+        return 0
+    if verb in ("shell", "exec-out"):
+        return run_shell(serial, args)
+    if verb == "pull":
+        return run_pull(serial, args)
+    print(f"fake adb: perintah '{verb}' tidak didukung", file=sys.stderr)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Server Gemini tiruan untuk menguji web_server.py / gemini_client.py tanpa internet dan tanpa kuota.
+
+Pakai dengan:
+  python fake_gemini.py &
+  GEMINI_API_BASE=http://127.0.0.1:8765/v1beta GEMINI_API_KEY=uji python web_server.py
+
+Menjawab POST /v1beta/models/<model>:generateContent dengan bentuk respons yang sama seperti API asli
+(candidates[].content.parts[].text, groundingMetadata.groundingChunks, usageMetadata).
+:streamGenerateContent?alt=sse mengirim jawaban yang sama per kata sebagai event SSE (chunked),
+dengan groundingMetadata di potongan terakhir. Jawabannya menggemakan pesan pengguna terakhir.
+
+Environment:
+  FAKE_GEMINI_PORT     Port (default 8765).
+  FAKE_GEMINI_LATENCY  Jeda sebelum menjawab (sebelum potongan pertama), dalam detik (default 0).
+  FAKE_GEMINI_TOKEN_DELAY  Jeda antar potongan stream, dalam detik (default 0.05).
+"""
+import json
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_PORT = 8765
+_ROUTE = re.compile(r'^/v1beta/models/([^/:]+):(generateContent|streamGenerateContent)$')
+
+_stats_lock = threading.Lock()
+STATS = {"requests": 0, "connections": 0}
+
+
+def reply_text(payload):
+    """Teks jawaban tiruan: gema dari pesan pengguna terakhir."""
+    contents = payload.get("contents") or []
+    prompt = ""
+    for content in reversed(contents):
+        if content.get("role") == "user":
+            prompt = "".join(part.get("text", "") for part in content.get("parts", []))
+            break
+    return f"Jawaban tiruan untuk: {prompt}" if prompt else "Jawaban tiruan."
+
+
+def grounding_metadata(payload):
+    """groundingMetadata tiruan, hanya jika permintaan mengaktifkan google_search."""
+    if not any("google_search" in tool for tool in payload.get("tools") or []):
+        return None
+    return {
+        "webSearchQueries": ["harga bitcoin hari ini"],
+        "groundingChunks": [
+            {"web": {"uri": "https://example.com/btc", "title": "example.com"}},
+            {"web": {"uri": "https://example.org/pasar", "title": "example.org"}},
+        ],
+        "groundingSupports": [],
+    }
+
+
+def generate_response(payload):
+    text = reply_text(payload)
+    candidate = {
+        "content": {"role": "model", "parts": [{"text": text}]},
+        "finishReason": "STOP",
+        "index": 0,
+    }
+    metadata = grounding_metadata(payload)
+    if metadata:
+        candidate["groundingMetadata"] = metadata
+    prompt_tokens = len(json.dumps(payload.get("contents", []))) // 4
+    return {
+        "candidates": [candidate],
+        "usageMetadata": {
+            "promptTokenCount": prompt_tokens,
+            "candidatesTokenCount": len(text) // 4,
+            "totalTokenCount": prompt_tokens + len(text) // 4,
+        },
+        "modelVersion": "fake-gemini",
+    }
+
+
+def stream_chunks(payload):
+    """Respons generateContent yang dipecah per kata, seperti potongan streamGenerateContent."""
+    full = generate_response(payload)
+    candidate = full["candidates"][0]
+    words = re.findall(r'\S+\s*', candidate["content"]["parts"][0]["text"]) or [""]
+    for i, word in enumerate(words):
+        chunk_candidate = {"content": {"role": "model", "parts": [{"text": word}]}, "index": 0}
+        chunk = {"candidates": [chunk_candidate], "modelVersion": full["modelVersion"]}
+        if i == len(words) - 1:
+            chunk_candidate["finishReason"] = "STOP"
+            if "groundingMetadata" in candidate:
+                chunk_candidate["groundingMetadata"] = candidate["groundingMetadata"]
+            chunk["usageMetadata"] = full["usageMetadata"]
+        yield chunk
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 agar klien bisa memakai ulang koneksi (keep-alive), seperti server asli
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with _stats_lock:
+            STATS["connections"] += 1
+
+    def log_message(self, fmt, *args):
+        print(f"[{time.strftime('%H:%M:%S')}] fake_gemini: {fmt % args}", file=sys.stderr)
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            with _stats_lock:
+                self.send_json(200, dict(STATS))
+            return
+        self.send_json(404, {"error": {"code": 404, "message": "Not found", "status": "NOT_FOUND"}})
+
+    def do_POST(self):
+        path, _, query = self.path.partition("?")
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length)
+        with _stats_lock:
+            STATS["requests"] += 1
+        route = _ROUTE.match(path)
+        if not route:
+            self.send_json(404, {"error": {"code": 404, "message": "Not found", "status": "NOT_FOUND"}})
+            return
+        if not re.search(r'(^|&)key=[^&]+', query):
+            self.send_json(400, {"error": {"code": 400, "message": "API key not valid.", "status": "INVALID_ARGUMENT"}})
+            return
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            self.send_json(400, {"error": {"code": 400, "message": "Invalid JSON payload.", "status": "INVALID_ARGUMENT"}})
+            return
+        time.sleep(float(os.environ.get("FAKE_GEMINI_LATENCY", "0")))
+        if route.group(2) == "generateContent":
+            self.send_json(200, generate_response(payload))
+        else:
+            self.send_stream(payload, sse="alt=sse" in query)
+
+    def send_stream(self, payload, sse):
+        """Potongan dikirim dengan Transfer-Encoding: chunked; format SSE atau array JSON (tanpa alt=sse)."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream" if sse else "application/json; charset=UTF-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        delay = float(os.environ.get("FAKE_GEMINI_TOKEN_DELAY", "0.05"))
+        for i, chunk in enumerate(stream_chunks(payload)):
+            if i:
+                time.sleep(delay)
+            body = json.dumps(chunk)
+            if sse:
+                self.write_chunk(f"data: {body}\r\n\r\n")
+            else:
+                self.write_chunk(("[" if i == 0 else ",\r\n") + body)
+        if not sse:
+            self.write_chunk("]")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def write_chunk(self, text):
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+def serve(port=None):
+    """Membuat server (belum dijalankan). Port 0 memilih port bebas; lihat server.server_port."""
+    port = DEFAULT_PORT if port is None else port
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeGeminiHandler)
+    server.daemon_threads = True
+    return server
+
+
+if __name__ == "__main__":
+    server = serve(int(os.environ.get("FAKE_GEMINI_PORT", DEFAULT_PORT)))
+    print(f"[{time.strftime('%H:%M:%S')}] fake_gemini berjalan di http://127.0.0.1:{server.server_port}/v1beta")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,187 @@
+import asyncio
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from metrics import GEMINI_PAYLOAD_BYTES, GEMINI_REQUEST_SECONDS, status_label
+
+# --- PENTING: CONFIGURATION ---
+# GEMINI_API_BASE bisa diarahkan ke server tiruan lokal, misalnya http://127.0.0.1:8765/v1beta (fake_gemini.py).
+GEMINI_API_BASE = os.environ.get("GEMINI_API_BASE", "https://generativelanguage.googleapis.com/v1beta")
+GEMINI_MODEL = os.environ.get("GEMINI_MODEL", "gemini-2.5-flash-preview-09-2025")
+# Batas waktu (detik): membuka koneksi, dan menunggu data dari server.
+GEMINI_CONNECT_TIMEOUT = float(os.environ.get("GEMINI_CONNECT_TIMEOUT", "5"))
+GEMINI_READ_TIMEOUT = float(os.environ.get("GEMINI_READ_TIMEOUT", "60"))
+# Jumlah koneksi keep-alive yang disimpan di pool (sekitar jumlah permintaan bersamaan).
+GEMINI_POOL_SIZE = 8
+
+
+class GeminiClient:
+    """
+    Klien Gemini dengan satu requests.Session bersama.
+
+    Koneksi TLS ke server dipakai ulang antar permintaan (keep-alive), setiap permintaan
+    dibatasi waktu connect/read, dan gagal koneksi (bukan gagal baca) dicoba ulang sekali.
+    Aman dipakai dari beberapa thread Flask sekaligus.
+    """
+
+    def __init__(self, api_key, base_url=GEMINI_API_BASE, model=GEMINI_MODEL,
+                 connect_timeout=GEMINI_CONNECT_TIMEOUT, read_timeout=GEMINI_READ_TIMEOUT,
+                 pool_size=GEMINI_POOL_SIZE):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.model = model
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        self.session.headers.update({'Content-Type': 'application/json'})
+        # POST tidak idempoten bagi kuota: hanya ulangi jika koneksi gagal dibuka
+        retry = Retry(total=1, connect=1, read=0, status=0, backoff_factor=0.2)
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._lock = threading.Lock()
+        self.requests_sent = 0
+
+    def endpoint(self, method):
+        return f"{self.base_url}/models/{self.model}:{method}"
+
+    def generate(self, payload):
+        """
+        POST generateContent dan mengembalikan JSON respons.
+
+        Melempar requests.exceptions.HTTPError / Timeout / ConnectionError; pemanggil yang
+        menyusun pesan galat untuk pengguna.
+        """
+        with self._lock:
+            self.requests_sent += 1
+        body = self._encode('generate', payload)
+        start = time.perf_counter()
+        status = "error"
+        try:
+            response = self.session.post(
+                self.endpoint('generateContent'),
+                params={'key': self.api_key},
+                data=body,
+                timeout=self.timeout
+            )
+            status = str(response.status_code)
+            GEMINI_PAYLOAD_BYTES.observe(len(response.content), 'generate', 'response')
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            if e.response is None:
+                status = status_label(e)
+            raise
+        finally:
+            GEMINI_REQUEST_SECONDS.observe(time.perf_counter() - start, 'generate', status)
+
+    def stream(self, payload):
+        """
+        POST streamGenerateContent (alt=sse) dan menghasilkan setiap potongan JSON begitu tiba.
+
+        Potongan pertama biasanya datang jauh sebelum jawaban lengkap selesai; teksnya diambil
+        dengan chunk_text() dan sumbernya dengan chunk_sources(). Kesalahan HTTP dilempar
+        sebelum potongan pertama.
+        """
+        with self._lock:
+            self.requests_sent += 1
+        body = self._encode('stream', payload)
+        start = time.perf_counter()
+        status = "error"
+        received = 0
+        try:
+            response = self.session.post(
+                self.endpoint('streamGenerateContent'),
+                params={'key': self.api_key, 'alt': 'sse'},
+                data=body,
+                timeout=self.timeout,
+                stream=True
+            )
+            status = str(response.status_code)
+        except requests.exceptions.RequestException as e:
+            GEMINI_REQUEST_SECONDS.observe(time.perf_counter() - start, 'stream', status_label(e))
+            raise
+        with response:
+            try:
+                response.raise_for_status()
+                data_lines = []
+                for line in response.iter_lines(chunk_size=None):
+                    received += len(line) + 1
+                    line = line.decode('utf-8')
+                    if line.startswith('data:'):
+                        data_lines.append(line[5:].lstrip())
+                    elif not line and data_lines:
+                        # Baris kosong menutup satu event SSE
+                        yield json.loads("\n".join(data_lines))
+                        data_lines = []
+                if data_lines:
+                    yield json.loads("\n".join(data_lines))
+            finally:
+                # Durasi stream = sampai potongan terakhir dibaca (atau pemanggil berhenti)
+                GEMINI_REQUEST_SECONDS.observe(time.perf_counter() - start, 'stream', status)
+                GEMINI_PAYLOAD_BYTES.observe(received, 'stream', 'response')
+
+    async def agenerate(self, payload):
+        """Versi async dari generate(): dijalankan di thread pool agar event loop tidak terblokir."""
+        return await asyncio.to_thread(self.generate, payload)
+
+    def _encode(self, method, payload):
+        """Payload JSON sebagai bytes (sekali serialisasi, ukurannya dicatat ke metrik)."""
+        body = json.dumps(payload).encode('utf-8')
+        GEMINI_PAYLOAD_BYTES.observe(len(body), method, 'request')
+        return body
+
+    def close(self):
+        self.session.close()
+
+
+def parse_response(result):
+    """
+    Mengambil (teks, sumber) dari JSON generateContent.
+
+    Sumber diambil dari groundingMetadata (groundingChunks, atau groundingAttributions pada
+    format lama) sebagai list (judul, uri) tanpa duplikat.
+    """
+    candidate = (result.get('candidates') or [{}])[0]
+    parts = candidate.get('content', {}).get('parts') or [{}]
+    text = "".join(part.get('text', '') for part in parts) or "Tidak ada respons teks dari model."
+    return text, grounding_sources(candidate.get('groundingMetadata'))
+
+
+def chunk_text(chunk):
+    """Teks yang dibawa satu potongan streamGenerateContent (bisa kosong)."""
+    candidate = (chunk.get('candidates') or [{}])[0]
+    return "".join(part.get('text', '') for part in candidate.get('content', {}).get('parts') or [])
+
+
+def chunk_sources(chunk):
+    """Sumber grounding pada satu potongan stream (biasanya hanya di potongan terakhir)."""
+    candidate = (chunk.get('candidates') or [{}])[0]
+    return grounding_sources(candidate.get('groundingMetadata'))
+
+
+def grounding_sources(grounding_metadata):
+    """List (judul, uri) dari groundingMetadata sebuah kandidat."""
+    if not grounding_metadata:
+        return []
+    sources = []
+    entries = grounding_metadata.get('groundingChunks') or grounding_metadata.get('groundingAttributions') or []
+    for entry in entries:
+        web = entry.get('web')
+        if web and web.get('uri') and web.get('title'):
+            source = (web['title'], web['uri'])
+            if source not in sources:
+                sources.append(source)
+    return sources
+
+
+def format_sources(sources):
+    """Blok Markdown 'Sumber Riset' untuk ditambahkan di akhir jawaban, atau string kosong."""
+    if not sources:
+        return ""
+    return "\n\n**Sumber Riset:**\n" + "\n".join(f"[{title}]({uri})" for title, uri in sources)
@@ -0,0 +1,221 @@
+import hashlib
+import logging
+import os
+import subprocess
+import threading
+import time
+
+from job_queue import no_progress
+from metrics import GIT_COMMAND_SECONDS, status_label
+
+# --- PENTING: CONFIGURATION ---
+# Push digabung: paling lambat setiap GIT_PUSH_WINDOW detik sejak commit pertama yang belum di-push,
+# atau segera setelah GIT_PUSH_EVERY commit lokal menumpuk.
+GIT_PUSH_WINDOW = float(os.environ.get("GIT_PUSH_WINDOW", "300"))
+GIT_PUSH_EVERY = int(os.environ.get("GIT_PUSH_EVERY", "5"))
+# Remote tujuan push; kosong = upstream bawaan branch (`git push` biasa).
+GIT_REMOTE = os.environ.get("GIT_REMOTE", "")
+GIT_TIMEOUT = 120
+
+
+def file_digest(path):
+    """BLAKE2b isi file, atau None jika file tidak ada."""
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+class GitSync:
+    """
+    Sinkronisasi git untuk file keluaran yang terdaftar saja (misalnya laporan audit).
+
+    - Hanya path terdaftar yang berubah yang di-stage (`git add -- <path>`), bukan `git add .`,
+      jadi file lain di working tree (mis. ui.xml) tidak dipindai dan tidak ikut ter-commit.
+    - Perubahan dideteksi dengan hash isi di proses ini; jika tidak ada yang berubah, commit
+      dilewati tanpa menjalankan git sama sekali.
+    - Setiap commit dibuat lokal; push digabung per jendela waktu atau per jumlah commit.
+    """
+
+    def __init__(self, repo_dir=None, paths=(), push_window=GIT_PUSH_WINDOW, push_every=GIT_PUSH_EVERY,
+                 remote=GIT_REMOTE):
+        self.repo_dir = os.path.abspath(repo_dir or os.getcwd())
+        self.push_window = push_window
+        self.push_every = push_every
+        self.remote = remote
+        self.paths = []
+        self._digests = {}
+        self._lock = threading.RLock()
+        self._timer = None
+        self.pending_commits = 0
+        self.first_pending = None
+        self.last_push = None
+        self.last_error = ""
+        self.pushes = 0
+        self.commits = 0
+        self.skipped = 0
+        for path in paths:
+            self.register(path)
+
+    # --- Utilitas git ---
+    def _git(self, *args):
+        """Menjalankan git di repo_dir (tanpa shell); mengembalikan (sukses, output gabungan)."""
+        start = time.perf_counter()
+        try:
+            result = subprocess.run(
+                ["git", *args], cwd=self.repo_dir, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                text=True, timeout=GIT_TIMEOUT
+            )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            GIT_COMMAND_SECONDS.observe(time.perf_counter() - start, args[0], status_label(e))
+            return False, f"Error umum saat menjalankan git {args[0]}: {e}"
+        GIT_COMMAND_SECONDS.observe(time.perf_counter() - start, args[0], "ok" if result.returncode == 0 else "error")
+        return result.returncode == 0, result.stdout.strip()
+
+    def _abs(self, path):
+        return os.path.join(self.repo_dir, path)
+
+    def register(self, path):
+        """
+        Mendaftarkan path (relatif terhadap repo) sebagai keluaran yang disinkronkan.
+
+        Jika file sudah bersih di git, hash isinya saat ini menjadi acuan; jika belum (baru/berubah),
+        perubahan pertama langsung ikut commit berikutnya.
+        """
+        path = os.path.relpath(self._abs(path), self.repo_dir)
+        with self._lock:
+            if path in self.paths:
+                return
+            self.paths.append(path)
+            ok, status = self._git("status", "--porcelain", "--", path)
+            if ok and not status and os.path.exists(self._abs(path)):
+                self._digests[path] = file_digest(self._abs(path))
+
+    def changed_paths(self):
+        """Path terdaftar yang isinya berbeda dari commit terakhir (menurut hash di proses ini)."""
+        with self._lock:
+            return [path for path in self.paths
+                    if file_digest(self._abs(path)) != self._digests.get(path, "") and
+                    (os.path.exists(self._abs(path)) or path in self._digests)]
+
+    # --- Commit & push ---
+    def commit(self, message, progress=no_progress, push=False):
+        """
+        Stage + commit path terdaftar yang berubah, lalu push jika waktunya (atau `push=True`).
+
+        Mengembalikan dict: committed, paths, push ('done'/'deferred'/'failed'/'idle'), error.
+        """
+        with self._lock:
+            changed = self.changed_paths()
+            outcome = {"committed": False, "paths": changed, "push": "idle", "error": ""}
+            if not changed:
+                self.skipped += 1
+                progress("add", "skipped", "tidak ada perubahan")
+                progress("commit", "skipped", "nothing to commit")
+            else:
+                progress("add", "running", ", ".join(changed))
+                ok, output = self._git("add", "--", *changed)
+                if not ok:
+                    progress("add", "failed", output)
+                    outcome["error"] = f"Error Git Add: {output}"
+                    return outcome
+                progress("add", "done", ", ".join(changed))
+
+                progress("commit", "running")
+                ok, output = self._git("commit", "-m", message, "--", *changed)
+                if not ok and "nothing to commit" not in output and "no changes added" not in output:
+                    progress("commit", "failed", output)
+                    outcome["error"] = f"Error Git Commit: {output}"
+                    return outcome
+                # Isi yang sudah ter-commit menjadi acuan baru
+                for path in changed:
+                    self._digests[path] = file_digest(self._abs(path))
+                if ok:
+                    outcome["committed"] = True
+                    self.commits += 1
+                    self.pending_commits += 1
+                    self.first_pending = self.first_pending or time.time()
+                    progress("commit", "done", output.splitlines()[0] if output else "")
+                else:
+                    self.skipped += 1
+                    progress("commit", "skipped", "nothing to commit")
+
+            if push or self._push_due():
+                ok, output = self.flush(progress)
+                outcome["push"] = "done" if ok else "failed"
+                if not ok:
+                    outcome["error"] = f"Error Git Push: {output}"
+            elif self.pending_commits:
+                outcome["push"] = "deferred"
+                progress("push", "skipped", f"ditunda: {self.pending_commits} commit menunggu push")
+                self._schedule_flush()
+            else:
+                progress("push", "skipped", "tidak ada commit baru")
+            return outcome
+
+    def _push_due(self):
+        if not self.pending_commits:
+            return False
+        if self.pending_commits >= self.push_every:
+            return True
+        return time.time() - self.first_pending >= self.push_window
+
+    def _schedule_flush(self):
+        """Memastikan commit yang tertunda tetap di-push saat jendela waktu habis."""
+        if self._timer is not None:
+            return
+        delay = max(0.0, self.first_pending + self.push_window - time.time())
+        self._timer = threading.Timer(delay, self._flush_from_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _flush_from_timer(self):
+        with self._lock:
+            self._timer = None
+            if self.pending_commits:
+                ok, output = self.flush()
+                if not ok:
+                    logging.warning("Push git tertunda gagal: %s", output)
+
+    def flush(self, progress=no_progress):
+        """Push semua commit lokal yang tertunda sekarang juga; mengembalikan (sukses, output)."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            progress("push", "running", f"{self.pending_commits} commit")
+            ok, output = self._git("push", *([self.remote] if self.remote else []))
+            if not ok:
+                self.last_error = output
+                progress("push", "failed", output)
+                if self.pending_commits:
+                    # Commit tetap tersimpan lokal; dicoba lagi pada jendela berikutnya
+                    self.first_pending = time.time()
+                    self._schedule_flush()
+                return False, output
+            self.pushes += 1
+            self.last_push = time.time()
+            self.last_error = ""
+            progress("push", "done", f"{self.pending_commits} commit")
+            self.pending_commits = 0
+            self.first_pending = None
+            return True, output
+
+    def status(self):
+        with self._lock:
+            return {
+                "repo": self.repo_dir,
+                "paths": list(self.paths),
+                "changed": self.changed_paths(),
+                "pending_commits": self.pending_commits,
+                "push_every": self.push_every,
+                "push_window": self.push_window,
+                "next_push_in": round(max(0.0, self.first_pending + self.push_window - time.time()), 1)
+                if self.first_pending else None,
+                "commits": self.commits,
+                "skipped": self.skipped,
+                "pushes": self.pushes,
+                "last_push": self.last_push,
+                "last_error": self.last_error,
+            }
@@ -0,0 +1,176 @@
+import logging
+import os
+import queue
+import threading
+import time
+import traceback
+from collections import OrderedDict
+
+from metrics import TASK_STAGE_SECONDS
+
+# --- PENTING: CONFIGURATION ---
+# Jumlah thread pekerja untuk tugas panjang (/audit, /git).
+TASK_WORKERS = int(os.environ.get("TASK_WORKERS", "2"))
+# Jumlah tugas selesai yang tetap bisa dilihat lewat /tasks.
+TASK_HISTORY = 50
+
+# Status tugas dan tahap
+QUEUED, RUNNING, DONE, FAILED, SKIPPED, PENDING = "queued", "running", "done", "failed", "skipped", "pending"
+FINISHED = (DONE, FAILED)
+
+
+def no_progress(stage, status, detail=""):
+    """Pengganti Task.progress untuk pemanggilan langsung (tanpa antrean)."""
+
+
+class Task:
+    """
+    Satu tugas latar belakang dengan tahapan bernama (misalnya research, write, add, commit, push).
+
+    Fungsi tugas menerima objek ini dan melaporkan kemajuan lewat progress(); setiap perubahan
+    menaikkan `version` sehingga pemantau cukup menunggu versi berikutnya (wait_for_change).
+    """
+
+    def __init__(self, task_id, kind, func, stages=(), dedupe_key=None):
+        self.id = task_id
+        self.kind = kind
+        self.func = func
+        self.dedupe_key = dedupe_key
+        self.status = QUEUED
+        self.stages = OrderedDict((name, {"name": name, "status": PENDING, "detail": ""}) for name in stages)
+        self.result = None
+        self.merged = 0
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.version = 0
+        self._changed = threading.Condition()
+
+    def _touch(self):
+        self.version += 1
+        self._changed.notify_all()
+
+    def progress(self, stage, status, detail=""):
+        """Mencatat status satu tahap (running/done/failed/skipped) beserta keterangan singkat."""
+        with self._changed:
+            entry = self.stages.setdefault(stage, {"name": stage, "status": PENDING, "detail": ""})
+            entry["status"] = status
+            entry["detail"] = detail
+            now = entry[f"{status}_at"] = time.time()
+            self._touch()
+        if status in (DONE, FAILED, SKIPPED) and "running_at" in entry:
+            TASK_STAGE_SECONDS.observe(now - entry["running_at"], self.kind, stage, status)
+        logging.info("Tugas %s (%s): tahap %s %s %s", self.id, self.kind, stage, status, detail)
+
+    def _set_status(self, status, result=None):
+        with self._changed:
+            self.status = status
+            if status == RUNNING:
+                self.started = time.time()
+            else:
+                self.finished = time.time()
+                self.result = result
+            self._touch()
+
+    def run(self):
+        self._set_status(RUNNING)
+        try:
+            result = self.func(self)
+        except Exception as e:
+            logging.error("Tugas %s gagal: %s\n%s", self.id, e, traceback.format_exc())
+            self._set_status(FAILED, f"Error Fatal Tugas {self.kind}: {e}")
+            return
+        failed = any(stage["status"] == FAILED for stage in self.stages.values())
+        self._set_status(FAILED if failed else DONE, result)
+
+    def wait(self, timeout=None):
+        """Menunggu tugas selesai; True jika selesai sebelum `timeout`."""
+        with self._changed:
+            return self._changed.wait_for(lambda: self.status in FINISHED, timeout)
+
+    def wait_for_change(self, version, timeout=None):
+        """Menunggu sampai `version` berubah; mengembalikan (versi terbaru, ringkasan)."""
+        with self._changed:
+            self._changed.wait_for(lambda: self.version != version, timeout)
+            return self.version, self._summary()
+
+    def summary(self):
+        with self._changed:
+            return self._summary()
+
+    def _summary(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "stages": [dict(stage) for stage in self.stages.values()],
+            "result": self.result,
+            "merged": self.merged,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+        }
+
+
+class TaskQueue:
+    """
+    Antrean tugas dengan sejumlah kecil thread pekerja.
+
+    Tugas dengan `dedupe_key` yang sama dengan tugas yang masih antre/berjalan tidak dibuat ulang:
+    permintaan itu digabung ke tugas yang sudah ada (lihat `merged`).
+    """
+
+    def __init__(self, workers=TASK_WORKERS, history=TASK_HISTORY):
+        self.workers = workers
+        self.history = history
+        self._queue = queue.Queue()
+        self._tasks = OrderedDict()
+        self._lock = threading.Lock()
+        self._seq = 0
+        for i in range(workers):
+            threading.Thread(target=self._work, daemon=True, name=f"task-worker-{i}").start()
+
+    def _work(self):
+        while True:
+            task = self._queue.get()
+            try:
+                task.run()
+            finally:
+                self._queue.task_done()
+
+    def submit(self, kind, func, stages=(), dedupe_key=None):
+        """Mengantrekan `func(task)`; mengembalikan Task (bisa tugas lama jika digabung)."""
+        with self._lock:
+            if dedupe_key is not None:
+                for task in self._tasks.values():
+                    if task.dedupe_key == dedupe_key and task.status not in FINISHED:
+                        with task._changed:
+                            task.merged += 1
+                            task._touch()
+                        return task
+            self._seq += 1
+            task = Task(f"t{self._seq}", kind, func, stages, dedupe_key)
+            self._tasks[task.id] = task
+            self._prune()
+        self._queue.put(task)
+        return task
+
+    def _prune(self):
+        finished = [task_id for task_id, task in self._tasks.items() if task.status in FINISHED]
+        for task_id in finished[:max(0, len(finished) - self.history)]:
+            del self._tasks[task_id]
+
+    def get(self, task_id):
+        with self._lock:
+            return self._tasks.get(task_id)
+
+    def list(self):
+        with self._lock:
+            tasks = list(self._tasks.values())
+        return [task.summary() for task in reversed(tasks)]
+
+    def counts(self):
+        """Jumlah tugas per status (untuk metrik kedalaman antrean)."""
+        with self._lock:
+            statuses = [task.status for task in self._tasks.values()]
+        return {status: statuses.count(status) for status in (QUEUED, RUNNING)}
@@ -0,0 +1,141 @@
+import json
+import os
+from collections import deque, namedtuple
+
+from ui_snapshot import FLAG_HAS_BOUNDS
+
+# --- KUALITAS KECOCOKAN ---
+QUALITY_SUBSTRING = 1   # "ok" di dalam "facebook"
+QUALITY_WORD = 2        # "ok" sebagai kata utuh di "ok, lanjutkan"
+QUALITY_EXACT = 3       # seluruh teks node adalah "ok"
+
+KeywordHit = namedtuple('KeywordHit', 'keyword priority quality coverage node field')
+
+
+def load_keywords(path):
+    """
+    Membaca daftar kata kunci dari file JSON.
+
+    Format yang diterima: list frasa (prioritas sama), objek {"frasa": prioritas},
+    atau {"keywords": [{"phrase": "...", "priority": N}, ...]}.
+    """
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict) and 'keywords' in data:
+        data = {item['phrase']: item.get('priority', 1) for item in data['keywords']}
+    return data
+
+
+class KeywordMatcher:
+    """
+    Pencocok banyak kata kunci sekaligus (Aho-Corasick), dibangun sekali dari daftar kata kunci.
+
+    Setiap string dipindai satu kali berapa pun jumlah kata kuncinya, jadi daftar
+    bisa tumbuh ke ratusan frasa dialog tanpa memperlambat pemindaian.
+    """
+
+    def __init__(self, keywords, min_quality=QUALITY_SUBSTRING):
+        if isinstance(keywords, dict):
+            entries = list(keywords.items())
+        else:
+            entries = [(keyword, 1) for keyword in keywords]
+        self.keywords = []
+        self.priorities = []
+        self.min_quality = min_quality
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for phrase, priority in entries:
+            phrase = phrase.strip().lower()
+            if phrase and phrase not in self.keywords:
+                self._insert(phrase, len(self.keywords))
+                self.keywords.append(phrase)
+                self.priorities.append(priority)
+        self._build_fail_links()
+
+    @classmethod
+    def from_config(cls, path, fallback):
+        """Memakai file kata kunci jika ada, jika tidak memakai daftar `fallback`."""
+        if path and os.path.exists(path):
+            return cls(load_keywords(path))
+        return cls(fallback)
+
+    def _insert(self, phrase, keyword_id):
+        state = 0
+        for ch in phrase:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append(keyword_id)
+
+    def _build_fail_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def scan(self, text):
+        """Semua kecocokan di `text` (sudah lowercase) sebagai list (keyword_id, start, end)."""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        hits = []
+        for pos, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for keyword_id in out[state]:
+                hits.append((keyword_id, pos + 1 - len(self.keywords[keyword_id]), pos + 1))
+        return hits
+
+    def scan_snapshot(self, snapshot):
+        """
+        Memindai teks dan content-desc setiap node UiSnapshot yang punya bounds.
+
+        Mengembalikan semua KeywordHit, diurutkan dari yang terbaik: prioritas kata kunci,
+        kualitas kecocokan (teks utuh > kata utuh > potongan kata), porsi teks yang tertutup
+        kata kunci, lalu posisi di layar (lebih bawah, lalu lebih kanan — letak tombol aksi dialog).
+        """
+        best = {}
+        for field, column in (('text', snapshot.text), ('content-desc', snapshot.desc)):
+            for node, value in enumerate(column):
+                if not value or not snapshot.flags[node] & FLAG_HAS_BOUNDS:
+                    continue
+                stripped = value.strip()
+                offset = len(value) - len(value.lstrip())
+                for keyword_id, start, end in self.scan(value):
+                    quality = _quality(stripped, start - offset, end - offset)
+                    if quality < self.min_quality:
+                        continue
+                    hit = KeywordHit(
+                        self.keywords[keyword_id], self.priorities[keyword_id], quality,
+                        (end - start) / len(stripped), node, field
+                    )
+                    current = best.get(node)
+                    if current is None or _rank(hit, snapshot) < _rank(current, snapshot):
+                        best[node] = hit
+        return sorted(best.values(), key=lambda hit: _rank(hit, snapshot))
+
+
+def _quality(text, start, end):
+    if start == 0 and end == len(text):
+        return QUALITY_EXACT
+    before = text[start - 1] if start > 0 else ' '
+    after = text[end] if end < len(text) else ' '
+    if not before.isalnum() and not after.isalnum():
+        return QUALITY_WORD
+    return QUALITY_SUBSTRING
+
+
+def _rank(hit, snapshot):
+    return (-hit.priority, -hit.quality, -hit.coverage, -snapshot.cy[hit.node], -snapshot.cx[hit.node])
@@ -0,0 +1,208 @@
+import bisect
+import threading
+import time
+
+# --- PENTING: CONFIGURATION ---
+# Batas bucket histogram (detik): dari tap ADB (milidetik) sampai riset Gemini / git push (menit).
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+# Batas bucket ukuran payload (byte).
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+METRIC_PREFIX = "termux_bot_"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Timer:
+    """Context manager `with HISTOGRAM.time(label...)`: mencatat durasi blok saat keluar."""
+
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+        return False
+
+
+class Counter:
+    """Penghitung yang hanya naik, per kombinasi label."""
+
+    type = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            yield self.name, _labels(self.labelnames, labels), value
+
+
+class Histogram:
+    """
+    Histogram Prometheus per kombinasi label.
+
+    observe() hanya satu bisect dan tiga penjumlahan di bawah lock (sekitar satu mikrodetik),
+    jadi aman dibiarkan aktif di jalur produksi. Bucket kumulatif dihitung saat /metrics dibaca.
+    """
+
+    type = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, *labels):
+        return _Timer(self, labels)
+
+    def samples(self):
+        with self._lock:
+            series = {labels: (list(counts), total, count) for labels, (counts, total, count) in self._series.items()}
+        for labels, (counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket
+                yield f"{self.name}_bucket", _labels(self.labelnames, labels, (("le", _number(bound)),)), cumulative
+            yield f"{self.name}_sum", _labels(self.labelnames, labels), total
+            yield f"{self.name}_count", _labels(self.labelnames, labels), count
+
+
+class Callback:
+    """
+    Nilai yang dibaca saat /metrics diminta (panjang antrean, statistik cache), tanpa biaya di jalur utama.
+
+    `func()` mengembalikan angka, atau dict {tuple label: angka} jika `labelnames` diisi.
+    """
+
+    def __init__(self, name, help, func, labelnames=(), type="gauge"):
+        self.name = name
+        self.help = help
+        self.func = func
+        self.labelnames = tuple(labelnames)
+        self.type = type
+
+    def samples(self):
+        try:
+            value = self.func()
+        except Exception as e:
+            # logging hanya diimpor di sini: adb_client/ui_dump (perintah CLI cepat) memuat modul ini
+            import logging
+            logging.warning("Metrik %s gagal dibaca: %s", self.name, e)
+            return
+        if not self.labelnames:
+            yield self.name, "", value
+            return
+        for labels, item in sorted(value.items()):
+            yield self.name, _labels(self.labelnames, labels), item
+
+
+class Registry:
+    """Kumpulan metrik satu proses; render() menghasilkan format teks Prometheus untuk /metrics."""
+
+    def __init__(self, prefix=METRIC_PREFIX):
+        self.prefix = prefix
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _add(self, metric):
+        with self._lock:
+            # Modul yang dimuat ulang (reloader debug) memakai metrik yang sudah ada
+            existing = self._metrics.get(metric.name)
+            if existing is not None and type(existing) is type(metric) and not isinstance(metric, Callback):
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._add(Counter(self.prefix + name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(self.prefix + name, help, labelnames, buckets))
+
+    def callback(self, name, help, func, labelnames=(), type="gauge"):
+        return self._add(Callback(self.prefix + name, help, func, labelnames, type))
+
+    def render(self):
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(f"{name}{labels} {_number(value)}" for name, labels, value in metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# --- METRIK BERSAMA ---
+# Didefinisikan di satu tempat agar nama & label konsisten; modul lain hanya memanggil observe()/inc().
+GEMINI_REQUEST_SECONDS = REGISTRY.histogram(
+    "gemini_request_seconds", "Durasi permintaan HTTP ke Gemini.", ("method", "status"))
+GEMINI_PAYLOAD_BYTES = REGISTRY.histogram(
+    "gemini_payload_bytes", "Ukuran body permintaan/respons Gemini.", ("method", "direction"), SIZE_BUCKETS)
+GEMINI_REPLY_SECONDS = REGISTRY.histogram(
+    "gemini_reply_seconds", "Durasi generate_gemini_content (termasuk cache).", ("prompt_class", "source", "outcome"))
+SHELL_JOB_SECONDS = REGISTRY.histogram(
+    "shell_job_seconds", "Durasi perintah `!` (setelah keluar antrean).", ("mode", "status"))
+SHELL_JOB_WAIT_SECONDS = REGISTRY.histogram(
+    "shell_job_wait_seconds", "Lama job shell menunggu slot/worker sebelum berjalan.", ("mode",))
+TASK_STAGE_SECONDS = REGISTRY.histogram(
+    "task_stage_seconds", "Durasi tiap tahap tugas latar (research, write, add, commit, push).",
+    ("kind", "stage", "status"))
+GIT_COMMAND_SECONDS = REGISTRY.histogram(
+    "git_command_seconds", "Durasi perintah git dari GitSync.", ("command", "status"))
+ADB_COMMAND_SECONDS = REGISTRY.histogram(
+    "adb_command_seconds", "Durasi perintah ADB per verb.", ("verb", "status"))
+UI_SECONDS = REGISTRY.histogram(
+    "ui_seconds", "Durasi dump, parse dan pencarian hierarki UI.", ("phase",))
+
+
+def status_label(exc):
+    """Label status singkat dari exception: nama kelasnya dalam huruf kecil, mis. 'timeoutexpired'."""
+    return type(exc).__name__.lower()
@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+import adb_client
+
+# --- PENTING: CONFIGURATION ---
+# Peta navigasi disimpan satu file JSON per model perangkat.
+NAV_MAP_DIR = os.environ.get("NAV_MAP_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "nav_maps"))
+
+
+def device_model(serial=None):
+    """Model perangkat (getprop ro.product.model), aman dipakai sebagai nama file."""
+    try:
+        exit_code, output = adb_client.shell("getprop ro.product.model", serial=serial)
+    except Exception:
+        exit_code, output = 1, ""
+    model = output.strip() if exit_code == 0 else ""
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', model) or "unknown"
+
+
+def layout_fingerprint(snapshot):
+    """
+    Fingerprint tata letak layar: himpunan (class, resource-id) semua node.
+
+    Tidak memakai teks atau bounds, jadi jam, notifikasi, atau posisi gulir tidak mengubahnya.
+    """
+    layout = sorted(set(zip(snapshot.cls, snapshot.resource_id)))
+    return hashlib.blake2b(repr(layout).encode('utf-8'), digest_size=6).hexdigest()
+
+
+def screen_key(focus, snapshot):
+    """Kunci layar: activity yang fokus + fingerprint tata letak."""
+    return f"{focus or '?'}#{layout_fingerprint(snapshot)}"
+
+
+class NavigationMap:
+    """
+    Peta navigasi yang dipelajari: layar apa, target apa yang diketuk di mana, dan layar berikutnya.
+
+    Struktur file:
+      screens : {kunci_layar: {"focus": ...}}
+      edges   : {kunci_layar: {target: {"x", "y", "scrolls", "to", "focus", "hits", "updated"}}}
+      intents : {argumen am start: {"screen": kunci_layar, "focus": ...}}
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.data = {"screens": {}, "edges": {}, "intents": {}}
+        if os.path.exists(path):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    self.data.update(json.load(f))
+            except (OSError, ValueError) as e:
+                print(f"[{time.strftime('%H:%M:%S')}] Peringatan: peta navigasi {path} rusak, mulai dari kosong. {e}")
+
+    @classmethod
+    def for_device(cls, serial=None):
+        return cls(os.path.join(NAV_MAP_DIR, f"{device_model(serial)}.json"))
+
+    def save(self):
+        """Menulis peta secara atomik (file sementara lalu os.replace)."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with self._lock:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.data, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+    # --- Layar & langkah ---
+    def screen_focus(self, key):
+        return self.data["screens"].get(key, {}).get("focus")
+
+    def record_screen(self, key, focus):
+        with self._lock:
+            self.data["screens"][key] = {"focus": focus}
+
+    def edge(self, from_key, target):
+        return self.data["edges"].get(from_key, {}).get(target)
+
+    def record_edge(self, from_key, target, coords, scrolls, to_key, to_focus):
+        self.record_screen(to_key, to_focus)
+        with self._lock:
+            edges = self.data["edges"].setdefault(from_key, {})
+            previous = edges.get(target, {})
+            edges[target] = {
+                "x": coords[0], "y": coords[1], "scrolls": scrolls,
+                "to": to_key, "focus": to_focus,
+                "hits": previous.get("hits", 0) if previous.get("to") == to_key else 0,
+                "updated": time.strftime('%Y-%m-%dT%H:%M:%S'),
+            }
+
+    def confirm_edge(self, from_key, target):
+        """Menambah hitungan replay sukses untuk sebuah langkah."""
+        with self._lock:
+            edge = self.data["edges"].get(from_key, {}).get(target)
+            if edge:
+                edge["hits"] = edge.get("hits", 0) + 1
+
+    def forget_edge(self, from_key, target):
+        with self._lock:
+            self.data["edges"].get(from_key, {}).pop(target, None)
+
+    # --- Intent ---
+    def intent_landing(self, intent):
+        return self.data["intents"].get(intent)
+
+    def record_intent(self, intent, key, focus):
+        self.record_screen(key, focus)
+        with self._lock:
+            self.data["intents"][intent] = {"screen": key, "focus": focus}
+
+    def forget_intent(self, intent):
+        with self._lock:
+            self.data["intents"].pop(intent, None)
@@ -0,0 +1,157 @@
+import argparse
+import asyncio
+import importlib
+import importlib.machinery
+import importlib.util
+import os
+import sys
+import time
+from collections import namedtuple
+
+import adb_client
+from waits import wait_report
+
+# --- PENTING: CONFIGURATION ---
+# Inventaris perangkat: satu serial per baris (IP:port atau serial USB), nama opsional setelah spasi,
+# baris kosong dan komentar '#' diabaikan.
+INVENTORY_FILE = os.environ.get("DEVICE_INVENTORY", "devices.txt")
+# Jumlah perangkat yang dikerjakan bersamaan.
+MAX_CONCURRENT_DEVICES = int(os.environ.get("MAX_CONCURRENT_DEVICES", "4"))
+# Batas waktu satu tugas di satu perangkat (detik).
+DEVICE_TASK_TIMEOUT = 300
+
+# Nama tugas -> (modul, fungsi). Modul diimpor saat tugas pertama kali dipakai.
+TASKS = {
+    "wireless": ("Bootstrap", "bootstrap_wireless_debugging"),
+    "shizuku": ("adb_bootstrapper", "bootstrap_shizuku"),
+    "defensive": ("defensive_logic", "defensive_check_analysis"),
+    "accessibility": ("automate_accessibility_enabler", "enable_automate_accessibility"),
+}
+# Laporan tugas yang mengandung salah satu penanda ini dihitung gagal.
+FAILURE_MARKERS = ("GAGAL", "ERROR")
+
+Device = namedtuple('Device', 'serial name')
+DeviceResult = namedtuple('DeviceResult', 'device task ok report seconds')
+
+
+def load_inventory(path):
+    """Membaca file inventaris menjadi list Device."""
+    devices = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            parts = line.split(None, 1)
+            devices.append(Device(parts[0], parts[1] if len(parts) > 1 else parts[0]))
+    return devices
+
+
+def resolve_task(task):
+    """Fungsi Python untuk nama tugas di TASKS."""
+    if task not in TASKS:
+        raise ValueError(f"Tugas tidak dikenal: '{task}'. Pilihan: {', '.join(TASKS)}")
+    module_name, function_name = TASKS[task]
+    if module_name in sys.modules:
+        module = sys.modules[module_name]
+    elif module_name == "Bootstrap":
+        # Skrip Bootstrap tidak berekstensi .py, jadi dimuat langsung dari path-nya
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), module_name)
+        loader = importlib.machinery.SourceFileLoader(module_name, path)
+        spec = importlib.util.spec_from_loader(module_name, loader)
+        module = importlib.util.module_from_spec(spec)
+        loader.exec_module(module)
+        sys.modules[module_name] = module
+    else:
+        module = importlib.import_module(module_name)
+    return getattr(module, function_name)
+
+
+def run_on_device(device, task):
+    """Menjalankan satu tugas di satu perangkat (blocking). Dipanggil di thread terpisah."""
+    start = time.monotonic()
+    function = resolve_task(task)
+    with adb_client.use_device(device.serial):
+        try:
+            if ':' in device.serial:
+                # Perangkat nirkabel: pastikan terhubung (tidak berbahaya jika sudah terhubung)
+                adb_client.run_adb_command(['adb', 'connect', device.serial], timeout=10)
+            report = function()
+            ok = not any(marker in str(report) for marker in FAILURE_MARKERS)
+        except SystemExit as e:
+            # enable_automate_accessibility memanggil sys.exit saat ADB gagal
+            report, ok = f"ERROR: Tugas berhenti (exit code {e.code}).", False
+        except Exception as e:
+            report, ok = f"ERROR: {e}", False
+    return DeviceResult(device, task, ok, report, time.monotonic() - start)
+
+
+async def run_fleet(devices, task, limit=MAX_CONCURRENT_DEVICES, timeout=DEVICE_TASK_TIMEOUT):
+    """
+    Menjalankan `task` di semua perangkat, paling banyak `limit` sekaligus.
+
+    Setiap perangkat memakai thread sendiri dengan serial-nya di konteks ADB, jadi total waktu
+    mendekati perangkat paling lambat, bukan jumlah waktu semua perangkat.
+    Mengembalikan list DeviceResult sesuai urutan inventaris.
+    """
+    resolve_task(task)  # Impor modul sekali di thread utama, sebelum thread perangkat berjalan
+    semaphore = asyncio.Semaphore(limit)
+
+    async def worker(device):
+        async with semaphore:
+            print(f"[{time.strftime('%H:%M:%S')}] [{device.name}] Mulai '{task}'.")
+            start = time.monotonic()
+            try:
+                result = await asyncio.wait_for(asyncio.to_thread(run_on_device, device, task), timeout)
+            except asyncio.TimeoutError:
+                # Thread tidak bisa dibatalkan; hasilnya diabaikan dan sesi ADB-nya ditutup
+                adb_client.get_session(device.serial).close(kill=True)
+                result = DeviceResult(device, task, False, f"ERROR: Timeout setelah {timeout} detik.",
+                                      time.monotonic() - start)
+            status = "OK" if result.ok else "GAGAL"
+            print(f"[{time.strftime('%H:%M:%S')}] [{device.name}] Selesai '{task}': {status} ({result.seconds:.2f} detik)")
+            return result
+
+    return await asyncio.gather(*(worker(device) for device in devices))
+
+
+def summary_report(results, wall_seconds):
+    """Laporan ringkas per perangkat plus total waktu."""
+    lines = [f"{'Perangkat':24} {'Tugas':14} {'Status':6} {'Detik':>7}  Laporan"]
+    for result in results:
+        status = "OK" if result.ok else "GAGAL"
+        report = str(result.report).replace('\n', ' ')
+        lines.append(f"{result.device.name[:24]:24} {result.task:14} {status:6} {result.seconds:>7.2f}  {report[:80]}")
+    total = sum(result.seconds for result in results)
+    succeeded = sum(1 for result in results if result.ok)
+    lines.append("")
+    lines.append(f"Berhasil: {succeeded}/{len(results)} perangkat")
+    lines.append(f"Waktu total: {wall_seconds:.2f} detik (jumlah waktu per perangkat: {total:.2f} detik)")
+    return "\n".join(lines)
+
+
+# --- DEMO ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Menjalankan tugas otomasi di banyak perangkat sekaligus.")
+    parser.add_argument("task", choices=sorted(TASKS))
+    parser.add_argument("--inventory", default=INVENTORY_FILE, help="file inventaris perangkat")
+    parser.add_argument("--devices", help="daftar serial dipisah koma (mengganti file inventaris)")
+    parser.add_argument("--limit", type=int, default=MAX_CONCURRENT_DEVICES, help="jumlah perangkat bersamaan")
+    args = parser.parse_args()
+
+    if args.devices:
+        fleet = [Device(serial, serial) for serial in args.devices.split(',') if serial]
+    elif os.path.exists(args.inventory):
+        fleet = load_inventory(args.inventory)
+    else:
+        sys.exit(f"ERROR: File inventaris {args.inventory} tidak ditemukan. Gunakan --devices atau DEVICE_INVENTORY.")
+
+    started = time.monotonic()
+    try:
+        fleet_results = asyncio.run(run_fleet(fleet, args.task, limit=max(1, args.limit)))
+    finally:
+        adb_client.close_all()
+    print("\n--- LAPORAN ORCHESTRATOR ---")
+    print(summary_report(fleet_results, time.monotonic() - started))
+    print("\n--- WAKTU TUNGGU (PER PERANGKAT) ---")
+    print(wait_report())
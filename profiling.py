@@ -0,0 +1,332 @@
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+# --- PENTING: CONFIGURATION ---
+# Folder hasil profil (.collapsed untuk flame graph, .prof untuk pstats/snakeviz, .json ringkasan).
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+# Token admin untuk header X-Profile-Token / ?profile_token=. Kosong = hanya dari localhost.
+PROFILE_TOKEN = os.environ.get("PROFILE_TOKEN", "")
+# Fraksi permintaan ke PROFILE_SAMPLE_PATHS yang diprofil otomatis (0 = mati, 0.01 = 1%).
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_SAMPLE_PATHS = ("/process_input", "/stream_input")
+# Jeda antar sampel stack (detik) untuk mode "sample".
+PROFILE_SAMPLE_INTERVAL = 0.005
+# Jumlah baris alokasi tracemalloc teratas yang disimpan per profil (0 = tracemalloc mati).
+PROFILE_TRACEMALLOC_TOP = 15
+PROFILE_TRACEMALLOC_FRAMES = 1
+# Jumlah profil yang disimpan di folder; yang lebih lama dihapus.
+PROFILE_KEEP = 50
+# Mode cprofile: stack collapsed dibangun dari graf pemanggil pstats. Cabang di bawah sekian
+# mikrodetik dan stack lebih dalam dari batas ini tidak ditulis (graf bisa bercabang sangat banyak).
+PROFILE_COLLAPSED_MIN_US = 1
+PROFILE_COLLAPSED_MAX_DEPTH = 128
+
+MODES = ("sample", "cprofile")
+LOOPBACK = ("127.0.0.1", "::1")
+
+_UNSAFE = re.compile(r'[^A-Za-z0-9_.-]+')
+
+
+def frame_label(code):
+    """Nama frame untuk collapsed stack: 'fungsi (file.py:baris)'."""
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def stats_label(func):
+    """Nama fungsi pstats (file, baris, nama) dalam format frame_label; builtin hanya namanya."""
+    filename, line, name = func
+    label = name if filename == '~' else f"{name} ({os.path.basename(filename)}:{line})"
+    return label.replace(';', ',')
+
+
+def cprofile_collapsed(stats, min_us=PROFILE_COLLAPSED_MIN_US, max_depth=PROFILE_COLLAPSED_MAX_DEPTH):
+    """
+    Stack collapsed (mikrodetik per stack) dari `pstats.Stats.stats`, seperti flameprof.
+
+    cProfile hanya menyimpan pasangan pemanggil -> fungsi, bukan stack lengkap. Stack disusun ulang
+    dengan berjalan dari akar (fungsi tanpa pemanggil) lewat sisi pemanggilnya; waktu kumulatif tiap
+    sisi diskalakan dengan porsi waktu induk di jalur itu, jadi total tiap akar tetap sama dengan
+    waktu kumulatifnya. Pemanggilan rekursif tidak diikuti ulang.
+    """
+    callees = {}
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            if caller != func:
+                callees.setdefault(caller, []).append((func, edge[3]))
+    weights = Counter()
+
+    def walk(func, stack, seconds):
+        _, _, own, cumulative, _ = stats[func]
+        ratio = seconds / cumulative if cumulative else 0.0
+        stack = stack + [func]
+        path = ";".join(stats_label(f) for f in stack)
+        weights[path] += own * ratio * 1e6
+        if len(stack) >= max_depth:
+            return
+        for callee, edge_seconds in callees.get(func, ()):
+            share = edge_seconds * ratio
+            if callee not in stack and share * 1e6 >= min_us:
+                walk(callee, stack, share)
+
+    for func, (_, _, _, cumulative, callers) in stats.items():
+        if not any(caller != func for caller in callers):
+            walk(func, [], cumulative)
+    return "".join(f"{stack} {round(us)}\n" for stack, us in weights.most_common() if round(us) > 0)
+
+
+class StackSampler:
+    """
+    Profiler sampling: thread terpisah membaca stack satu thread target setiap `interval` detik.
+
+    Hasilnya hitungan per stack lengkap (akar;...;daun), langsung dalam format collapsed
+    yang dibaca flamegraph.pl / speedscope / inferno.
+    """
+
+    def __init__(self, thread_id, interval=PROFILE_SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, daemon=True, name="profile-sampler")
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(frame_label(frame.f_code))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class Capture:
+    """Satu permintaan yang sedang diprofil; stop() menulis hasilnya ke folder Profiler."""
+
+    def __init__(self, profiler, profile_id, mode, method, path, reason):
+        self.profiler = profiler
+        self.id = profile_id
+        self.mode = mode
+        self.method = method
+        self.path = path
+        self.reason = reason
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self._stopped = False
+        self._tracemalloc = False
+        self._cprofile = None
+        self._sampler = None
+
+    def start(self):
+        if self.profiler.tracemalloc_top and not tracemalloc.is_tracing():
+            tracemalloc.start(PROFILE_TRACEMALLOC_FRAMES)
+            self._tracemalloc = True
+        if self.mode == "cprofile":
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        else:
+            self._sampler = StackSampler(threading.get_ident(), self.profiler.interval)
+            self._sampler.start()
+
+    def stop(self, status=None):
+        """Menghentikan profil (sekali saja) dan menyimpan hasilnya; mengembalikan ringkasan."""
+        if self._stopped:
+            return None
+        self._stopped = True
+        duration = time.perf_counter() - self._start
+        try:
+            if self._cprofile is not None:
+                self._cprofile.disable()
+            if self._sampler is not None:
+                self._sampler.stop()
+            allocations, peak = self._allocations()
+            return self.profiler.save(self, status, duration, allocations, peak)
+        except Exception as e:
+            logging.error("Profil %s gagal disimpan: %s", self.id, e)
+            return None
+        finally:
+            self.profiler.release()
+
+    def _allocations(self):
+        if not self._tracemalloc:
+            return [], None
+        try:
+            # tracemalloc baru dimulai di awal permintaan, jadi isinya alokasi yang masih hidup sejak itu
+            snapshot = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        # Alokasi profiler sendiri (sampler, tracemalloc) bukan milik permintaan
+        snapshot = snapshot.filter_traces((tracemalloc.Filter(False, __file__),
+                                           tracemalloc.Filter(False, tracemalloc.__file__)))
+        top = snapshot.statistics('lineno')[:self.profiler.tracemalloc_top]
+        return [{"where": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}", "size": stat.size,
+                 "count": stat.count} for stat in top], peak
+
+
+class Profiler:
+    """
+    Profil per permintaan, dinyalakan dengan header X-Profile / ?profile= atau sampling acak.
+
+    Hanya satu permintaan diprofil pada satu waktu (tracemalloc berlaku untuk seluruh proses);
+    permintaan yang meminta profil saat profiler sibuk tetap dilayani tanpa profil.
+    Permintaan yang tidak meminta profil hanya membayar satu pengecekan header.
+    """
+
+    def __init__(self, directory=PROFILE_DIR, token=PROFILE_TOKEN, sample_rate=PROFILE_SAMPLE_RATE,
+                 sample_paths=PROFILE_SAMPLE_PATHS, interval=PROFILE_SAMPLE_INTERVAL,
+                 tracemalloc_top=PROFILE_TRACEMALLOC_TOP, keep=PROFILE_KEEP):
+        self.directory = directory
+        self.token = token
+        self.sample_rate = sample_rate
+        self.sample_paths = sample_paths
+        self.interval = interval
+        self.tracemalloc_top = tracemalloc_top
+        self.keep = keep
+        self._busy = threading.Lock()
+        self._seq = 0
+        self.busy_skips = 0
+
+    # --- Izin & pemicu ---
+    def allowed(self, request):
+        """Token admin cocok, atau (tanpa PROFILE_TOKEN) permintaan dari localhost."""
+        if self.token:
+            supplied = request.headers.get("X-Profile-Token") or request.args.get("profile_token")
+            return supplied == self.token
+        return request.remote_addr in LOOPBACK
+
+    def requested(self, request):
+        """(mode, alasan) jika permintaan ini perlu diprofil, atau None."""
+        value = request.headers.get("X-Profile") or request.args.get("profile")
+        if value:
+            if not self.allowed(request):
+                return None
+            return (value if value in MODES else "sample"), "request"
+        if self.sample_rate and request.path in self.sample_paths and random.random() < self.sample_rate:
+            return "sample", "sampled"
+        return None
+
+    def begin(self, request):
+        """Memulai Capture untuk permintaan ini jika diminta dan profiler bebas; selain itu None."""
+        wanted = self.requested(request)
+        if wanted is None:
+            return None
+        if not self._busy.acquire(blocking=False):
+            self.busy_skips += 1
+            return None
+        self._seq += 1
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self._seq:04d}"
+        capture = Capture(self, profile_id, wanted[0], request.method, request.path, wanted[1])
+        try:
+            capture.start()
+        except Exception:
+            self.release()
+            raise
+        return capture
+
+    def release(self):
+        self._busy.release()
+
+    # --- Simpan & daftar ---
+    def _file(self, name):
+        return os.path.join(self.directory, name)
+
+    def save(self, capture, status, duration, allocations, peak):
+        os.makedirs(self.directory, exist_ok=True)
+        base = f"{capture.id}-{_UNSAFE.sub('_', capture.path.strip('/')) or 'index'}"
+        files = {}
+        if capture._sampler is not None:
+            files["collapsed"] = f"{base}.collapsed"
+            with open(self._file(files["collapsed"]), 'w') as f:
+                f.write(capture._sampler.collapsed())
+        if capture._cprofile is not None:
+            stats = pstats.Stats(capture._cprofile)
+            # Satuan collapsed mode cprofile: mikrodetik (mode sample: jumlah sampel)
+            files["collapsed"] = f"{base}.collapsed"
+            with open(self._file(files["collapsed"]), 'w') as f:
+                f.write(cprofile_collapsed(stats.stats))
+            files["prof"] = f"{base}.prof"
+            capture._cprofile.dump_stats(self._file(files["prof"]))
+            files["top"] = f"{base}.txt"
+            text = io.StringIO()
+            pstats.Stats(capture._cprofile, stream=text).sort_stats("cumulative").print_stats(30)
+            with open(self._file(files["top"]), 'w') as f:
+                f.write(text.getvalue())
+        summary = {
+            "id": capture.id,
+            "mode": capture.mode,
+            "reason": capture.reason,
+            "method": capture.method,
+            "path": capture.path,
+            "status": status,
+            "started": round(capture.started, 3),
+            "duration_ms": round(duration * 1000, 1),
+            "samples": capture._sampler.samples if capture._sampler is not None else None,
+            "peak_bytes": peak,
+            "allocations": allocations,
+            "files": files,
+        }
+        with open(self._file(f"{base}.json"), 'w') as f:
+            json.dump(summary, f, indent=1)
+        logging.info("Profil %s disimpan: %s %s %.1f ms", capture.id, capture.method, capture.path,
+                     summary["duration_ms"])
+        self._prune()
+        return summary
+
+    def _summaries(self):
+        try:
+            names = sorted((name for name in os.listdir(self.directory) if name.endswith(".json")), reverse=True)
+        except FileNotFoundError:
+            return []
+        summaries = []
+        for name in names:
+            try:
+                with open(self._file(name)) as f:
+                    summaries.append((name, json.load(f)))
+            except (OSError, ValueError):
+                continue
+        return summaries
+
+    def _prune(self):
+        for name, summary in self._summaries()[self.keep:]:
+            for extra in [name, *summary.get("files", {}).values()]:
+                try:
+                    os.remove(self._file(extra))
+                except FileNotFoundError:
+                    pass
+
+    def list(self, limit=None):
+        """Ringkasan profil tersimpan, terbaru lebih dulu."""
+        summaries = [summary for _, summary in self._summaries()]
+        return summaries[:limit] if limit else summaries
+
+    def path(self, name):
+        """Path file profil `name` di folder profil, atau None jika tidak ada / nama tidak aman."""
+        if os.path.basename(name) != name or name.startswith("."):
+            return None
+        path = self._file(name)
+        return path if os.path.isfile(path) else None
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# --- PENTING: CONFIGURATION ---
+# Masa berlaku (detik) per kelas prompt. 0 = tidak pernah di-cache.
+CACHE_TTLS = {
+    "audit": 30 * 60,   # Riset audit berkala: jawaban 30 menit terakhir masih cukup segar
+    "chat": 10 * 60,    # Chat biasa: kunci sudah memuat history, jadi hanya pertanyaan identik yang kena
+}
+DEFAULT_TTL = 5 * 60
+RESPONSE_CACHE_SIZE = 256
+
+
+def cache_key(model, payload):
+    """
+    Kunci isi (content-addressed): SHA-256 dari model + payload kanonik.
+
+    Payload sudah memuat prompt, instruksi sistem, tools, dan (jika disertakan) jendela history,
+    jadi setiap perbedaan di salah satunya menghasilkan kunci berbeda.
+    """
+    canonical = json.dumps({"model": model, "payload": payload}, sort_keys=True, ensure_ascii=False,
+                           separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def ttl_for(prompt_class):
+    return CACHE_TTLS.get(prompt_class, DEFAULT_TTL)
+
+
+class ResponseCache:
+    """
+    Cache jawaban: LRU di memori, opsional disimpan juga di SQLite agar bertahan setelah restart.
+
+    Nilai adalah objek JSON apa pun (misalnya {"text", "sources"}). Entri kedaluwarsa dibuang saat
+    dibaca. Aman dipakai dari beberapa thread.
+    """
+
+    def __init__(self, maxsize=RESPONSE_CACHE_SIZE, db_path=None):
+        self.maxsize = maxsize
+        self.db_path = db_path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, prompt_class TEXT, "
+                "created_at REAL NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+            self._db.commit()
+
+    def get(self, key):
+        """Nilai yang masih berlaku untuk `key`, atau None."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM responses WHERE key = ? AND expires_at > ?", (key, now)
+                ).fetchone()
+                if row:
+                    value = json.loads(row[0])
+                    self._remember(key, row[1], value)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return value
+            self.misses += 1
+            return None
+
+    def put(self, key, value, ttl, prompt_class=None):
+        """Menyimpan `value` selama `ttl` detik (ttl <= 0 tidak menyimpan apa pun)."""
+        if ttl <= 0:
+            return
+        now = time.time()
+        with self._lock:
+            self._remember(key, now + ttl, value)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, prompt_class, created_at, expires_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), prompt_class, now, now + ttl)
+                )
+                self._db.commit()
+
+    def _remember(self, key, expires_at, value):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+            if self._db is not None:
+                stats["disk_entries"] = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return stats
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,266 @@
+import logging
+import random
+import re
+import threading
+import time
+import traceback
+
+# --- PENTING: CONFIGURATION ---
+# Jeda tunggu setelah kegagalan: BASE, 2x BASE, 4x BASE, ... paling lama MAX (detik).
+SCHEDULE_BACKOFF_BASE = 300
+SCHEDULE_BACKOFF_MAX = 6 * 3600
+
+_INTERVAL = re.compile(r'^(?:every\s+)?(\d+(?:\.\d+)?)\s*([smhd])$')
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+class IntervalSpec:
+    """Jadwal tiap N detik/menit/jam/hari, mis. 'every 30m' atau '2h'."""
+
+    def __init__(self, seconds, text):
+        self.seconds = seconds
+        self.text = text
+
+    def next_after(self, ts):
+        return ts + self.seconds
+
+
+class CronSpec:
+    """
+    Jadwal gaya cron 5 kolom (menit jam tanggal bulan hari-minggu), waktu lokal.
+
+    Tiap kolom menerima `*`, `*/n`, `a`, `a-b`, `a-b/n` dan daftar dipisah koma. Hari minggu 0-6
+    (0 = Minggu, 7 juga Minggu). Seperti cron, jika tanggal dan hari-minggu sama-sama dibatasi,
+    salah satunya cukup cocok.
+    """
+
+    _RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, text):
+        fields = text.split()
+        if len(fields) != 5:
+            raise ValueError(f"Jadwal cron harus 5 kolom: '{text}'")
+        self.text = text
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            self._parse(field, lo, hi) for field, (lo, hi) in zip(fields, self._RANGES)
+        )
+        self.weekdays = {day % 7 for day in weekdays}
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    @staticmethod
+    def _parse(field, lo, hi):
+        values = set()
+        for part in field.split(","):
+            base, _, step = part.partition("/")
+            if base == "*":
+                start, end = lo, hi
+            elif "-" in base:
+                start, end = (int(x) for x in base.split("-", 1))
+            else:
+                start = end = int(base)
+            if not (lo <= start <= hi and lo <= end <= hi and start <= end):
+                raise ValueError(f"Nilai cron di luar rentang {lo}-{hi}: '{part}'")
+            values.update(range(start, end + 1, int(step) if step else 1))
+        return values
+
+    def _day_matches(self, t):
+        day_ok = t.tm_mday in self.days
+        # time.struct_time: Senin = 0; cron: Minggu = 0
+        weekday_ok = (t.tm_wday + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, ts):
+        """Waktu (epoch) kecocokan berikutnya setelah `ts`, dicari paling jauh 8 tahun ke depan (29 Februari)."""
+        t = time.localtime(ts - ts % 60 + 60)
+        year, month, day, hour, minute = t.tm_year, t.tm_mon, t.tm_mday, t.tm_hour, t.tm_min
+        limit = ts + 8 * 366 * 86400
+        while True:
+            candidate = time.mktime((year, month, day, hour, minute, 0, 0, 0, -1))
+            if candidate > limit:
+                raise ValueError(f"Jadwal cron '{self.text}' tidak pernah cocok")
+            t = time.localtime(candidate)
+            # mktime menormalkan tanggal yang melewati akhir bulan
+            year, month, day, hour, minute = t.tm_year, t.tm_mon, t.tm_mday, t.tm_hour, t.tm_min
+            if month not in self.months:
+                year, month, day, hour, minute = year + month // 12, month % 12 + 1, 1, 0, 0
+            elif not self._day_matches(t):
+                day, hour, minute = day + 1, 0, 0
+            elif hour not in self.hours:
+                hour, minute = hour + 1, 0
+            elif minute not in self.minutes:
+                minute += 1
+            else:
+                return candidate
+
+
+def parse_schedule(text):
+    """'every 30m' / '45s' / '2h' -> IntervalSpec; lima kolom -> CronSpec."""
+    text = text.strip()
+    match = _INTERVAL.match(text)
+    if match:
+        seconds = float(match.group(1)) * _UNITS[match.group(2)]
+        if seconds <= 0:
+            raise ValueError(f"Interval harus lebih dari 0: '{text}'")
+        return IntervalSpec(seconds, text)
+    return CronSpec(text)
+
+
+class ScheduledJob:
+    """
+    Satu tugas berulang. `func()` mengembalikan True jika berhasil; False atau exception dihitung gagal
+    dan menunda jadwal berikutnya dengan backoff eksponensial.
+    """
+
+    def __init__(self, name, schedule, func, jitter=0, paused=False,
+                 backoff_base=SCHEDULE_BACKOFF_BASE, backoff_max=SCHEDULE_BACKOFF_MAX):
+        self.name = name
+        self.spec = parse_schedule(schedule)
+        self.func = func
+        self.jitter = jitter
+        self.paused = paused
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.running = False
+        self.failures = 0
+        self.runs = 0
+        self.skipped = 0
+        self.last_start = None
+        self.last_finish = None
+        self.last_status = None
+        self.last_error = ""
+        self.next_run = None
+        self.plan(time.time())
+
+    def plan(self, now):
+        """Menghitung waktu jalan berikutnya: jadwal normal + jitter, tidak lebih awal dari backoff."""
+        next_run = self.spec.next_after(now) + (random.uniform(0, self.jitter) if self.jitter else 0)
+        if self.failures:
+            backoff = min(self.backoff_base * 2 ** (self.failures - 1), self.backoff_max)
+            next_run = max(next_run, now + backoff)
+        self.next_run = next_run
+
+    def summary(self):
+        return {
+            "name": self.name,
+            "schedule": self.spec.text,
+            "jitter": self.jitter,
+            "paused": self.paused,
+            "running": self.running,
+            "next_run": None if self.paused else round(self.next_run, 3),
+            "next_run_in": None if self.paused else round(max(0.0, self.next_run - time.time()), 1),
+            "runs": self.runs,
+            "skipped": self.skipped,
+            "failures": self.failures,
+            "last_start": self.last_start,
+            "last_finish": self.last_finish,
+            "last_status": self.last_status,
+            "last_error": self.last_error,
+        }
+
+
+class Scheduler:
+    """
+    Penjadwal di dalam proses: satu thread menunggu jadwal terdekat, setiap run di thread sendiri.
+
+    Run yang jatuh tempo saat run sebelumnya masih berjalan dilewati (dihitung di `skipped`).
+    """
+
+    def __init__(self):
+        self.jobs = {}
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopped = False
+
+    def add(self, name, schedule, func, **options):
+        job = ScheduledJob(name, schedule, func, **options)
+        with self._cond:
+            self.jobs[name] = job
+            self._cond.notify()
+        return job
+
+    def start(self):
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._loop, daemon=True, name="scheduler")
+            self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+
+    def _loop(self):
+        with self._cond:
+            while not self._stopped:
+                now = time.time()
+                due = [job for job in self.jobs.values() if not job.paused and job.next_run <= now]
+                for job in due:
+                    self._fire(job, now)
+                waiting = [job.next_run for job in self.jobs.values() if not job.paused]
+                self._cond.wait(min(waiting) - time.time() if waiting else None)
+
+    def _fire(self, job, now):
+        """Menjalankan job (dipanggil dengan _cond terkunci) dan menjadwalkan run berikutnya."""
+        job.plan(now)
+        if job.running:
+            job.skipped += 1
+            logging.info("Jadwal %s: run sebelumnya masih berjalan, dilewati.", job.name)
+            return False
+        job.running = True
+        job.last_start = now
+        threading.Thread(target=self._run, args=(job,), daemon=True, name=f"scheduled-{job.name}").start()
+        return True
+
+    def _run(self, job):
+        try:
+            ok = bool(job.func())
+            error = "" if ok else "run melaporkan kegagalan"
+        except Exception as e:
+            logging.error("Jadwal %s gagal: %s", job.name, e)
+            logging.debug(traceback.format_exc())
+            ok, error = False, str(e)
+        with self._cond:
+            job.running = False
+            job.runs += 1
+            job.last_finish = time.time()
+            job.last_status = "done" if ok else "failed"
+            job.last_error = error
+            job.failures = 0 if ok else job.failures + 1
+            # Backoff berlaku mulai dari selesainya run yang gagal
+            job.plan(job.last_finish)
+            self._cond.notify()
+        if not ok:
+            logging.warning("Jadwal %s gagal %d kali berturut-turut; run berikutnya %s.", job.name, job.failures,
+                            time.strftime('%H:%M:%S', time.localtime(job.next_run)))
+
+    # --- Kontrol (untuk API /schedule) ---
+    def get(self, name):
+        return self.jobs.get(name)
+
+    def pause(self, name):
+        with self._cond:
+            self.jobs[name].paused = True
+            self._cond.notify()
+
+    def resume(self, name):
+        with self._cond:
+            job = self.jobs[name]
+            job.paused = False
+            job.plan(time.time())
+            self._cond.notify()
+
+    def trigger(self, name):
+        """Menjalankan job sekarang (walaupun dijeda); False jika run sebelumnya masih berjalan."""
+        with self._cond:
+            job = self.jobs[name]
+            started = self._fire(job, time.time())
+            self._cond.notify()
+            return started
+
+    def list(self):
+        with self._cond:
+            return [job.summary() for job in self.jobs.values()]
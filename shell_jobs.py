@@ -0,0 +1,370 @@
+import codecs
+import contextlib
+import os
+import queue
+import signal
+import subprocess
+import threading
+import time
+from collections import OrderedDict, deque
+
+from metrics import SHELL_JOB_SECONDS, SHELL_JOB_WAIT_SECONDS
+from shell_session import ShellSessionError
+
+# --- PENTING: CONFIGURATION ---
+# Batas waktu default satu perintah `!` (detik); bisa diubah per job.
+SHELL_JOB_TIMEOUT = float(os.environ.get("SHELL_JOB_TIMEOUT", "300"))
+# Jumlah job yang boleh berjalan bersamaan; sisanya menunggu giliran.
+MAX_RUNNING_JOBS = int(os.environ.get("MAX_RUNNING_JOBS", "2"))
+# Output yang disimpan per job: sekian karakter pertama + sekian karakter terakhir, bagian tengah dibuang.
+SHELL_OUTPUT_HEAD = 32 * 1024
+SHELL_OUTPUT_TAIL = 32 * 1024
+# Jumlah job selesai yang tetap bisa dilihat di /jobs.
+SHELL_JOB_HISTORY = 50
+# Potongan output yang boleh menumpuk untuk satu pelanggan SSE yang lambat.
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+# Status job
+QUEUED, RUNNING, DONE, FAILED, KILLED, TIMEOUT = "queued", "running", "done", "failed", "killed", "timeout"
+FINISHED = (DONE, FAILED, KILLED, TIMEOUT)
+
+# Disisipkan ke stream pelanggan yang tertinggal (sebagian potongan live tidak terkirim)
+SKIPPED_MARKER = "\n[... sebagian output dilewati ...]\n"
+
+
+class OutputBuffer:
+    """Menyimpan awal dan akhir output; bagian tengah hanya dihitung panjangnya."""
+
+    def __init__(self, head_limit=SHELL_OUTPUT_HEAD, tail_limit=SHELL_OUTPUT_TAIL):
+        self.head_limit = head_limit
+        self.tail_limit = tail_limit
+        self.head = []
+        self.head_size = 0
+        self.tail = deque()
+        self.tail_size = 0
+        self.dropped = 0
+        self.total = 0
+
+    def write(self, text):
+        self.total += len(text)
+        if self.head_size < self.head_limit:
+            room = self.head_limit - self.head_size
+            self.head.append(text[:room])
+            self.head_size += len(text[:room])
+            text = text[room:]
+        if not text:
+            return
+        self.tail.append(text)
+        self.tail_size += len(text)
+        while self.tail_size - len(self.tail[0]) >= self.tail_limit:
+            removed = self.tail.popleft()
+            self.tail_size -= len(removed)
+            self.dropped += len(removed)
+        if self.tail_size > self.tail_limit:
+            # Potong sebagian potongan tertua agar ekor tepat tail_limit karakter
+            excess = self.tail_size - self.tail_limit
+            self.tail[0] = self.tail[0][excess:]
+            self.tail_size -= excess
+            self.dropped += excess
+
+    @property
+    def truncated(self):
+        return self.dropped > 0
+
+    def text(self):
+        head = "".join(self.head)
+        tail = "".join(self.tail)
+        if self.dropped:
+            return f"{head}\n[... {self.dropped} karakter output dipotong ...]\n{tail}"
+        return head + tail
+
+
+class ShellJob:
+    """
+    Satu perintah shell yang berjalan di latar belakang, dengan output yang bisa diikuti (subscribe).
+
+    Tanpa `worker`, setiap job meluncurkan /bin/bash baru. Dengan `worker` (BashWorker dari
+    bash_pool.py), perintah dijalankan di bash persisten milik sesi chat itu.
+    """
+
+    def __init__(self, job_id, command, timeout=SHELL_JOB_TIMEOUT, worker=None):
+        self.id = job_id
+        self.command = command
+        self.timeout = timeout
+        self.worker = worker
+        self.status = QUEUED
+        self.exit_code = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.output = OutputBuffer()
+        self.proc = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._subscribers = []
+        self._kill_requested = False
+
+    # --- Output & pelanggan ---
+    def _emit(self, text):
+        with self._lock:
+            self.output.write(text)
+            for subscriber in self._subscribers:
+                try:
+                    subscriber.put_nowait(text)
+                except queue.Full:
+                    subscriber.lagged = True
+
+    def subscribe(self):
+        """
+        Mengembalikan (output sejauh ini, antrean potongan berikutnya).
+
+        Antrean menerima None saat job selesai. Pelanggan yang tertinggal terlalu jauh
+        ditandai `lagged` dan sebagian output live-nya dilewati.
+        """
+        with self._lock:
+            snapshot = self.output.text()
+            subscriber = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+            subscriber.lagged = False
+            if self.status in FINISHED:
+                subscriber.put(None)
+            else:
+                self._subscribers.append(subscriber)
+            return snapshot, subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def _finish(self, status, exit_code=None):
+        with self._lock:
+            self.status = status
+            self.exit_code = exit_code
+            self.finished = time.time()
+            subscribers, self._subscribers = self._subscribers, []
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(None)
+            except queue.Full:
+                # Pelanggan macet: buang satu potongan agar penanda selesai tetap masuk
+                subscriber.lagged = True
+                subscriber.get_nowait()
+                subscriber.put_nowait(None)
+        self._done.set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    # --- Eksekusi ---
+    def run(self, slot=None):
+        """
+        Menjalankan perintah (blocking) dan mengalirkan outputnya ke pelanggan.
+
+        `slot` (misalnya semaphore JobManager) diambil tepat sebelum perintah berjalan. Job sesi
+        mengambilnya setelah giliran bash sesinya tiba, jadi job yang antre di belakang perintah
+        panjang sesi yang sama tidak menahan slot milik sesi lain.
+        """
+        slot = slot if slot is not None else contextlib.nullcontext()
+        try:
+            if self.worker is None:
+                with slot:
+                    self._run()
+                return
+            # Job dalam satu sesi bergiliran memakai bash-nya; selama menunggu, status tetap "queued"
+            with self.worker.lock, slot:
+                self.worker.owner = self
+                try:
+                    self._run()
+                finally:
+                    self.worker.owner = None
+        finally:
+            self._record_metrics()
+
+    def _record_metrics(self):
+        if self.started is None or self.finished is None:
+            # Dibatalkan sebelum sempat berjalan
+            return
+        mode = "session" if self.worker is not None else "spawn"
+        SHELL_JOB_WAIT_SECONDS.observe(self.started - self.created, mode)
+        SHELL_JOB_SECONDS.observe(self.finished - self.started, mode, self.status)
+
+    def _run(self):
+        with self._lock:
+            if self.status != QUEUED:
+                # Sudah dibatalkan saat masih antre
+                return
+            self.status = RUNNING
+            self.started = time.time()
+        if self.worker is not None:
+            self._run_in_worker()
+            return
+        try:
+            self.proc = subprocess.Popen(
+                self.command,
+                shell=True,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                executable='/bin/bash',
+                cwd=os.getcwd(),
+                # Grup proses sendiri agar kill/timeout juga menghentikan anak-anaknya
+                start_new_session=True
+            )
+        except OSError as e:
+            self._emit(f"Error umum saat menjalankan perintah: {e}\n")
+            self._finish(FAILED)
+            return
+        if self._kill_requested:
+            self._terminate()
+
+        watchdog = threading.Timer(self.timeout, self._expire) if self.timeout else None
+        if watchdog:
+            watchdog.daemon = True
+            watchdog.start()
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        fd = self.proc.stdout.fileno()
+        try:
+            for chunk in iter(lambda: os.read(fd, 4096), b''):
+                text = decoder.decode(chunk)
+                if text:
+                    self._emit(text)
+            tail = decoder.decode(b'', final=True)
+            if tail:
+                self._emit(tail)
+            exit_code = self.proc.wait()
+        finally:
+            if watchdog:
+                watchdog.cancel()
+            self.proc.stdout.close()
+
+        if self.status == TIMEOUT:
+            self._emit(f"\n[Dihentikan: melewati batas waktu {self.timeout:g} detik]\n")
+            self._finish(TIMEOUT, exit_code)
+        elif self._kill_requested:
+            self._emit("\n[Dihentikan oleh pengguna]\n")
+            self._finish(KILLED, exit_code)
+        else:
+            self._finish(DONE if exit_code == 0 else FAILED, exit_code)
+
+    def _run_in_worker(self):
+        try:
+            exit_code, _ = self.worker.run(self.command, timeout=self.timeout, on_output=self._emit, capture=False)
+        except subprocess.TimeoutExpired:
+            self._emit(f"\n[Dihentikan: melewati batas waktu {self.timeout:g} detik]\n")
+            self._finish(TIMEOUT)
+            return
+        except ShellSessionError as e:
+            if self._kill_requested:
+                self._emit("\n[Dihentikan oleh pengguna]\n")
+                self._finish(KILLED)
+            else:
+                self._emit(f"\n[Bash berhenti: {e}]\n")
+                self._finish(FAILED)
+            return
+        self._finish(DONE if exit_code == 0 else FAILED, exit_code)
+
+    def _expire(self):
+        if self.proc.poll() is not None:
+            return
+        with self._lock:
+            self.status = TIMEOUT
+        self._terminate()
+
+    def kill(self):
+        """Meminta job berhenti (job yang masih antre langsung dibatalkan)."""
+        with self._lock:
+            if self.status in FINISHED:
+                return
+            self._kill_requested = True
+            queued = self.status == QUEUED
+            if queued:
+                self.status = KILLED
+        if queued:
+            self._finish(KILLED)
+        elif self.worker is not None:
+            self.worker.interrupt(owner=self)
+        else:
+            self._terminate()
+
+    def _terminate(self):
+        proc = self.proc
+        if proc is None or proc.poll() is not None:
+            return
+        try:
+            os.killpg(proc.pid, signal.SIGTERM)
+        except (ProcessLookupError, PermissionError):
+            return
+
+        def force_kill():
+            if proc.poll() is None:
+                try:
+                    os.killpg(proc.pid, signal.SIGKILL)
+                except (ProcessLookupError, PermissionError):
+                    pass
+        timer = threading.Timer(2, force_kill)
+        timer.daemon = True
+        timer.start()
+
+    def summary(self, with_output=False):
+        with self._lock:
+            info = {
+                "id": self.id,
+                "command": self.command,
+                "session": self.worker.session_id if self.worker is not None else None,
+                "status": self.status,
+                "exit_code": self.exit_code,
+                "created": self.created,
+                "started": self.started,
+                "finished": self.finished,
+                "duration": round((self.finished or time.time()) - self.started, 3) if self.started else None,
+                "output_chars": self.output.total,
+                "truncated": self.output.truncated,
+            }
+            if with_output:
+                info["output"] = self.output.text()
+        return info
+
+
+class JobManager:
+    """Antrean job shell dengan batas jumlah job yang berjalan bersamaan."""
+
+    def __init__(self, max_running=MAX_RUNNING_JOBS, history=SHELL_JOB_HISTORY):
+        self._slots = threading.BoundedSemaphore(max_running)
+        self.max_running = max_running
+        self.history = history
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._seq = 0
+
+    def submit(self, command, timeout=SHELL_JOB_TIMEOUT, worker=None):
+        """Membuat job baru dan menjalankannya di thread latar belakang begitu ada slot kosong."""
+        with self._lock:
+            self._seq += 1
+            job = ShellJob(f"j{self._seq}", command, timeout, worker)
+            self._jobs[job.id] = job
+            self._prune()
+        threading.Thread(target=self._run, args=(job,), daemon=True, name=f"shell-job-{job.id}").start()
+        return job
+
+    def _run(self, job):
+        job.run(slot=self._slots)
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in FINISHED]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job.summary() for job in reversed(jobs)]
+
+    def counts(self):
+        """Jumlah job per status (untuk metrik kedalaman antrean)."""
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        return {status: statuses.count(status) for status in (QUEUED, RUNNING)}
@@ -0,0 +1,151 @@
+import os
+import queue
+import signal
+import subprocess
+import threading
+import time
+
+# --- SESI SHELL PERSISTEN ---
+# Satu proses shell berumur panjang menerima banyak perintah lewat stdin.
+# Setiap perintah ditutup dengan baris penanda unik yang membawa kode keluar,
+# sehingga output tiap perintah bisa dipisahkan tanpa meluncurkan proses baru.
+
+
+class ShellSessionError(Exception):
+    """Sesi shell putus di tengah perintah (EOF atau pipa rusak)."""
+
+
+class ShellSession:
+    """
+    Menjalankan perintah berurutan di dalam satu proses shell (misalnya `adb shell`).
+
+    Sesi dinyalakan saat perintah pertama dikirim dan dinyalakan ulang sendiri
+    jika prosesnya mati. Aman dipakai dari beberapa thread (perintah diserialkan).
+
+    `process_group=True` menjalankan shell di grup proses sendiri, sehingga mematikan sesi
+    juga mematikan perintah anak yang masih berjalan (misalnya `sleep` di tengah skrip).
+    """
+
+    def __init__(self, argv, name=None, process_group=False):
+        self.argv = list(argv)
+        self.name = name or self.argv[0]
+        self.process_group = process_group
+        self.proc = None
+        self.restarts = 0
+        self._lines = None
+        self._token = os.urandom(16).hex()
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    # --- Siklus hidup proses ---
+    def start(self):
+        """Meluncurkan proses shell baru beserta thread pembaca stdout-nya."""
+        self.proc = subprocess.Popen(
+            self.argv,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            bufsize=0,
+            start_new_session=self.process_group
+        )
+        self._lines = queue.Queue()
+        reader = threading.Thread(target=self._pump, args=(self.proc, self._lines), daemon=True)
+        reader.start()
+
+    @staticmethod
+    def _pump(proc, lines):
+        """Memindahkan stdout proses ke antrean baris; None menandakan EOF."""
+        for line in iter(proc.stdout.readline, b''):
+            lines.put(line)
+        lines.put(None)
+
+    def alive(self):
+        return self.proc is not None and self.proc.poll() is None
+
+    def close(self, kill=False):
+        """Menghentikan proses shell; `kill=True` untuk sesi yang macet."""
+        proc, self.proc = self.proc, None
+        if proc is None:
+            return
+        if not kill:
+            try:
+                proc.stdin.close()
+                proc.wait(timeout=1)
+                return
+            except (OSError, subprocess.TimeoutExpired):
+                pass
+        if self.process_group:
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        else:
+            proc.kill()
+        proc.wait()
+
+    def _restart(self):
+        if self._lines is not None:
+            self.restarts += 1
+        self.close(kill=True)
+        self.start()
+
+    # --- Protokol perintah ---
+    def _send(self, command):
+        self._seq += 1
+        marker = f"__SESSION_END_{self._token}_{self._seq}__"
+        # stdin diarahkan ke /dev/null agar perintah tidak "memakan" perintah berikutnya.
+        # Baris baru sebelum penanda menjamin penanda selalu berada di baris sendiri.
+        script = f"{{ {command}\n}} </dev/null 2>&1; printf '\\n{marker}:%d\\n' $?\n"
+        self.proc.stdin.write(script.encode('utf-8'))
+        self.proc.stdin.flush()
+        return marker.encode('ascii')
+
+    def _collect(self, marker, command, timeout, on_output=None, capture=True):
+        chunks = []
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                line = self._lines.get(timeout=remaining)
+            except queue.Empty:
+                raise subprocess.TimeoutExpired(command, timeout)
+            if line is None:
+                detail = b''.join(chunks).decode('utf-8', errors='replace').strip()
+                raise ShellSessionError(f"Sesi {self.name} terputus saat menjalankan '{command}'. {detail}".strip())
+            if line.startswith(marker):
+                exit_code = int(line[len(marker) + 1:].strip() or 0)
+                break
+            if capture:
+                chunks.append(line)
+            if on_output is not None:
+                on_output(line.decode('utf-8', errors='replace'))
+        output = b''.join(chunks)
+        # Buang baris baru tambahan yang disisipkan sebelum penanda.
+        if output.endswith(b'\n'):
+            output = output[:-1]
+        return exit_code, output.decode('utf-8', errors='replace')
+
+    def run(self, command, timeout=5, on_output=None, capture=True):
+        """
+        Menjalankan satu perintah dan mengembalikan (exit_code, output).
+
+        stderr digabung ke output. Jika perintah melewati timeout, sesi dimatikan (outputnya tidak
+        lagi sinkron) dan dinyalakan ulang pada perintah berikutnya.
+
+        `capture=False` tidak menyimpan output (hanya diteruskan ke `on_output`), untuk perintah
+        yang outputnya bisa sangat besar; output yang dikembalikan kosong.
+        """
+        with self._lock:
+            if not self.alive():
+                self._restart()
+            try:
+                marker = self._send(command)
+            except (BrokenPipeError, OSError):
+                # Perintah belum terkirim, jadi aman untuk dikirim ulang satu kali.
+                self._restart()
+                marker = self._send(command)
+            try:
+                return self._collect(marker, command, timeout, on_output, capture)
+            except (subprocess.TimeoutExpired, ShellSessionError):
+                self.close(kill=True)
+                raise
@@ -0,0 +1,358 @@
+const chatContainer = document.getElementById('chat-container');
+const userInput = document.getElementById('user-input');
+const sendButton = document.getElementById('send-button');
+const statusMessages = document.getElementById('status-messages');
+const utilityModal = document.getElementById('utility-modal');
+// Riwayat dimuat per halaman: halaman terbaru ikut /bootstrap, yang lebih lama dari /history saat digulir ke atas
+// Nilai konfigurasi di bawah ditimpa dari /bootstrap saat halaman dibuka
+let HISTORY_PAGE_SIZE = 20;
+const welcomeMessage = chatContainer.firstElementChild;
+let oldestMessageId = null;
+let hasOlderMessages = true;
+let loadingHistory = false;
+// Output job shell di halaman dibatasi seperti di server: awal + akhir, bagian tengah dibuang
+let SHELL_OUTPUT_HEAD = 32768;
+let SHELL_OUTPUT_TAIL = 32768;
+// Id sesi chat: perintah `!` dari tab/browser ini memakai bash yang sama (cd/export terbawa)
+let sessionId = localStorage.getItem('termuxSessionId');
+if (!sessionId) {
+    sessionId = Date.now().toString(36) + Math.random().toString(36).slice(2, 10);
+    localStorage.setItem('termuxSessionId', sessionId);
+}
+
+function toggleModal() {
+    utilityModal.style.display = utilityModal.style.display === 'flex' ? 'none' : 'flex';
+}
+
+function formatText(text) {
+    return text
+        .replace(/\*\*(.*?)\*\*/g, '<strong>$1</strong>')
+        .replace(/```bash\n(.*?)\n```/gs, '<pre class="bg-gray-900 p-2 rounded mt-1 overflow-x-auto text-green-300"><code>$1</code></pre>')
+        .replace(/```\n(.*?)\n```/gs, '<pre class="bg-gray-900 p-2 rounded mt-1 overflow-x-auto text-green-300"><code>$1</code></pre>')
+        .replace(/`([^`]+)`/g, '<code class="bg-gray-600 p-0.5 rounded text-yellow-300">$1</code>')
+        .replace(/\n/g, '<br>');
+}
+
+function renderModelText(content, text) {
+    content.innerHTML = '<p class="mt-1">' + formatText(text) + '</p>';
+}
+
+function addMessage(role, text, before = null) {
+    const messageDiv = document.createElement('div');
+    messageDiv.className = 'flex ' + (role === 'user' ? 'justify-end' : 'justify-start');
+
+    const bubble = document.createElement('div');
+    const bubbleClass = 'message-bubble p-3 rounded-xl shadow-md transition duration-300 ease-in-out ' + (role === 'user' ? 'user-bubble' : 'gemini-bubble');
+    bubble.className = bubbleClass;
+
+    let content = bubble;
+    if (role === 'model') {
+        const header = document.createElement('p');
+        header.className = 'font-semibold text-blue-300';
+        header.textContent = 'Gemini:';
+        bubble.appendChild(header);
+
+        content = document.createElement('div');
+        renderModelText(content, text);
+        bubble.appendChild(content);
+
+    } else {
+        bubble.textContent = text;
+    }
+
+    messageDiv.appendChild(bubble);
+    if (before !== null) {
+        // Pesan lama disisipkan di atas tanpa menggeser posisi baca
+        chatContainer.insertBefore(messageDiv, before);
+    } else {
+        chatContainer.appendChild(messageDiv);
+        chatContainer.scrollTop = chatContainer.scrollHeight;
+    }
+    // Elemen isi dikembalikan agar jawaban streaming bisa diperbarui di tempat
+    return content;
+}
+
+function addStatus(message) {
+    const p = document.createElement('p');
+    p.className = 'text-xs text-gray-400 border-t border-gray-600 pt-1';
+    p.textContent = '[' + new Date().toLocaleTimeString() + '] ' + message;
+    statusMessages.prepend(p);
+    // Batasi jumlah log
+    while (statusMessages.children.length > 20) {
+        statusMessages.removeChild(statusMessages.lastChild);
+    }
+}
+
+function renderHistoryPage(data) {
+    const firstPage = oldestMessageId === null;
+    const anchor = welcomeMessage.nextSibling;
+    const previousHeight = chatContainer.scrollHeight;
+    data.messages.forEach(item => {
+        if (item.role === 'user' || item.role === 'model') addMessage(item.role, item.text, anchor);
+    });
+    if (data.messages.length) oldestMessageId = data.messages[0].id;
+    hasOlderMessages = data.has_more && data.messages.length > 0;
+    if (firstPage) {
+        chatContainer.scrollTop = chatContainer.scrollHeight;
+    } else {
+        chatContainer.scrollTop += chatContainer.scrollHeight - previousHeight;
+    }
+    // Layar belum penuh (belum bisa digulir): langsung muat halaman berikutnya
+    if (hasOlderMessages && chatContainer.scrollHeight <= chatContainer.clientHeight) {
+        setTimeout(loadOlderMessages, 0);
+    }
+}
+
+async function loadOlderMessages() {
+    if (loadingHistory || !hasOlderMessages) return;
+    loadingHistory = true;
+    try {
+        let url = '/history?limit=' + HISTORY_PAGE_SIZE;
+        if (oldestMessageId !== null) url += '&before=' + oldestMessageId;
+        const response = await fetch(url);
+        if (!response.ok) throw new Error('HTTP error! status: ' + response.status);
+        renderHistoryPage(await response.json());
+    } catch (error) {
+        addStatus('Gagal memuat riwayat: ' + error.message);
+    } finally {
+        loadingHistory = false;
+    }
+}
+
+chatContainer.addEventListener('scroll', () => {
+    if (chatContainer.scrollTop < 80) loadOlderMessages();
+});
+
+async function streamMessage(input) {
+    // EventSource tidak mendukung POST, jadi stream SSE dibaca manual dari fetch
+    const response = await fetch('/stream_input', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ input: input })
+    });
+    if (!response.ok || !response.body) {
+        throw new Error('HTTP error! status: ' + response.status);
+    }
+
+    const content = addMessage('model', '');
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let text = '';
+    let renderPending = false;
+    const scheduleRender = () => {
+        // Paling banyak satu render per frame, walaupun token datang lebih cepat
+        if (renderPending) return;
+        renderPending = true;
+        requestAnimationFrame(() => {
+            renderPending = false;
+            renderModelText(content, text);
+            chatContainer.scrollTop = chatContainer.scrollHeight;
+        });
+    };
+
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const rawEvent = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            let eventName = 'message';
+            let data = '';
+            rawEvent.split('\n').forEach(line => {
+                if (line.startsWith('event:')) eventName = line.slice(6).trim();
+                else if (line.startsWith('data:')) data += line.slice(5).trim();
+            });
+            if (!data) continue;
+            const payload = JSON.parse(data);
+            if (eventName === 'delta') {
+                if (!text) addStatus('Token pertama diterima.');
+                text += payload.text;
+            } else if (eventName === 'done') {
+                // Sumber riset ditambahkan setelah stream selesai
+                text = payload.response + payload.sources;
+                addStatus('Respons diterima.');
+            } else if (eventName === 'error') {
+                text = payload.response;
+                addStatus('Error API Gemini.');
+            }
+            scheduleRender();
+        }
+    }
+}
+
+async function runShellJob(command) {
+    // Job berjalan di latar belakang; tombol kirim langsung aktif lagi selama output mengalir
+    const response = await fetch('/jobs', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ command: command, session: sessionId })
+    });
+    const job = await response.json();
+    if (!response.ok) {
+        throw new Error(job.error || 'HTTP error! status: ' + response.status);
+    }
+
+    const content = addMessage('model', '**Termux Output (job ' + job.id + '):**');
+    const output = document.createElement('pre');
+    output.className = 'bg-gray-900 p-2 rounded mt-1 overflow-x-auto text-green-300 text-xs whitespace-pre-wrap';
+    const killButton = document.createElement('button');
+    killButton.className = 'mt-2 text-xs bg-red-600 hover:bg-red-700 text-white px-2 py-1 rounded';
+    killButton.textContent = 'Hentikan';
+    killButton.onclick = () => fetch('/jobs/' + job.id + '/kill', { method: 'POST' });
+    content.appendChild(output);
+    content.appendChild(killButton);
+    addStatus('Job ' + job.id + ' dimulai (' + job.status + ').');
+
+    let head = '';
+    let tail = '';
+    let dropped = 0;
+    let renderPending = false;
+    const render = () => {
+        // textContent: output shell ditampilkan apa adanya, tidak ditafsirkan sebagai HTML
+        output.textContent = dropped
+            ? head + '\n[... ' + dropped + ' karakter output dipotong ...]\n' + tail
+            : head + tail;
+        chatContainer.scrollTop = chatContainer.scrollHeight;
+    };
+    const scheduleRender = () => {
+        if (renderPending) return;
+        renderPending = true;
+        requestAnimationFrame(() => {
+            renderPending = false;
+            render();
+        });
+    };
+
+    const source = new EventSource('/jobs/' + job.id + '/stream');
+    source.addEventListener('output', event => {
+        let text = JSON.parse(event.data).text;
+        if (head.length < SHELL_OUTPUT_HEAD) {
+            const room = SHELL_OUTPUT_HEAD - head.length;
+            head += text.slice(0, room);
+            text = text.slice(room);
+        }
+        tail += text;
+        if (tail.length > SHELL_OUTPUT_TAIL) {
+            dropped += tail.length - SHELL_OUTPUT_TAIL;
+            tail = tail.slice(-SHELL_OUTPUT_TAIL);
+        }
+        scheduleRender();
+    });
+    source.addEventListener('end', event => {
+        const result = JSON.parse(event.data);
+        source.close();
+        killButton.remove();
+        if (!head && !tail) head = 'Perintah berhasil dieksekusi.';
+        render();
+        addStatus('Job ' + job.id + ' selesai: ' + result.status + ' (exit ' + result.exit_code + ').');
+    });
+    source.onerror = () => {
+        // Tanpa reconnect otomatis: stream baru akan mengirim ulang output dari awal
+        source.close();
+        killButton.remove();
+        addStatus('Koneksi stream job ' + job.id + ' terputus; cek /jobs/' + job.id + '.');
+    };
+}
+
+const STAGE_ICONS = { pending: '○', running: '◔', done: '●', skipped: '–', failed: '✕' };
+
+function renderTask(content, header, task) {
+    const stages = task.stages.map(stage => {
+        const detail = stage.detail && stage.status !== 'done' ? ' (' + stage.detail.split('\n')[0] + ')' : '';
+        return STAGE_ICONS[stage.status] + ' ' + stage.name + detail;
+    }).join('\n');
+    let text = header + '\n\n**Tugas ' + task.id + ': ' + task.status + '**\n```\n' + stages + '\n```';
+    if (task.result) text += '\n\n' + task.result;
+    renderModelText(content, text);
+    chatContainer.scrollTop = chatContainer.scrollHeight;
+}
+
+function followTask(task, content, header) {
+    renderTask(content, header, task);
+    const source = new EventSource('/tasks/' + task.id + '/stream');
+    source.addEventListener('update', event => renderTask(content, header, JSON.parse(event.data)));
+    source.addEventListener('end', event => {
+        const result = JSON.parse(event.data);
+        source.close();
+        renderTask(content, header, result);
+        addStatus('Tugas ' + result.id + ' (' + result.kind + ') selesai: ' + result.status + '.');
+    });
+    source.onerror = () => {
+        source.close();
+        addStatus('Koneksi stream tugas ' + task.id + ' terputus; cek /tasks/' + task.id + '.');
+    };
+}
+
+async function sendMessage() {
+    const input = userInput.value.trim();
+    if (!input) return;
+
+    addMessage('user', input);
+    userInput.value = '';
+    sendButton.disabled = true;
+    sendButton.innerHTML = '<svg class="animate-spin h-6 w-6 text-white" xmlns="http://www.w3.org/2000/svg" fill="none" viewBox="0 0 24 24"><circle class="opacity-25" cx="12" cy="12" r="10" stroke="currentColor" stroke-width="4"></circle><path class="opacity-75" fill="currentColor" d="M4 12a8 8 0 018-8V0C5.373 0 0 5.373 0 12h4zm2 5.291A7.962 7.962 0 014 12H0c0 3.042 1.135 5.824 3 7.938l3-2.647z"></path></svg>';
+    addStatus('Mengirim perintah: "' + input + '"...');
+
+    try {
+        // Chat biasa di-stream token demi token; /git dan /audit tetap lewat /process_input
+        if (!input.startsWith('!') && !input.startsWith('/')) {
+            await streamMessage(input);
+            return;
+        }
+        // Perintah shell menjadi job latar belakang dengan output streaming
+        if (input.startsWith('!')) {
+            await runShellJob(input.slice(1).trim());
+            return;
+        }
+
+        const response = await fetch('/process_input', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ input: input, session: sessionId })
+        });
+
+        if (!response.ok) {
+            throw new Error('HTTP error! status: ' + response.status);
+        }
+
+        const data = await response.json();
+
+        const content = addMessage('model', data.response);
+        addStatus('Respons diterima.');
+        // /audit dan /git berjalan di latar belakang: tahapannya diikuti tanpa menahan input
+        if (data.task) followTask(data.task, content, data.response);
+
+    } catch (error) {
+        console.error('Fetch error:', error);
+        addMessage('model', 'Error Komunikasi: Gagal mendapatkan respons dari server Termux. (' + error.message + ')');
+        addStatus('Error Komunikasi: ' + error.message);
+    } finally {
+        sendButton.disabled = false;
+        sendButton.innerHTML = '<svg xmlns="http://www.w3.org/2000/svg" fill="none" viewBox="0 0 24 24" stroke-width="2" stroke="currentColor" class="w-6 h-6"><path stroke-linecap="round" stroke-linejoin="round" d="M6 12L3.269 3.126A5.996 5.996 0 0115.772 3h.538a6 6 0 011 11.218z" /><path stroke-linecap="round" stroke-linejoin="round" d="M12 18h.01M8.25 21h7.5A2.25 2.25 0 0018 18.75V8.25A2.25 2.25 0 0015.75 6H8.25A2.25 2.25 0 006 8.25v7.5A2.25 2.25 0 008.25 18z" /><path stroke-linecap="round" stroke-linejoin="round" d="M6 12L3.269 3.126A5.996 5.996 0 0115.772 3h.538a6 6 0 011 11.218z" /></svg>';
+    }
+}
+
+async function bootstrap() {
+    // Shell HTML di-cache browser; data yang berubah (host, dir, riwayat terbaru) diambil di sini
+    try {
+        const response = await fetch('/bootstrap');
+        if (!response.ok) throw new Error('HTTP error! status: ' + response.status);
+        const data = await response.json();
+        document.getElementById('host-url').textContent = data.host;
+        document.getElementById('user-id').textContent = data.user;
+        document.getElementById('current-path').textContent = data.cwd;
+        HISTORY_PAGE_SIZE = data.history_page_size;
+        SHELL_OUTPUT_HEAD = data.shell_output_head;
+        SHELL_OUTPUT_TAIL = data.shell_output_tail;
+        renderHistoryPage(data.history);
+        addStatus("Antarmuka dimuat. Siap untuk interaksi.");
+    } catch (error) {
+        addStatus('Gagal memuat data awal: ' + error.message);
+        loadOlderMessages();
+    }
+}
+
+bootstrap();
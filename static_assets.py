@@ -0,0 +1,148 @@
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import threading
+
+from flask import Response
+
+try:
+    import brotli  # opsional: pip install brotli
+except ImportError:
+    brotli = None
+
+# --- PENTING: CONFIGURATION ---
+# Folder aset halaman (index.html, app.css, app.js, font lokal jika ada).
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+# Aset dengan ?v=<hash> yang cocok boleh disimpan browser selama setahun tanpa revalidasi.
+STATIC_MAX_AGE = 365 * 86400
+# File lebih kecil dari ini tidak dikompresi (header-nya lebih mahal dari penghematannya).
+COMPRESS_MIN_BYTES = 512
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+
+SHELL_FILE = "index.html"
+
+
+class Asset:
+    """Satu file statis yang sudah dimuat: isi asli, varian gzip/brotli, dan ETag per varian."""
+
+    def __init__(self, name, body, mtime):
+        self.name = name
+        self.mtime = mtime
+        self.body = body
+        self.version = hashlib.blake2b(body, digest_size=8).hexdigest()
+        mimetype = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        self.mimetype = f"{mimetype}; charset=utf-8" if mimetype.startswith("text/") or \
+            mimetype == "application/javascript" else mimetype
+        # Kompresi dilakukan sekali saat dimuat, bukan per permintaan
+        self.variants = {"identity": body}
+        if len(body) >= COMPRESS_MIN_BYTES and mimetype.startswith(COMPRESSIBLE_TYPES):
+            compressed = gzip.compress(body, compresslevel=9, mtime=0)
+            if len(compressed) < len(body):
+                self.variants["gzip"] = compressed
+            if brotli is not None:
+                compressed = brotli.compress(body, quality=11)
+                if len(compressed) < len(body):
+                    self.variants["br"] = compressed
+
+    def etag(self, encoding):
+        return self.version if encoding == "identity" else f"{self.version}-{encoding}"
+
+    def sizes(self):
+        return {encoding: len(data) for encoding, data in self.variants.items()}
+
+
+class StaticAssets:
+    """
+    Aset halaman yang dimuat dan dikompresi sekali saat start.
+
+    - Shell HTML (index.html) tidak lagi dirakit per permintaan: placeholder {{CSS_URL}}/{{JS_URL}}
+      diganti URL berversi (`/static/app.css?v=<hash>`) satu kali, lalu disajikan apa adanya.
+    - Setiap varian punya ETag; If-None-Match yang cocok dijawab 304 tanpa body.
+    - Encoding dipilih dari Accept-Encoding (br > gzip > identity) dengan `Vary: Accept-Encoding`.
+    - URL berversi di-cache setahun (`immutable`); shell dan URL tanpa versi selalu direvalidasi.
+
+    Dengan `watch=True` (mode debug) perubahan file di folder dimuat ulang saat diminta.
+    """
+
+    def __init__(self, directory=STATIC_DIR, shell=SHELL_FILE, watch=False):
+        self.directory = directory
+        self.shell = shell
+        self.watch = watch
+        self._lock = threading.Lock()
+        self._assets = {}
+        self._stamp = None
+        self.load()
+
+    # --- Muat ---
+    def _scan(self):
+        """(nama, mtime) setiap file di folder, untuk mendeteksi perubahan."""
+        entries = []
+        for name in sorted(os.listdir(self.directory)):
+            path = os.path.join(self.directory, name)
+            if os.path.isfile(path) and not name.startswith("."):
+                entries.append((name, os.stat(path).st_mtime_ns))
+        return tuple(entries)
+
+    def load(self):
+        stamp = self._scan()
+        assets = {}
+        for name, mtime in stamp:
+            if name == self.shell:
+                continue
+            with open(os.path.join(self.directory, name), 'rb') as f:
+                assets[name] = Asset(name, f.read(), mtime)
+        with open(os.path.join(self.directory, self.shell), encoding='utf-8') as f:
+            html = f.read()
+        for placeholder, name in (("{{CSS_URL}}", "app.css"), ("{{JS_URL}}", "app.js")):
+            html = html.replace(placeholder, f"/static/{name}?v={assets[name].version}")
+        shell_mtime = dict(stamp).get(self.shell)
+        assets[self.shell] = Asset(self.shell, html.encode('utf-8'), shell_mtime)
+        with self._lock:
+            self._assets = assets
+            self._stamp = stamp
+        logging.info("Aset statis dimuat: %s (brotli %s)", ", ".join(
+            f"{name} {asset.sizes()}" for name, asset in assets.items()), "aktif" if brotli else "tidak tersedia")
+
+    def _current(self):
+        if self.watch and self._scan() != self._stamp:
+            self.load()
+        with self._lock:
+            return self._assets
+
+    def url(self, name):
+        return f"/static/{name}?v={self._current()[name].version}"
+
+    # --- Sajikan ---
+    @staticmethod
+    def _negotiate(asset, accept_encodings):
+        for encoding in ("br", "gzip"):
+            if encoding in asset.variants and accept_encodings[encoding]:
+                return encoding
+        return "identity"
+
+    def response(self, request, name=None):
+        """Response untuk aset `name` (default shell HTML), atau None jika tidak ada."""
+        asset = self._current().get(name or self.shell)
+        if asset is None:
+            return None
+        encoding = self._negotiate(asset, request.accept_encodings)
+        if name and request.args.get("v") == asset.version:
+            cache_control = f"public, max-age={STATIC_MAX_AGE}, immutable"
+        else:
+            cache_control = "no-cache"
+        headers = {"Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+        # Semua varian berisi sama, jadi ETag varian mana pun yang cocok cukup untuk 304
+        if any(request.if_none_match.contains(asset.etag(variant)) for variant in asset.variants):
+            response = Response(status=304, headers=headers)
+            response.set_etag(asset.etag(encoding))
+            return response
+        response = Response(asset.variants[encoding], content_type=asset.mimetype, headers=headers)
+        if encoding != "identity":
+            response.headers["Content-Encoding"] = encoding
+        response.set_etag(asset.etag(encoding))
+        return response
+
+    def stats(self):
+        return {name: {"version": asset.version, "bytes": asset.sizes()} for name, asset in self._current().items()}
@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+# Modul bot berada di root repo (tanpa paket), jadi root repo ditambahkan ke sys.path
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def fake_adb(tmp_path, monkeypatch):
+    """adb_client diarahkan ke fake_adb.py dengan status perangkat di tmp_path; sesi ditutup setelah tes."""
+    import adb_client
+    monkeypatch.setattr(adb_client, "ADB_BIN", os.path.join(ROOT, "fake_adb.py"))
+    monkeypatch.setenv("FAKE_ADB_HOME", str(tmp_path / "fake_adb"))
+    monkeypatch.setenv("FAKE_ADB_UI", os.path.join(ROOT, "ui.xml"))
+    monkeypatch.setenv("FAKE_ADB_LATENCY", "0")
+    yield adb_client
+    adb_client.close_all()
@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+import adb_bootstrapper
+import ui_dump
+
+SCREEN = ("<?xml version='1.0' encoding='UTF-8' standalone='yes' ?><hierarchy rotation=\"0\">"
+          "<node index=\"0\" text=\"{text}\" resource-id=\"\" class=\"android.widget.TextView\" "
+          "package=\"com.android.settings\" content-desc=\"\" clickable=\"true\" enabled=\"true\" "
+          "bounds=\"[0,{top}][1080,{bottom}]\" /></hierarchy>")
+
+
+@pytest.fixture
+def screens(tmp_path, fake_adb, monkeypatch):
+    """Dua layar berurutan (gulir = maju satu layar); jumlah dump UI dihitung."""
+    ui = tmp_path / "ui"
+    ui.mkdir()
+    (ui / "0.xml").write_text(SCREEN.format(text="Tentang ponsel", top=100, bottom=200))
+    (ui / "1.xml").write_text(SCREEN.format(text="Opsi pengembang", top=300, bottom=400))
+    monkeypatch.setenv("FAKE_ADB_UI", str(ui))
+    ui_dump.SNAPSHOT_CACHE.clear()
+
+    dumps = []
+    stream_dump = ui_dump.stream_dump
+
+    def counting_stream_dump(*args, **kwargs):
+        dumps.append(1)
+        return stream_dump(*args, **kwargs)
+    monkeypatch.setattr(ui_dump, "stream_dump", counting_stream_dump)
+    return dumps, tmp_path / "fake_adb" / "fake-device" / "state.json"
+
+
+def test_scroll_reuses_stable_dump(screens):
+    dumps, state_file = screens
+
+    assert adb_bootstrapper.find_and_tap_text("Opsi pengembang", scroll_max=1)
+
+    # Pencarian awal + dua dump "gulir selesai"; layar stabil itu dipakai langsung tanpa dump ketiga
+    assert len(dumps) == 3
+    events = json.loads(state_file.read_text())["events"]
+    assert events[0][:2] == ["input", "swipe"]
+    assert events[1] == ["input", "tap", "540", "350"]
+
+
+def test_missing_text_stops_after_scrolls(screens):
+    dumps, _ = screens
+    assert not adb_bootstrapper.find_and_tap_text("tidak-ada", scroll_max=1)
+    assert len(dumps) == 3
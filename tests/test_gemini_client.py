@@ -0,0 +1,124 @@
+import threading
+
+import pytest
+import requests
+
+import fake_gemini
+from gemini_client import GeminiClient, chunk_sources, chunk_text, parse_response
+
+PAYLOAD = {
+    "contents": [{"role": "user", "parts": [{"text": "harga bitcoin"}]}],
+    "tools": [{"google_search": {}}],
+}
+
+
+@pytest.fixture
+def fake_server(monkeypatch):
+    monkeypatch.setenv("FAKE_GEMINI_LATENCY", "0")
+    monkeypatch.setenv("FAKE_GEMINI_TOKEN_DELAY", "0")
+    server = fake_gemini.serve(0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/v1beta"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(fake_server):
+    client = GeminiClient("uji", base_url=fake_server, model="fake", connect_timeout=1, read_timeout=2)
+    yield client
+    client.close()
+
+
+def stats(client, base_url):
+    # Lewat session klien sendiri, jadi pembacaan statistik tidak membuka koneksi baru
+    return client.session.get(base_url.rsplit("/v1beta", 1)[0] + "/stats", timeout=2).json()
+
+
+def test_generate_returns_text_and_grounding_sources(client):
+    result = client.generate(PAYLOAD)
+    text, sources = parse_response(result)
+    assert text == "Jawaban tiruan untuk: harga bitcoin"
+    assert sources == [("example.com", "https://example.com/btc"), ("example.org", "https://example.org/pasar")]
+    assert result["usageMetadata"]["promptTokenCount"] > 0
+    assert client.requests_sent == 1
+
+
+def test_parse_response_without_search_has_no_sources(client):
+    text, sources = parse_response(client.generate({"contents": PAYLOAD["contents"]}))
+    assert text.startswith("Jawaban tiruan")
+    assert sources == []
+
+
+def test_parse_response_reads_legacy_grounding_attributions():
+    result = {"candidates": [{
+        "content": {"parts": [{"text": "a"}, {"text": "b"}]},
+        "groundingMetadata": {"groundingAttributions": [
+            {"web": {"uri": "https://x.test", "title": "x"}},
+            {"web": {"uri": "https://x.test", "title": "x"}},
+            {"web": {"uri": "https://tanpa-judul.test"}},
+        ]},
+    }]}
+    assert parse_response(result) == ("ab", [("x", "https://x.test")])
+
+
+def test_parse_response_empty_candidate():
+    assert parse_response({}) == ("Tidak ada respons teks dari model.", [])
+
+
+def test_stream_yields_sse_chunks_in_order(client):
+    chunks = list(client.stream(PAYLOAD))
+    assert len(chunks) == len("Jawaban tiruan untuk: harga bitcoin".split())
+    assert "".join(chunk_text(chunk) for chunk in chunks) == "Jawaban tiruan untuk: harga bitcoin"
+    # Sumber grounding hanya ada di potongan terakhir
+    assert [chunk_sources(chunk) for chunk in chunks[:-1]] == [[]] * (len(chunks) - 1)
+    assert chunk_sources(chunks[-1])[0] == ("example.com", "https://example.com/btc")
+    assert chunks[-1]["candidates"][0]["finishReason"] == "STOP"
+
+
+def test_connection_is_reused_across_requests(client, fake_server):
+    before = stats(client, fake_server)
+    for _ in range(5):
+        client.generate(PAYLOAD)
+    list(client.stream(PAYLOAD))
+    after = stats(client, fake_server)
+    assert after["requests"] - before["requests"] == 6
+    assert after["connections"] == before["connections"]
+
+
+def test_read_timeout_raises(fake_server, monkeypatch):
+    monkeypatch.setenv("FAKE_GEMINI_LATENCY", "1")
+    client = GeminiClient("uji", base_url=fake_server, model="fake", connect_timeout=1, read_timeout=0.2)
+    try:
+        with pytest.raises(requests.exceptions.Timeout):
+            client.generate(PAYLOAD)
+        with pytest.raises(requests.exceptions.Timeout):
+            list(client.stream(PAYLOAD))
+    finally:
+        client.close()
+
+
+def test_http_error_is_raised_before_first_chunk(fake_server):
+    client = GeminiClient("", base_url=fake_server, model="fake")
+    try:
+        with pytest.raises(requests.exceptions.HTTPError) as error:
+            client.generate(PAYLOAD)
+        assert error.value.response.status_code == 400
+        with pytest.raises(requests.exceptions.HTTPError):
+            next(client.stream(PAYLOAD))
+    finally:
+        client.close()
+
+
+def test_connection_refused_raises_connection_error():
+    # Port server yang sudah ditutup: tidak ada yang mendengarkan
+    server = fake_gemini.serve(0)
+    port = server.server_port
+    server.server_close()
+    client = GeminiClient("uji", base_url=f"http://127.0.0.1:{port}/v1beta", model="fake", connect_timeout=0.5)
+    try:
+        with pytest.raises(requests.exceptions.ConnectionError):
+            client.generate(PAYLOAD)
+    finally:
+        client.close()
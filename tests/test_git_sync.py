@@ -0,0 +1,129 @@
+import subprocess
+import time
+
+import pytest
+
+from git_sync import GitSync
+
+
+def git(cwd, *args):
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout.rstrip()
+
+
+@pytest.fixture
+def repo(tmp_path):
+    """Working repo dengan satu commit awal dan remote `origin` berupa repo bare lokal."""
+    remote = tmp_path / "remote.git"
+    work = tmp_path / "work"
+    git(tmp_path, "init", "-q", "--bare", "-b", "main", str(remote))
+    git(tmp_path, "init", "-q", "-b", "main", str(work))
+    git(work, "config", "user.email", "bot@example.com")
+    git(work, "config", "user.name", "bot")
+    (work / "tracked.txt").write_text("awal\n")
+    git(work, "add", "tracked.txt")
+    git(work, "commit", "-q", "-m", "awal")
+    git(work, "remote", "add", "origin", str(remote))
+    git(work, "push", "-q", "-u", "origin", "main")
+    return work, remote
+
+
+@pytest.fixture
+def make_sync(repo):
+    syncs = []
+
+    def make(**kwargs):
+        kwargs.setdefault("push_window", 3600)
+        kwargs.setdefault("push_every", 100)
+        sync = GitSync(repo_dir=str(repo[0]), **kwargs)
+        syncs.append(sync)
+        return sync
+
+    yield make
+    for sync in syncs:
+        if sync._timer is not None:
+            sync._timer.cancel()
+
+
+def remote_head(remote):
+    return git(remote, "rev-parse", "main")
+
+
+def test_commits_only_registered_paths(repo, make_sync):
+    work, _ = repo
+    sync = make_sync(paths=["report.md"])
+    (work / "report.md").write_text("laporan\n")
+    (work / "tracked.txt").write_text("diubah pengguna\n")
+    (work / "lain.txt").write_text("tidak terdaftar\n")
+
+    outcome = sync.commit("audit")
+
+    assert outcome["committed"] and outcome["paths"] == ["report.md"] and not outcome["error"]
+    assert git(work, "show", "--name-only", "--format=", "HEAD") == "report.md"
+    # Perubahan lain di working tree tidak disentuh (tidak di-stage, tidak di-commit)
+    assert git(work, "status", "--porcelain").splitlines() == [" M tracked.txt", "?? lain.txt"]
+
+
+def test_nothing_to_commit_is_skipped(repo, make_sync):
+    work, _ = repo
+    sync = make_sync(paths=["tracked.txt"])
+    head = git(work, "rev-parse", "HEAD")
+
+    # Tidak ada perubahan: git tidak dijalankan sama sekali
+    outcome = sync.commit("audit")
+    assert outcome == {"committed": False, "paths": [], "push": "idle", "error": ""}
+
+    # Berubah lalu sudah di-commit di luar GitSync: git melaporkan "nothing to commit"
+    (work / "tracked.txt").write_text("baru\n")
+    git(work, "commit", "-q", "-am", "manual")
+    outcome = sync.commit("audit")
+    assert outcome["committed"] is False and not outcome["error"]
+    assert sync.skipped == 2 and sync.commits == 0
+    assert git(work, "rev-parse", "HEAD~1") == head
+
+
+def test_pushes_are_grouped_by_count(repo, make_sync):
+    work, remote = repo
+    sync = make_sync(paths=["report.md"], push_every=3)
+    before = remote_head(remote)
+    for i in range(2):
+        (work / "report.md").write_text(f"laporan {i}\n")
+        assert sync.commit(f"audit {i}")["push"] == "deferred"
+    assert remote_head(remote) == before and sync.pending_commits == 2
+
+    (work / "report.md").write_text("laporan 2\n")
+    assert sync.commit("audit 2")["push"] == "done"
+    assert remote_head(remote) == git(work, "rev-parse", "HEAD")
+    assert sync.pending_commits == 0 and sync.pushes == 1
+
+
+def test_pushes_are_grouped_by_time_window(repo, make_sync):
+    work, remote = repo
+    sync = make_sync(paths=["report.md"], push_window=0.5)
+    before = remote_head(remote)
+    for i in range(2):
+        (work / "report.md").write_text(f"laporan {i}\n")
+        assert sync.commit(f"audit {i}")["push"] == "deferred"
+    assert remote_head(remote) == before
+
+    # Timer jendela waktu mem-push kedua commit sekaligus
+    deadline = time.time() + 10
+    while sync.pushes == 0 and time.time() < deadline:
+        time.sleep(0.05)
+    assert sync.pushes == 1 and sync.pending_commits == 0
+    assert remote_head(remote) == git(work, "rev-parse", "HEAD")
+
+
+def test_flush_reports_push_failure(repo, make_sync):
+    work, _ = repo
+    sync = make_sync(paths=["report.md"], remote="tidak-ada")
+    (work / "report.md").write_text("laporan\n")
+
+    outcome = sync.commit("audit", push=True)
+
+    assert outcome["committed"] and outcome["push"] == "failed"
+    assert outcome["error"].startswith("Error Git Push:")
+    ok, output = sync.flush()
+    assert not ok and "tidak-ada" in output
+    assert sync.last_error == output
+    # Commit tetap lokal dan dicoba lagi pada jendela berikutnya
+    assert sync.pending_commits == 1 and sync._timer is not None
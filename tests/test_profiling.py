@@ -0,0 +1,52 @@
+import cProfile
+import pstats
+import time
+from types import SimpleNamespace
+
+from profiling import Profiler, cprofile_collapsed
+
+
+def inner():
+    time.sleep(0.02)
+
+
+def outer():
+    inner()
+    sum(range(10000))
+
+
+def parse(collapsed):
+    stacks = {}
+    for line in collapsed.splitlines():
+        stack, count = line.rsplit(" ", 1)
+        stacks[tuple(frame.split(" (")[0] for frame in stack.split(";"))] = int(count)
+    return stacks
+
+
+def test_cprofile_stats_become_collapsed_stacks():
+    profile = cProfile.Profile()
+    profile.enable()
+    outer()
+    profile.disable()
+
+    stacks = parse(cprofile_collapsed(pstats.Stats(profile).stats))
+    sleep = [stack for stack in stacks if stack[-1] == "<built-in method time.sleep>"]
+    assert [stack[-3:] for stack in sleep] == [("outer", "inner", "<built-in method time.sleep>")]
+    assert stacks[sleep[0]] >= 15000  # mikrodetik
+    # Total semua stack di bawah `outer` = waktu kumulatifnya (dalam pembulatan per baris)
+    cumulative = next(entry[3] for func, entry in pstats.Stats(profile).stats.items() if func[2] == "outer")
+    below = sum(us for stack, us in stacks.items() if "outer" in stack)
+    assert abs(below - cumulative * 1e6) <= len(stacks) + 1
+
+
+def test_cprofile_capture_writes_collapsed_file(tmp_path):
+    profiler = Profiler(directory=str(tmp_path), tracemalloc_top=0)
+    request = SimpleNamespace(headers={"X-Profile": "cprofile"}, args={}, path="/process_input",
+                              method="POST", remote_addr="127.0.0.1")
+    capture = profiler.begin(request)
+    outer()
+    summary = capture.stop(200)
+
+    assert set(summary["files"]) == {"collapsed", "prof", "top"}
+    collapsed = (tmp_path / summary["files"]["collapsed"]).read_text()
+    assert any(stack[-2:] == ("outer", "inner") for stack in parse(collapsed))
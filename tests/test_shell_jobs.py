@@ -0,0 +1,39 @@
+import pytest
+
+from bash_pool import BashPool
+from shell_jobs import DONE, KILLED, QUEUED, RUNNING, JobManager
+
+
+@pytest.fixture
+def pool():
+    pool = BashPool(prewarm=False)
+    yield pool
+    pool.close()
+
+
+def test_other_session_runs_while_same_session_job_waits(pool):
+    manager = JobManager(max_running=2)
+    slow = manager.submit("sleep 5", worker=pool.get("A"))
+    waiting = manager.submit("echo b", worker=pool.get("A"))
+    try:
+        # Job kedua sesi A antre di belakang `sleep` tanpa memegang slot, jadi sesi B tetap jalan
+        other = manager.submit("echo other", worker=pool.get("B"))
+        assert other.wait(2)
+        assert other.status == DONE and other.output.text() == "other\n"
+        assert slow.status == RUNNING and waiting.status == QUEUED
+    finally:
+        slow.kill()
+    assert waiting.wait(5) and waiting.status == DONE
+    assert slow.status == KILLED
+
+
+def test_slots_still_limit_running_jobs():
+    manager = JobManager(max_running=1)
+    first = manager.submit("sleep 5")
+    second = manager.submit("echo dua")
+    try:
+        assert not second.wait(0.5)
+        assert first.status == RUNNING and second.status == QUEUED
+    finally:
+        first.kill()
+    assert second.wait(5) and second.status == DONE
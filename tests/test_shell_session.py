@@ -0,0 +1,87 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from shell_session import ShellSession, ShellSessionError
+
+FAKE_ADB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fake_adb.py")
+
+
+@pytest.fixture
+def session(tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_ADB_HOME", str(tmp_path / "fake_adb"))
+    session = ShellSession([sys.executable, FAKE_ADB, "shell"], name="fake")
+    yield session
+    session.close(kill=True)
+
+
+# --- ShellSession langsung di atas `fake_adb.py shell` ---
+def test_outputs_are_split_at_marker_lines(session):
+    # Hanya baris baru pemisah sebelum penanda yang dibuang; output perintah tetap utuh
+    assert session.run("echo satu; echo dua") == (0, "satu\ndua\n")
+    # Output tanpa baris baru penutup tetap terpisah dari penanda
+    assert session.run("printf tanpa-newline") == (0, "tanpa-newline")
+    assert session.run("true") == (0, "")
+    assert session.run("echo tiga") == (0, "tiga\n")
+    assert session.restarts == 0
+
+
+def test_nonzero_exit_codes_and_stderr(session):
+    assert session.run("(exit 7)") == (7, "")
+    exit_code, output = session.run("echo galat >&2; false")
+    assert (exit_code, output) == (1, "galat\n")
+    # Sesi tetap dipakai setelah perintah gagal
+    assert session.run("echo lanjut") == (0, "lanjut\n")
+
+
+def test_stdin_is_isolated_between_commands(session):
+    # Perintah yang membaca stdin mendapat EOF, bukan perintah berikutnya dari sesi
+    assert session.run("cat") == (0, "")
+    assert session.run("read baris; echo \"dapat=$baris\"") == (0, "dapat=\n")
+    assert session.run("echo masih-jalan") == (0, "masih-jalan\n")
+
+
+def test_restarts_after_eof(session):
+    session.run("echo awal")
+    pid = session.proc.pid
+    with pytest.raises(ShellSessionError):
+        session.run("exit 3")
+    assert not session.alive()
+    assert session.run("echo lagi") == (0, "lagi\n")
+    assert session.restarts == 1 and session.proc.pid != pid
+
+
+def test_restarts_after_timeout(session):
+    session.run("echo awal")
+    with pytest.raises(subprocess.TimeoutExpired):
+        session.run("sleep 1; echo terlambat", timeout=0.2)
+    # Output perintah yang terlambat tidak bocor ke perintah berikutnya
+    assert session.run("echo baru") == (0, "baru\n")
+    assert session.restarts == 1
+
+
+def test_capture_false_streams_without_storing(session):
+    lines = []
+    assert session.run("echo a; echo b", on_output=lines.append, capture=False) == (0, "")
+    # Baris terakhir adalah pemisah sebelum penanda; penandanya sendiri tidak diteruskan
+    assert lines == ["a\n", "b\n", "\n"]
+
+
+# --- adb_client.shell dengan ADB_BIN=fake_adb.py ---
+def test_adb_client_shell_reuses_one_session(fake_adb):
+    assert fake_adb.shell("getprop ro.product.model") == (0, "FakePhone\n")
+    pid = fake_adb.get_session().proc.pid
+    assert fake_adb.shell(["echo", "dari", "list"]) == (0, "dari list\n")
+    assert fake_adb.shell("(exit 4)") == (4, "")
+    assert fake_adb.get_session().proc.pid == pid
+
+
+def test_adb_client_shell_restarts_dead_session(fake_adb):
+    fake_adb.shell("echo awal")
+    session = fake_adb.get_session()
+    session.proc.kill()
+    session.proc.wait()
+    assert fake_adb.shell("echo hidup-lagi") == (0, "hidup-lagi\n")
+    assert session.restarts == 1
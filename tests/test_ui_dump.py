@@ -0,0 +1,20 @@
+import ui_dump
+from ui_snapshot import Selector
+
+
+def test_locate_hit_returns_node_without_snapshot(fake_adb):
+    before = ui_dump.SNAPSHOT_CACHE.stats()
+    attrs, snapshot = ui_dump.locate(Selector(text_or_desc="192.168.1.16:5000"))
+    assert snapshot is None
+    assert attrs["bounds"] == "[99,0][893,58]"
+    # Berhenti di node yang cocok: cache snapshot tidak disentuh
+    assert ui_dump.SNAPSHOT_CACHE.stats() == before
+
+
+def test_locate_miss_returns_cached_full_snapshot(fake_adb):
+    ui_dump.SNAPSHOT_CACHE.clear()
+    attrs, snapshot = ui_dump.locate(Selector(text_or_desc="tidak-ada-di-layar"))
+    assert attrs is None and len(snapshot) == 97
+    # Layar yang sama tidak diurai ulang, baik lewat locate maupun capture_snapshot
+    assert ui_dump.locate(Selector(text="juga-tidak-ada"))[1] is snapshot
+    assert ui_dump.capture_snapshot() is snapshot
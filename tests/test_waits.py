@@ -0,0 +1,37 @@
+from collections import OrderedDict
+
+import pytest
+
+import adb_client
+import waits
+
+
+@pytest.fixture(autouse=True)
+def fresh_stats(monkeypatch):
+    monkeypatch.setattr(waits, "WAIT_STATS", OrderedDict())
+
+
+def test_stats_are_aggregated_per_device():
+    for serial, ok in (("hp-a", True), ("hp-a", False), ("hp-b", True)):
+        with adb_client.use_device(serial):
+            waits.wait_until(lambda ok=ok: ok, timeout=0, label="layar stabil")
+
+    assert waits.WAIT_STATS[("hp-a", "layar stabil")][0] == 2
+    assert waits.WAIT_STATS[("hp-a", "layar stabil")][3] == 1
+    assert waits.WAIT_STATS[("hp-b", "layar stabil")][0] == 1
+
+    report = waits.wait_report("hp-b").splitlines()
+    assert len(report) == 2 and report[1].split()[:3] == ["layar", "stabil", "1"]
+    # Tanpa serial: semua perangkat, dengan kolom perangkat
+    assert sorted(line.split()[0] for line in waits.wait_report().splitlines()[1:]) == ["hp-a", "hp-b"]
+    assert waits.wait_report("hp-c") == "Belum ada penantian yang tercatat."
+
+
+def test_stats_are_bounded(monkeypatch):
+    monkeypatch.setattr(waits, "WAIT_STATS_MAX_KEYS", 3)
+    for i in range(5):
+        waits.wait_until(lambda: True, label=f"label {i}")
+    # Entri yang baru dipakai lagi tidak ikut dibuang
+    waits.wait_until(lambda: True, label="label 2")
+    waits.wait_until(lambda: True, label="label 5")
+    assert list(waits.WAIT_STATS) == [(None, "label 4"), (None, "label 2"), (None, "label 5")]
@@ -0,0 +1,176 @@
+import os
+import subprocess
+import threading
+import xml.etree.ElementTree as ET
+
+import adb_client
+from metrics import REGISTRY, UI_SECONDS
+from ui_snapshot import SnapshotCache, UiSnapshot, fingerprint
+
+# --- PENTING: CONFIGURATION ---
+# Dump ditulis langsung ke stdout (`adb exec-out`), tanpa file di /sdcard dan tanpa `adb pull`.
+UI_DUMP_TARGET = "/dev/tty"
+UI_DUMP_TIMEOUT = 10
+# Isi path (misalnya UI_DEBUG_SNAPSHOT=ui.xml) untuk menyimpan salinan dump ke disk saat debugging.
+UI_DEBUG_SNAPSHOT = os.environ.get("UI_DEBUG_SNAPSHOT") or None
+# Jumlah UiSnapshot (layar berbeda) yang disimpan di memori, dikunci dengan fingerprint dump.
+UI_SNAPSHOT_CACHE_SIZE = 32
+
+SNAPSHOT_CACHE = SnapshotCache(UI_SNAPSHOT_CACHE_SIZE)
+REGISTRY.callback("ui_snapshot_cache_total", "Pencarian SNAPSHOT_CACHE (hit = dump tidak diurai ulang).",
+                  lambda: {("hit",): SNAPSHOT_CACHE.hits, ("miss",): SNAPSHOT_CACHE.misses},
+                  ("result",), type="counter")
+
+_HIERARCHY_END = b"</hierarchy>"
+
+
+class UiDumpError(Exception):
+    """Dump hierarki UI gagal (perangkat offline, layar belum idle, dsb.)."""
+
+
+def stream_dump(serial=None, timeout=UI_DUMP_TIMEOUT):
+    """
+    Generator potongan byte XML dari `uiautomator dump`.
+
+    Dari perangkat sungguhan (device_stream_dump), atau dari backend adb_client yang terpasang
+    (misalnya pemutar ulang trace di adb_trace.py).
+    """
+    backend = adb_client.get_backend()
+    if backend is not None:
+        return backend.dump(serial, timeout)
+    return device_stream_dump(serial, timeout)
+
+
+def device_stream_dump(serial=None, timeout=UI_DUMP_TIMEOUT):
+    """
+    Generator potongan byte XML dari `uiautomator dump` lewat `adb exec-out`.
+
+    Berhenti tepat setelah `</hierarchy>` (teks penutup uiautomator dibuang).
+    Proses adb dimatikan saat generator ditutup, termasuk saat pemanggil berhenti lebih awal.
+    """
+    proc = subprocess.Popen(
+        adb_client.adb_argv('exec-out', 'uiautomator', 'dump', UI_DUMP_TARGET, serial=serial),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL
+    )
+    watchdog = threading.Timer(timeout, proc.kill)
+    watchdog.daemon = True
+    watchdog.start()
+    tail = b""
+    try:
+        for chunk in iter(lambda: proc.stdout.read1(65536), b""):
+            window = tail + chunk
+            end = window.find(_HIERARCHY_END)
+            if end != -1:
+                yield chunk[:end + len(_HIERARCHY_END) - len(tail)]
+                return
+            tail = window[-len(_HIERARCHY_END):]
+            yield chunk
+    finally:
+        watchdog.cancel()
+        if proc.poll() is None:
+            proc.kill()
+        proc.stdout.close()
+        proc.wait()
+
+
+def iter_nodes(serial=None, snapshot_path=UI_DEBUG_SNAPSHOT, sink=None):
+    """
+    Menghasilkan atribut (dict) setiap node UI sesuai urutan dokumen, langsung dari stream.
+
+    Node dilepas dari memori begitu selesai diproses, jadi tidak ada DOM penuh yang dibangun.
+    Jika `snapshot_path` diisi, seluruh dump juga disalin ke file tersebut.
+    `sink(chunk)` menerima setiap potongan byte yang sudah dibaca (misalnya untuk fingerprint).
+    """
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    snapshot = open(snapshot_path, 'wb') if snapshot_path else None
+    chunks = stream_dump(serial)
+    received = False
+    try:
+        for chunk in chunks:
+            received = True
+            if sink:
+                sink(chunk)
+            if snapshot:
+                snapshot.write(chunk)
+            try:
+                parser.feed(chunk)
+            except ET.ParseError as e:
+                raise UiDumpError(f"Dump UI tidak valid: {e}")
+            for event, elem in parser.read_events():
+                if event == 'start':
+                    if elem.tag == 'node':
+                        yield elem.attrib
+                else:
+                    # Lepas anak-anak node yang sudah selesai; atributnya tetap utuh untuk pemanggil.
+                    del elem[:]
+        if not received:
+            raise UiDumpError("Dump UI kosong. Periksa koneksi ADB.")
+        try:
+            parser.close()
+        except ET.ParseError as e:
+            raise UiDumpError(f"Dump UI terpotong: {e}")
+    finally:
+        if snapshot:
+            # Snapshot debug harus utuh walaupun pencarian berhenti lebih awal.
+            for chunk in chunks:
+                snapshot.write(chunk)
+            snapshot.close()
+        chunks.close()
+
+
+def capture_xml(serial=None):
+    """Mengambil seluruh dump UI sebagai bytes (disk hanya disentuh jika UI_DEBUG_SNAPSHOT diisi)."""
+    with UI_SECONDS.time("dump"):
+        data = b"".join(stream_dump(serial))
+    if not data:
+        raise UiDumpError("Dump UI kosong. Periksa koneksi ADB.")
+    if UI_DEBUG_SNAPSHOT:
+        with open(UI_DEBUG_SNAPSHOT, 'wb') as f:
+            f.write(data)
+    return data
+
+
+def capture_snapshot(serial=None):
+    """
+    Dump layar saat ini sebagai UiSnapshot.
+
+    Layar yang fingerprint-nya sudah ada di SNAPSHOT_CACHE tidak diurai ulang.
+    """
+    data = capture_xml(serial)
+    try:
+        return SNAPSHOT_CACHE.snapshot_for(data)
+    except ET.ParseError as e:
+        raise UiDumpError(f"Dump UI tidak valid: {e}")
+
+
+def locate(selector, serial=None):
+    """
+    Satu pencarian `selector` di layar saat ini: (atribut node, None) atau (None, UiSnapshot).
+
+    Dump di-stream dan berhenti dibaca begitu node pertama yang cocok ditemukan (tanpa snapshot penuh).
+    Jika tidak ada yang cocok, snapshot dibangun dari node yang sama selama stream (tanpa parse kedua)
+    dan disimpan di SNAPSHOT_CACHE, jadi polling/diff berikutnya pada layar yang sama memakai cache.
+    """
+    data = []
+    found = []
+
+    def nodes():
+        for attrs in iter_nodes(serial, sink=data.append):
+            if selector.matches(attrs):
+                found.append(attrs)
+                return
+            yield attrs
+
+    # Dump, parse dan pencarian berjalan bersamaan di stream, jadi dicatat sebagai satu fase
+    with UI_SECONDS.time("find_stream"):
+        snapshot = UiSnapshot.from_nodes(nodes())
+    if found:
+        return found[0], None
+    key = fingerprint(b"".join(data))
+    cached = SNAPSHOT_CACHE.get(key)
+    if cached is not None:
+        return None, cached
+    snapshot.fingerprint = key
+    SNAPSHOT_CACHE.put(key, snapshot)
+    return None, snapshot
@@ -0,0 +1,389 @@
+import hashlib
+import sys
+import threading
+import time
+import xml.etree.ElementTree as ET
+from array import array
+from collections import Counter, OrderedDict, namedtuple
+
+from metrics import UI_SECONDS
+
+# --- FLAG NODE ---
+# Atribut boolean uiautomator disimpan sebagai bitmask, satu angka per node.
+FLAG_HAS_BOUNDS = 1 << 0
+FLAG_CHECKABLE = 1 << 1
+FLAG_CHECKED = 1 << 2
+FLAG_CLICKABLE = 1 << 3
+FLAG_ENABLED = 1 << 4
+FLAG_FOCUSABLE = 1 << 5
+FLAG_FOCUSED = 1 << 6
+FLAG_SCROLLABLE = 1 << 7
+FLAG_LONG_CLICKABLE = 1 << 8
+FLAG_SELECTED = 1 << 9
+
+_FLAG_ATTRS = (
+    ('checkable', FLAG_CHECKABLE),
+    ('checked', FLAG_CHECKED),
+    ('clickable', FLAG_CLICKABLE),
+    ('enabled', FLAG_ENABLED),
+    ('focusable', FLAG_FOCUSABLE),
+    ('focused', FLAG_FOCUSED),
+    ('scrollable', FLAG_SCROLLABLE),
+    ('long-clickable', FLAG_LONG_CLICKABLE),
+    ('selected', FLAG_SELECTED),
+)
+
+
+def parse_bounds(bounds_string):
+    """Mengurai "[x1,y1][x2,y2]" menjadi (x1, y1, x2, y2), atau None jika formatnya salah."""
+    if not bounds_string or bounds_string[0] != '[' or bounds_string[-1] != ']':
+        return None
+    parts = bounds_string[1:-1].replace('][', ',').split(',')
+    if len(parts) != 4:
+        return None
+    try:
+        return tuple(int(p) for p in parts)
+    except ValueError:
+        return None
+
+
+# --- SNAPSHOT KOLOM ---
+class UiSnapshot:
+    """
+    Indeks hierarki UI dalam bentuk kolom, dibangun sekali dalam satu lintasan.
+
+    Teks dan content-desc sudah di-lowercase, flag disimpan sebagai bitmask dan
+    bounds sudah diurai ke array integer, sehingga query berulang tidak perlu
+    mengurai XML, regex bounds, atau lower() lagi. Indeks node = urutan dokumen.
+    """
+
+    def __init__(self):
+        self.raw_text = []
+        self.raw_desc = []
+        self.text = []
+        self.desc = []
+        self.haystack = []
+        self.cls = []
+        self.cls_lower = []
+        self.resource_id = []
+        self.package = []
+        self.flags = array('H')
+        self.bounds = array('i')
+        self.cx = array('i')
+        self.cy = array('i')
+        self.fingerprint = None
+        self._query_cache = {}
+        self._signatures = None
+
+    @classmethod
+    def from_nodes(cls, nodes):
+        """Membangun snapshot dari iterable atribut node (misalnya ui_dump.iter_nodes())."""
+        snapshot = cls()
+        for attrs in nodes:
+            snapshot._append(attrs)
+        return snapshot
+
+    @classmethod
+    def from_xml(cls, data):
+        """Membangun snapshot dari isi XML dump (bytes atau str)."""
+        root = ET.fromstring(data)
+        return cls.from_nodes(node.attrib for node in root.iter('node'))
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, 'rb') as f:
+            return cls.from_xml(f.read())
+
+    def _append(self, attrs):
+        get = attrs.get
+        text = get('text', '')
+        desc = get('content-desc', '')
+        self.raw_text.append(text)
+        self.raw_desc.append(desc)
+        text_lower = text.lower()
+        desc_lower = desc.lower()
+        self.text.append(text_lower)
+        self.desc.append(desc_lower)
+        # Teks + desc digabung agar pencarian "teks atau desc" cukup satu operasi `in`.
+        self.haystack.append(text_lower + '\n' + desc_lower)
+        node_class = get('class', '')
+        self.cls.append(node_class)
+        self.cls_lower.append(node_class.lower())
+        self.resource_id.append(get('resource-id', ''))
+        self.package.append(get('package', ''))
+
+        flags = 0
+        for name, bit in _FLAG_ATTRS:
+            if get(name) == 'true':
+                flags |= bit
+        bounds = parse_bounds(get('bounds'))
+        if bounds:
+            flags |= FLAG_HAS_BOUNDS
+            x1, y1, x2, y2 = bounds
+        else:
+            x1 = y1 = x2 = y2 = 0
+        self.flags.append(flags)
+        self.bounds.extend((x1, y1, x2, y2))
+        self.cx.append((x1 + x2) // 2)
+        self.cy.append((y1 + y2) // 2)
+
+    def __len__(self):
+        return len(self.flags)
+
+    # --- Akses per node ---
+    def center(self, i):
+        """Koordinat tengah (x, y) node ke-i."""
+        return self.cx[i], self.cy[i]
+
+    def node_bounds(self, i):
+        return tuple(self.bounds[4 * i:4 * i + 4])
+
+    def label(self, i):
+        """Teks asli node, atau content-desc jika teks kosong (untuk log)."""
+        return self.raw_text[i] or self.raw_desc[i]
+
+    # --- Query ---
+    def find(self, selector):
+        """Semua indeks node yang cocok dengan selector (hasil di-cache per snapshot)."""
+        result = self._query_cache.get(selector)
+        if result is None:
+            with UI_SECONDS.time("search"):
+                result = selector.run(self)
+            self._query_cache[selector] = result
+        return result
+
+    def first(self, *selectors):
+        """Indeks node pertama (urutan dokumen) yang cocok dengan salah satu selector, atau None."""
+        hits = [matches[0] for matches in (self.find(s) for s in selectors) if matches]
+        return min(hits) if hits else None
+
+
+# --- SELECTOR ---
+class Selector:
+    """
+    Kriteria pencarian node yang dikompilasi sekali dan bisa dipakai berulang.
+
+    text / desc / text_or_desc : substring (tidak peka huruf besar/kecil); boleh tuple untuk "salah satu".
+    resource_id                : sama persis, atau akhiran setelah ':id/' (misalnya 'switch_widget').
+    cls                        : substring nama class (tidak peka huruf besar/kecil), misalnya 'switch'.
+    checkable / clickable /
+    enabled                    : True/False untuk mensyaratkan flag.
+    region                     : (x_min, y_min, x_max, y_max) untuk titik tengah node; None = tanpa batas.
+    Node tanpa bounds tidak pernah cocok.
+    """
+
+    def __init__(self, text=None, desc=None, text_or_desc=None, resource_id=None, cls=None,
+                 checkable=None, clickable=None, enabled=None, region=None):
+        self.key = (
+            _needles(text), _needles(desc), _needles(text_or_desc), resource_id,
+            cls.lower() if cls else None, checkable, clickable, enabled, tuple(region) if region else None
+        )
+        self._mask = FLAG_HAS_BOUNDS
+        self._want = FLAG_HAS_BOUNDS
+        for value, bit in ((checkable, FLAG_CHECKABLE), (clickable, FLAG_CLICKABLE), (enabled, FLAG_ENABLED)):
+            if value is not None:
+                self._mask |= bit
+                if value:
+                    self._want |= bit
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __eq__(self, other):
+        return isinstance(other, Selector) and self.key == other.key
+
+    def __repr__(self):
+        return f"Selector{self.key}"
+
+    def run(self, snapshot):
+        """Evaluasi kolom demi kolom: filter murah (flag, region) lebih dulu, string terakhir."""
+        text, desc, text_or_desc, resource_id, cls, _, _, _, region = self.key
+        mask, want, flags = self._mask, self._want, snapshot.flags
+        candidates = [i for i in range(len(snapshot)) if flags[i] & mask == want]
+
+        if region:
+            x_min, y_min, x_max, y_max = region
+            cx, cy = snapshot.cx, snapshot.cy
+            candidates = [
+                i for i in candidates
+                if (x_min is None or cx[i] >= x_min) and (x_max is None or cx[i] < x_max)
+                and (y_min is None or cy[i] >= y_min) and (y_max is None or cy[i] < y_max)
+            ]
+        if resource_id:
+            rids = snapshot.resource_id
+            candidates = [i for i in candidates if _resource_id_matches(rids[i], resource_id)]
+        if cls:
+            classes = snapshot.cls_lower
+            candidates = [i for i in candidates if cls in classes[i]]
+        if text:
+            candidates = _filter_substring(candidates, snapshot.text, text)
+        if desc:
+            candidates = _filter_substring(candidates, snapshot.desc, desc)
+        if text_or_desc:
+            candidates = _filter_substring(candidates, snapshot.haystack, text_or_desc)
+        return candidates
+
+    def matches(self, attrs):
+        """Evaluasi satu node (dict atribut) — untuk pencarian streaming yang berhenti lebih awal."""
+        text, desc, text_or_desc, resource_id, cls, checkable, clickable, enabled, region = self.key
+        bounds = parse_bounds(attrs.get('bounds'))
+        if not bounds:
+            return False
+        if checkable is not None and (attrs.get('checkable') == 'true') != checkable:
+            return False
+        if clickable is not None and (attrs.get('clickable') == 'true') != clickable:
+            return False
+        if enabled is not None and (attrs.get('enabled') == 'true') != enabled:
+            return False
+        if region:
+            x_min, y_min, x_max, y_max = region
+            x, y = (bounds[0] + bounds[2]) // 2, (bounds[1] + bounds[3]) // 2
+            if ((x_min is not None and x < x_min) or (x_max is not None and x >= x_max)
+                    or (y_min is not None and y < y_min) or (y_max is not None and y >= y_max)):
+                return False
+        if resource_id and not _resource_id_matches(attrs.get('resource-id', ''), resource_id):
+            return False
+        if cls and cls not in attrs.get('class', '').lower():
+            return False
+        node_text = attrs.get('text', '').lower()
+        node_desc = attrs.get('content-desc', '').lower()
+        if text and not any(n in node_text for n in text):
+            return False
+        if desc and not any(n in node_desc for n in desc):
+            return False
+        if text_or_desc and not any(n in node_text or n in node_desc for n in text_or_desc):
+            return False
+        return True
+
+
+def _needles(value):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = (value,)
+    return tuple(v.lower() for v in value)
+
+
+def _filter_substring(candidates, column, needles):
+    if len(needles) == 1:
+        needle = needles[0]
+        return [i for i in candidates if needle in column[i]]
+    return [i for i in candidates if any(n in column[i] for n in needles)]
+
+
+def _resource_id_matches(rid, wanted):
+    return rid == wanted or rid.endswith(':id/' + wanted)
+
+
+
+# --- FINGERPRINT & CACHE ---
+def fingerprint(data):
+    """Hash isi dump XML; layar yang sama menghasilkan fingerprint yang sama."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class SnapshotCache:
+    """Cache LRU UiSnapshot yang dikunci dengan fingerprint dump (aman untuk banyak thread)."""
+
+    def __init__(self, maxsize=32):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            snapshot = self._items.get(key)
+            if snapshot is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return snapshot
+
+    def put(self, key, snapshot):
+        with self._lock:
+            self._items[key] = snapshot
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def snapshot_for(self, data):
+        """UiSnapshot untuk dump `data`; hanya diurai jika fingerprint-nya belum pernah terlihat."""
+        key = fingerprint(data)
+        snapshot = self.get(key)
+        if snapshot is None:
+            with UI_SECONDS.time("parse"):
+                snapshot = UiSnapshot.from_xml(data)
+            snapshot.fingerprint = key
+            self.put(key, snapshot)
+        return snapshot
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def stats(self):
+        return {"size": len(self._items), "hits": self.hits, "misses": self.misses}
+
+
+# --- DIFF STRUKTURAL ---
+class SnapshotDiff(namedtuple('SnapshotDiff', 'added removed unchanged')):
+    __slots__ = ()
+
+    @property
+    def changed(self):
+        return self.added > 0 or self.removed > 0
+
+
+def node_signatures(snapshot):
+    """Tanda tangan struktural tiap node: class, resource-id, teks, desc, dan bounds."""
+    signatures = snapshot._signatures
+    if signatures is None:
+        bounds = snapshot.bounds
+        signatures = Counter(
+            (snapshot.cls[i], snapshot.resource_id[i], snapshot.text[i], snapshot.desc[i], tuple(bounds[4 * i:4 * i + 4]))
+            for i in range(len(snapshot))
+        )
+        snapshot._signatures = signatures
+    return signatures
+
+
+def diff_snapshots(old, new):
+    """
+    Perbandingan murah dua snapshot: jumlah node yang muncul, hilang, dan tetap.
+
+    Setelah swipe, `changed == False` berarti layar tidak bergerak (akhir daftar).
+    """
+    if getattr(old, 'fingerprint', None) and old.fingerprint == getattr(new, 'fingerprint', None):
+        return SnapshotDiff(0, 0, len(new))
+    before, after = node_signatures(old), node_signatures(new)
+    unchanged = sum((before & after).values())
+    return SnapshotDiff(len(new) - unchanged, len(old) - unchanged, unchanged)
+
+# --- DEMO: QUERY BERULANG PADA ui.xml ---
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else "ui.xml"
+
+    start = time.perf_counter()
+    snapshot = UiSnapshot.from_file(path)
+    print(f"Snapshot {path}: {len(snapshot)} node, dibangun dalam {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    selectors = [
+        Selector(text_or_desc="gemini"),
+        Selector(clickable=True, region=(None, None, None, 400)),
+        Selector(resource_id="url"),
+        Selector(cls="edittext"),
+    ]
+    for selector in selectors:
+        start = time.perf_counter()
+        for _ in range(1000):
+            selector.run(snapshot)
+        per_query = (time.perf_counter() - start) / 1000 * 1e6
+        matches = snapshot.find(selector)
+        start = time.perf_counter()
+        for _ in range(1000):
+            snapshot.find(selector)
+        per_cached = (time.perf_counter() - start) / 1000 * 1e6
+        print(f"{selector}: {len(matches)} cocok, {per_query:.1f} µs/query, {per_cached:.2f} µs dari cache")
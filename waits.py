@@ -0,0 +1,191 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+import xml.etree.ElementTree as ET
+
+import adb_client
+import ui_dump
+from ui_snapshot import fingerprint, parse_bounds
+
+# --- PENTING: CONFIGURATION ---
+# Jeda awal antar pengecekan, dikalikan WAIT_BACKOFF setiap kali kondisi belum terpenuhi.
+WAIT_INITIAL_INTERVAL = 0.05
+WAIT_MAX_INTERVAL = 1.0
+WAIT_BACKOFF = 1.6
+
+# Ringkasan penantian per (serial perangkat, label): [jumlah, total detik, maks detik, timeout].
+# Dibatasi WAIT_STATS_MAX_KEYS entri (yang paling lama tidak dipakai dibuang), karena orchestrator
+# menjalankan alur untuk banyak perangkat dalam satu proses. Dibaca lewat wait_report().
+WAIT_STATS_MAX_KEYS = 512
+WAIT_STATS = OrderedDict()
+_stats_lock = threading.Lock()
+
+
+def wait_until(predicate, timeout=10, label=None, initial_interval=WAIT_INITIAL_INTERVAL,
+               max_interval=WAIT_MAX_INTERVAL):
+    """
+    Memanggil `predicate` sampai hasilnya truthy atau `timeout` (detik) habis.
+
+    Jeda antar pengecekan dimulai kecil lalu membesar (adaptive backoff), jadi perangkat
+    cepat tidak menunggu lama dan perangkat lambat tidak dibanjiri perintah.
+    Mengembalikan hasil predicate, atau None jika timeout. Lama penantian dicatat di WAIT_STATS.
+    """
+    label = label or getattr(predicate, '__name__', 'kondisi')
+    start = time.monotonic()
+    deadline = start + timeout
+    interval = initial_interval
+    while True:
+        value = predicate()
+        now = time.monotonic()
+        if value or now >= deadline:
+            _record(label, now - start, bool(value))
+            return value or None
+        time.sleep(min(interval, deadline - now))
+        interval = min(interval * WAIT_BACKOFF, max_interval)
+
+
+def _record(label, elapsed, ok):
+    key = (adb_client.current_serial(), label)
+    with _stats_lock:
+        entry = WAIT_STATS.get(key)
+        if entry is None:
+            entry = WAIT_STATS[key] = [0, 0.0, 0.0, 0]
+            while len(WAIT_STATS) > WAIT_STATS_MAX_KEYS:
+                WAIT_STATS.popitem(last=False)
+        else:
+            WAIT_STATS.move_to_end(key)
+        entry[0] += 1
+        entry[1] += elapsed
+        entry[2] = max(entry[2], elapsed)
+        entry[3] += 0 if ok else 1
+    status = "OK" if ok else "TIMEOUT"
+    print(f"[{time.strftime('%H:%M:%S')}] TUNGGU '{label}': {elapsed:.2f} detik ({status})")
+
+
+def wait_report(serial=None):
+    """
+    Ringkasan waktu tunggu per label, diurutkan dari total terlama.
+
+    Dengan `serial` hanya penantian perangkat itu; tanpa `serial` semua perangkat, dengan kolom perangkat.
+    Perangkat default ADB (tanpa serial) tercatat sebagai '-'.
+    """
+    with _stats_lock:
+        stats = [(key, list(entry)) for key, entry in WAIT_STATS.items() if serial is None or key[0] == serial]
+    if not stats:
+        return "Belum ada penantian yang tercatat."
+    stats.sort(key=lambda item: -item[1][1])
+    if serial is not None:
+        lines = [f"{'Label':40} {'n':>3} {'total':>8} {'maks':>8} {'timeout':>7}"]
+        for (_, label), (count, total, longest, timeouts) in stats:
+            lines.append(f"{label[:40]:40} {count:>3} {total:>7.2f}s {longest:>7.2f}s {timeouts:>7}")
+    else:
+        lines = [f"{'Perangkat':21} {'Label':40} {'n':>3} {'total':>8} {'maks':>8} {'timeout':>7}"]
+        for (device, label), (count, total, longest, timeouts) in stats:
+            lines.append(f"{(device or '-')[:21]:21} {label[:40]:40} {count:>3} {total:>7.2f}s {longest:>7.2f}s {timeouts:>7}")
+    return "\n".join(lines)
+
+
+# --- PREDIKAT ---
+def current_focus(serial=None):
+    """Komponen (package/activity) yang sedang fokus menurut `dumpsys window`, atau None."""
+    try:
+        exit_code, output = adb_client.shell("dumpsys window | grep -E 'mCurrentFocus|mFocusedApp'", serial=serial)
+    except Exception:
+        return None
+    match = re.search(r'mCurrentFocus=Window\{\S+ \S+ ([^\s}]+)', output)
+    return match.group(1) if exit_code == 0 and match else None
+
+
+def focused_activity(pattern, serial=None):
+    """Predikat: activity yang fokus mengandung `pattern` (misalnya nama package)."""
+    def check():
+        focus = current_focus(serial)
+        return focus if focus and pattern.lower() in focus.lower() else None
+    check.__name__ = f"fokus:{pattern}"
+    return check
+
+
+def node_present(selector, serial=None):
+    """
+    Predikat: ada node yang cocok dengan selector (mengembalikan koordinat tengahnya).
+
+    Cek pertama di-stream dan berhenti begitu node ketemu (ui_dump.locate); polling berikutnya
+    memakai snapshot dari cache, karena layar yang ditunggu biasanya sama di banyak polling.
+    """
+    polls = []
+
+    def check():
+        try:
+            if not polls:
+                polls.append(1)
+                attrs, snapshot = ui_dump.locate(selector, serial)
+                if attrs is not None:
+                    # Selector.matches hanya menerima node dengan bounds valid
+                    x1, y1, x2, y2 = parse_bounds(attrs['bounds'])
+                    return (x1 + x2) // 2, (y1 + y2) // 2
+            else:
+                snapshot = ui_dump.capture_snapshot(serial)
+        except ui_dump.UiDumpError:
+            return None
+        index = snapshot.first(selector)
+        return None if index is None else snapshot.center(index)
+    check.__name__ = f"ada:{_selector_label(selector)}"
+    return check
+
+
+def node_absent(selector, serial=None):
+    """Predikat: tidak ada node yang cocok dengan selector (dump yang gagal tidak dihitung)."""
+    polls = []
+
+    def check():
+        try:
+            if not polls:
+                # Node masih ada: stream berhenti di node itu, tanpa membaca sisa dump
+                polls.append(1)
+                attrs, _ = ui_dump.locate(selector, serial)
+                return attrs is None
+            return ui_dump.capture_snapshot(serial).first(selector) is None
+        except ui_dump.UiDumpError:
+            return False
+    check.__name__ = f"hilang:{_selector_label(selector)}"
+    return check
+
+
+def accessibility_contains(service, serial=None):
+    """Predikat: `enabled_accessibility_services` memuat `service`."""
+    def check():
+        try:
+            exit_code, output = adb_client.shell("settings get secure enabled_accessibility_services", serial=serial)
+        except Exception:
+            return False
+        return exit_code == 0 and service in output
+    check.__name__ = f"aksesibilitas:{service.split('/')[0]}"
+    return check
+
+
+def hierarchy_stable(serial=None):
+    """
+    Predikat: dua dump UI berturut-turut identik (animasi/transisi layar sudah selesai).
+
+    Mengembalikan UiSnapshot layar yang sudah stabil, supaya pencarian berikutnya bisa langsung
+    memakainya tanpa dump ketiga. Hanya dump yang stabil yang diurai; layar kosong dianggap belum stabil.
+    """
+    last = {}
+
+    def check():
+        try:
+            data = ui_dump.capture_xml(serial)
+            digest = fingerprint(data)
+            if last.get('digest') != digest:
+                last['digest'] = digest
+                return None
+            return ui_dump.SNAPSHOT_CACHE.snapshot_for(data)
+        except (ui_dump.UiDumpError, ET.ParseError):
+            return None
+    check.__name__ = "layar stabil"
+    return check
+
+
+def _selector_label(selector):
+    return ",".join(str(part) for part in selector.key if part is not None)